@@ -0,0 +1 @@
+# benchmarks / stand-in servers (не входят в приложение)
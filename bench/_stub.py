@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Локальная заглушка OpenAI-совместимого API для бенчмарков.
+Запускается в фоне на 127.0.0.1:<порт>, base_url -> StubServer.base_url.
+"""
+import hashlib, json, os, ssl, subprocess, tempfile, threading, time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("Владыка, задача принята. Сначала проверь подключение к сети и ключ API. "
+         "Затем перезапусти приложение и повтори запрос. Если ошибка останется, "
+         "открой настройки и смени базовый адрес. Я буду рядом.")
+
+def tokenize(text: str, size: int = 4):
+    return [text[i:i+size] for i in range(0, len(text), size)]
+
+def common_prefix(a: str, b: str) -> int:
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def render_prompt(messages) -> str:
+    """Промпт, как его видит модель: роли и текст по порядку; картинка — меткой по хэшу."""
+    out = []
+    for m in messages:
+        c = m.get("content")
+        if isinstance(c, list):
+            c = "".join(p.get("text", "") if p.get("type") == "text" else
+                        "[img:" + hashlib.sha1(json.dumps(p, sort_keys=True).encode()).hexdigest()[:12] + "]"
+                        for p in c)
+        out.append(f"<|{m.get('role')}|>{c or ''}")
+    return "".join(out)
+
+def self_signed_cert(dirpath: str) -> tuple[str, str]:
+    """Сертификат для localhost/127.0.0.1 через openssl CLI."""
+    cert = os.path.join(dirpath, "stub.crt"); key = os.path.join(dirpath, "stub.key")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+                   check=True, capture_output=True)
+    return cert, key
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        # имитация TCP + TLS рукопожатия на канале с заданным RTT
+        if self.stub.rtt:
+            time.sleep(2 * self.stub.rtt)
+        return sock, addr
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "RedStub/1.0"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *a):
+        pass
+
+    def _json(self, code: int, obj) -> None:
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _read_body(self, n: int, bandwidth: float) -> bytes:
+        if not bandwidth:
+            return self.rfile.read(n) if n else b""
+        # медленный канал: читаем кусками с паузой по пропускной способности
+        parts = []
+        while n > 0:
+            chunk = self.rfile.read(min(n, 16384))
+            if not chunk:
+                break
+            parts.append(chunk); n -= len(chunk)
+            time.sleep(len(chunk) / bandwidth)
+        return b"".join(parts)
+
+    def do_POST(self):
+        st = self.server.stub
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self._read_body(n, st.bandwidth)
+        with st.lock:
+            st.requests += 1
+            st.bytes_in += len(raw)
+        if st.rtt:
+            time.sleep(st.rtt)
+        if self.path.endswith("/chat/completions"):
+            req = json.loads(raw.decode("utf-8") or "{}")
+            st.last_request = req
+            toks = tokenize(st.reply, st.token_size)
+            usage = st.usage_for(req.get("messages") or [], len(toks))
+            # обработка промпта на сервере растёт с его размером
+            time.sleep(st.first_token_delay + st.prefill_per_kb * len(raw) / 1024)
+            if req.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for t in toks:
+                    chunk = {"choices": [{"index": 0, "delta": {"content": t}}]}
+                    self._chunk(("data: " + json.dumps(chunk, ensure_ascii=False) + "\n\n").encode("utf-8"))
+                    time.sleep(st.token_delay)
+                if (req.get("stream_options") or {}).get("include_usage"):
+                    chunk = {"choices": [], "usage": usage}
+                    self._chunk(("data: " + json.dumps(chunk) + "\n\n").encode("utf-8"))
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+                return
+            time.sleep(st.token_delay * len(toks))
+            self._json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": st.reply}}],
+                             "usage": usage})
+            return
+        if self.path.endswith("/audio/transcriptions"):
+            time.sleep(st.transcribe_delay)
+            self._json(200, {"text": st.transcript})
+            return
+        self._json(404, {"error": {"message": "not found"}})
+
+class StubServer:
+    def __init__(self, reply: str = REPLY, first_token_delay: float = 0.25,
+                 token_delay: float = 0.02, token_size: int = 4,
+                 transcript: str = "привет ред", transcribe_delay: float = 0.05,
+                 rtt: float = 0.0, tls: bool = False, bandwidth: float = 0.0,
+                 prefill_per_kb: float = 0.0, cache_min_tokens: int = 1024, cache_block: int = 128):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.token_size = token_size
+        self.transcript = transcript
+        self.transcribe_delay = transcribe_delay
+        self.rtt = rtt
+        self.bandwidth = bandwidth  # байт/с на приём тела запроса, 0 — без ограничения
+        self.prefill_per_kb = prefill_per_kb  # с к первому токену на КиБ тела запроса
+        self.cache_min_tokens = cache_min_tokens  # кэш префикса как у OpenAI: от 1024 токенов,
+        self.cache_block = cache_block            # кусками по 128
+        self.prompts = deque(maxlen=64)
+        self.usage_log = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_in = 0
+        self.last_request = None
+        self.cafile = None
+        self._tmp = None
+        self._srv = _Server(("127.0.0.1", 0), _Handler)
+        self._srv.stub = self
+        if tls:
+            self._tmp = tempfile.TemporaryDirectory()
+            cert, key = self_signed_cert(self._tmp.name)
+            sctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            sctx.load_cert_chain(cert, key)
+            self._srv.socket = sctx.wrap_socket(self._srv.socket, server_side=True)
+            self.cafile = cert
+        self._th = threading.Thread(target=self._srv.serve_forever, daemon=True)
+
+    def usage_for(self, messages, completion_tokens: int) -> dict:
+        """usage как у API: токены ~ 4 символа; cached — общий префикс с недавними запросами."""
+        text = render_prompt(messages)
+        n = len(text) // 4 + 1
+        with self.lock:
+            common = max((common_prefix(text, p) for p in self.prompts), default=0)
+            self.prompts.append(text)
+            cached = common // 4
+            cached = cached - cached % self.cache_block if cached >= self.cache_min_tokens else 0
+            u = {"prompt_tokens": n, "completion_tokens": completion_tokens,
+                 "total_tokens": n + completion_tokens,
+                 "prompt_tokens_details": {"cached_tokens": min(cached, n)}}
+            self.usage_log.append(u)
+        return u
+
+    @property
+    def base_url(self) -> str:
+        port = self._srv.server_address[1]
+        if self.cafile:
+            return f"https://localhost:{port}/v1"
+        return f"http://127.0.0.1:{port}/v1"
+
+    def __enter__(self):
+        self._th.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._srv.shutdown()
+        self._srv.server_close()
+        if self._tmp:
+            self._tmp.cleanup()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Синтетические скриншоты с настоящим текстом (QPainter, offscreen) для OCR-бенчмарков."""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import numpy as np
+
+WORDS = ("окно файл правка вид справка настройки сохранить открыть закрыть поиск "
+         "file edit view help settings save open close search build run debug terminal").split()
+
+def render_text(w: int, h: int, seed: int = 1, pt: int = 11, dark: bool = False) -> np.ndarray:
+    """Экран (h, w, 3) uint8 со строками слов; dark — светлый текст на тёмном фоне."""
+    from PySide6.QtGui import QGuiApplication, QImage, QPainter, QColor, QFont
+    from red2.core.vision import image_to_rgb
+    _app = QGuiApplication.instance() or QGuiApplication([])
+    r = np.random.default_rng(seed)
+    img = QImage(w, h, QImage.Format_RGB888)
+    img.fill(QColor(30, 30, 34) if dark else QColor(250, 250, 250))
+    p = QPainter(img)
+    try:
+        f = QFont("DejaVu Sans"); f.setPointSize(pt); p.setFont(f)
+        p.setPen(QColor(220, 220, 220) if dark else QColor(20, 20, 20))
+        step = int(pt * 2.2)
+        for y in range(step, h - 8, step):
+            if r.random() < 0.25:
+                continue          # пустые строки и поля, как на настоящем экране
+            x0 = int(r.integers(10, max(11, w // 3)))
+            line = " ".join(r.choice(WORDS, int(r.integers(3, 14))))
+            p.drawText(x0, y, line)
+    finally:
+        p.end()
+    return image_to_rgb(img)
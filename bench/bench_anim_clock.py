@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Визуализаторы окна: как было (свой QTimer у NeonSideBar, LeftEqBar, значка трея
+и опроса уровня; update() на каждом тике, градиенты заново на каждую полосу)
+против общих часов anim_clock (один таймер кратно кадру экрана, перерисовка
+только видимого и только при смене картинки, кэш кистей). Offscreen Qt, окно
+с обеими полосами, трей — заглушка. Сценарии по SEC секунд: окно видно (idle,
+listening с шумящим уровнем микрофона) и окно скрыто; печатает paintEvent
+в секунду по виджетам, срабатывания таймеров и CPU процесса в секунду.
+
+  python bench/bench_anim_clock.py [sec]
+"""
+import os, sys, time, math, random
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# PySide6 6.12 на Python 3.11 теряет ссылки на None/True при вызовах из Python (см. bench_service)
+_KEEP = [None] * 4_000_000 + [True] * 2_000_000
+
+from PySide6.QtCore import QTimer, QEventLoop, QRectF
+from PySide6.QtGui import QColor, QPainter, QLinearGradient, QBrush
+from PySide6.QtWidgets import QApplication, QWidget, QHBoxLayout
+from red2.ui.anim_clock import AnimClock
+from red2.ui.neon_widgets import NeonSideBar
+from red2.ui.left_eq import LeftEqBar, TOKENS
+from red2.ui.tray_anim import TrayAnimator
+from bench_tray_anim import FakeTray, OldTrayAnimator
+
+class OldNeonSideBar(QWidget):
+    """NeonSideBar до общих часов (копия для сравнения)."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._level = 0.0; self._state = "idle"; self._t = 0; self.paints = 0
+        self._timer = QTimer(self); self._timer.setInterval(60); self._timer.timeout.connect(self._tick); self._timer.start()
+        self.setFixedWidth(14)
+    def set_level(self, v): self._level = max(0.0, min(1.0, float(v))); self.update()
+    def set_state(self, s): self._state = s; self.update()
+    def _tick(self): self._t = (self._t + 1) % 10000; self.update()
+    def paintEvent(self, ev):
+        self.paints += 1
+        p = QPainter(self); p.setRenderHint(QPainter.Antialiasing, True)
+        w = self.width(); h = self.height(); p.fillRect(self.rect(), QColor(10,12,18))
+        for i in range(10):
+            y = h - 6 - i * 13
+            amp = 0.12 if self._state == "idle" else (0.25 + 0.6*self._level if self._state == "listening" else 0.45)
+            amp += 0.1*((self._t/7 + i*0.9) % 2 > 1) * (1 if self._state!="idle" else 0)
+            amp = max(0.08, min(1.0, amp))
+            rect = QRectF(3, y, w - 6, int(8 * (0.5 + 0.5*amp)))
+            grad = QLinearGradient(rect.topLeft(), rect.bottomRight())
+            grad.setColorAt(0.0, QColor("#ff0033")); grad.setColorAt(1.0, QColor("#ff1a8a"))
+            p.fillRect(rect, QBrush(grad))
+        p.setPen(QColor(255,0,51,120)); p.drawRect(self.rect().adjusted(0,0,-1,-1)); p.end()
+
+class OldLeftEqBar(QWidget):
+    """LeftEqBar до общих часов (копия для сравнения)."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedWidth(88); self.state = "idle"; self.muted = False; self._t = 0; self.paints = 0
+        self._timer = QTimer(self); self._timer.setInterval(50); self._timer.timeout.connect(self._tick); self._timer.start()
+    def set_state(self, s): self.state = s; self.update()
+    def _tick(self): self._t = (self._t + 1) % 10_000; self.update()
+    def paintEvent(self, event):
+        self.paints += 1
+        W = self.width(); H = self.height(); p = QPainter(self)
+        p.fillRect(0, 0, W, H, QColor(TOKENS["bg2"]))
+        for i in range(32):
+            y0 = int(i*(H/32)); y1 = int((i+1)*(H/32) - 3)
+            base = 0.12 if self.muted or self.state == "idle" else (0.35 if self.state == "listening" else 0.65)
+            phase = (self._t/12.0) + i*0.55
+            amp = max(0.05, min(base + 0.15*math.sin(phase) + 0.08*math.sin(phase*1.7) + 0.05*random.random(), 1.0))
+            w = int(W * (0.18 + amp*0.70))
+            grad = QLinearGradient(0, y0, w, y0)
+            grad.setColorAt(0.0, QColor(TOKENS["red"])); grad.setColorAt(1.0, QColor(TOKENS["redHot"]))
+            p.fillRect(0, y0, w, max(1, y1-y0), QBrush(grad))
+            p.fillRect(0, y0+2, max(0, w-4), max(1, y1-y0-4), QColor(TOKENS["redDeep"]))
+        for x in range(6):
+            p.fillRect(W + x - 6, 0, 1, H, QColor(TOKENS["red"]))
+        p.end()
+
+class Rig:
+    """Окно с полосами + трей + опрос уровня, в старом или новом виде."""
+    def __init__(self, new: bool):
+        self.new = new; self.rnd = random.Random(1); self.state = "idle"; self.fires = 0
+        self.win = QWidget(); self.win.resize(420, 640)
+        lay = QHBoxLayout(self.win); lay.setContentsMargins(0, 0, 0, 0)
+        self.tray = FakeTray()
+        if new:
+            self.clock = AnimClock()
+            self.eq = LeftEqBar(clock=self.clock); self.neon = NeonSideBar(clock=self.clock)
+            self.anim = TrayAnimator(self.tray, clock=self.clock)
+            self.clock.add(lambda now: self._level(), 90, "level")
+        else:
+            self.eq = OldLeftEqBar(); self.neon = OldNeonSideBar(); self.anim = OldTrayAnimator(self.tray)
+            self.timer = QTimer(); self.timer.setInterval(90); self.timer.timeout.connect(self._level); self.timer.start()
+            for t in (self.eq._timer, self.neon._timer, self.anim.timer, self.timer):
+                t.timeout.connect(self._fired)
+        lay.addWidget(self.eq); lay.addWidget(QWidget(), 1); lay.addWidget(self.neon)
+
+    def _fired(self): self.fires += 1
+
+    def _level(self):
+        lvl = 0.5 + 0.4 * math.sin(time.monotonic() * 3) + self.rnd.uniform(-0.1, 0.1) if self.state == "listening" else 0.0
+        self.anim.set_level(lvl); self.neon.set_level(lvl)
+
+    def set_state(self, s):
+        self.state = s
+        for w in (self.eq, self.neon, self.anim): w.set_state(s)
+
+    def stop(self):
+        self.win.hide(); self.win.deleteLater()
+        if self.new:
+            self.clock.timer.stop(); self.clock.deleteLater()
+        else:
+            for t in (self.eq._timer, self.neon._timer, self.anim.timer, self.timer): t.stop()
+
+def run(new, state, visible, sec):
+    rig = Rig(new); rig.set_state(state)
+    if visible: rig.win.show()
+    loop = QEventLoop(); QTimer.singleShot(300, loop.quit); loop.exec()   # первый показ — мимо замера
+    p0 = (rig.eq.paints, rig.neon.paints); t0 = rig.clock.ticks if new else rig.fires
+    loop = QEventLoop(); QTimer.singleShot(int(sec * 1000), loop.quit)
+    c0 = time.process_time(); loop.exec(); cpu = time.process_time() - c0
+    ticks = (rig.clock.ticks if new else rig.fires) - t0
+    eq, neon = rig.eq.paints - p0[0], rig.neon.paints - p0[1]
+    rig.stop()
+    return cpu / sec, eq / sec, neon / sec, ticks / sec
+
+def main():
+    sec = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    app = QApplication([])
+    print(f"{sec:.0f} s per scenario, numbers per second")
+    for label, state, visible in (("visible idle", "idle", True), ("visible listening", "listening", True),
+                                  ("hidden listening", "listening", False), ("hidden idle", "idle", False)):
+        base = None
+        for name, new in (("old", False), ("clock", True)):
+            cpu, eq, neon, ticks = run(new, state, visible, sec)
+            base = base or cpu
+            print(f"{label:17s} {name:5s}: CPU {cpu*1000:6.1f} ms/s ({base/max(cpu, 1e-9):5.1f}x)  "
+                  f"paints eq {eq:5.1f}/s neon {neon:5.1f}/s  timer fires {ticks:5.1f}/s")
+
+if __name__ == "__main__":
+    main()
+    sys.stdout.flush(); os._exit(0)   # без финализации: запас ссылок выше не должен освобождаться
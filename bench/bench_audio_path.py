@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Путь «запись -> STT»: старый (очередь копий + concatenate + WAV в tmp_audio +
+повторное чтение файла) против PcmRing/AudioClip в памяти.
+Считает пик памяти (tracemalloc) за запись и задержку stop -> первые байты
+для Vosk и stop -> готовое тело для Whisper. Микрофон не нужен: колбэк
+вызывается напрямую блоками по 20 мс.
+
+  python bench/bench_audio_path.py [seconds]
+"""
+import os, sys, io, time, queue, wave, tempfile, tracemalloc, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+import numpy as np
+from red2.core.audio_buffer import PcmRing, AudioClip
+
+SR = 16000
+BLOCK = 320  # 20 мс
+RUNS = 10
+
+def blocks(sec: float):
+    rng = np.random.default_rng(0)
+    n = int(sec * SR / BLOCK)
+    return [rng.integers(-3000, 3000, size=(BLOCK, 1), dtype=np.int16) for _ in range(n)]
+
+def old_path(blks, tmpdir):
+    q = queue.Queue(); frames = []
+    for b in blks:                      # _callback
+        q.put(b.copy())
+    t0 = time.perf_counter()            # stop()
+    while not q.empty():
+        frames.append(q.get())
+    data = np.concatenate(frames, axis=0)
+    path = os.path.join(tmpdir, "rec.wav")
+    try:
+        import soundfile as sf
+        sf.write(path, data, SR, subtype="PCM_16")
+    except ImportError:
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(SR); wf.writeframes(data.tobytes())
+    with wave.open(path, "rb") as wf:   # stt_vosk_wav
+        wf.readframes(4000)
+    t_vosk = time.perf_counter() - t0
+    with open(path, "rb") as f:         # transcribe_whisper
+        f.read()
+    t_whisper = time.perf_counter() - t0
+    return t_vosk, t_whisper
+
+def new_path(blks, ring):
+    ring.reset()
+    for b in blks:                      # _callback
+        ring.write(b)
+    t0 = time.perf_counter()            # stop()
+    clip = AudioClip(ring.view(), SR, ring=ring)
+    next(clip.iter_chunks(4000))        # stt_vosk_wav(clip)
+    t_vosk = time.perf_counter() - t0
+    clip.to_wav_bytes()                 # stt_openai_wav(clip)
+    t_whisper = time.perf_counter() - t0
+    return t_vosk, t_whisper
+
+def allocs(fn, *a):
+    """Пик дополнительной памяти за вызов и число удержанных после него блоков (tracemalloc)."""
+    tracemalloc.start()
+    s0 = tracemalloc.take_snapshot()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn(*a)
+    _, peak = tracemalloc.get_traced_memory()
+    s1 = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    kept = sum(max(0, d.count_diff) for d in s1.compare_to(s0, "lineno"))
+    return peak - base, kept
+
+def main():
+    sec = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    blks = blocks(sec)
+    ring = PcmRing(SR, 1, max_sec=max(120.0, sec + 1))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn, arg in (("tmp WAV ", old_path, tmp), ("in-memory", new_path, ring)):
+            res = [fn(blks, arg) for _ in range(RUNS)]
+            peak, kept = allocs(fn, blks, arg)
+            print(f"{name} {sec:.0f}s: stop->vosk {statistics.median(r[0] for r in res)*1000:6.2f} ms, "
+                  f"stop->whisper body {statistics.median(r[1] for r in res)*1000:6.2f} ms, "
+                  f"peak heap +{peak/1024:.0f} KiB, retained blocks {kept}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Режимы захвата для Vision: весь экран, активное окно, область у курсора,
+выделенный прямоугольник. Рабочий стол 1920x1080 синтетический, геометрия окна
+и курсора — из StaticBackend (как в тестах под X11). Печатает пиксели,
+время OCR (если есть Tesseract) и размер картинки для vision-модели по режимам.
+
+  python bench/bench_capture_modes.py [lang]
+"""
+import os, sys, time, tempfile
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+_TMP = tempfile.mkdtemp(prefix="red-bench-")
+os.environ["APPDATA"] = _TMP; os.environ["HOME"] = _TMP
+
+from bench._text import render_text
+from red2.core import ocr, vision, window_geom as wg
+
+SCREEN = wg.Rect(0, 0, 1920, 1080)
+WINDOW = wg.WindowInfo("Блокнот", wg.Rect(320, 140, 1100, 760))
+CURSOR = (900, 500)
+USER_RECT = wg.Rect(400, 300, 700, 260)
+
+def main():
+    lang = sys.argv[1] if len(sys.argv) > 1 else "eng"
+    os.environ["TESSERACT_LANG"] = lang
+    desk = render_text(SCREEN.w, SCREEN.h, seed=4)
+    eng = ocr.engine(lang)
+    if eng is None:
+        print("no Tesseract here — OCR time skipped")
+    else:
+        ocr.recognize(desk[:200, :200], lang)   # прогрев
+    opts = vision.upload_options({})
+    print(f"{'mode':7s} {'size':>10s} {'Mpx':>5s} {'OCR ms':>7s} {'PNG KiB':>8s} {'upload KiB':>10s}")
+    full_ocr = None
+    for mode in vision.CAPTURE_MODES:
+        r = vision.capture_rect(mode, SCREEN, WINDOW, CURSOR, USER_RECT) or SCREEN
+        rgb = desk[r.y:r.y + r.h, r.x:r.x + r.w]
+        img = vision.rgb_to_image(rgb)
+        t_ocr = ""
+        if eng is not None:
+            t0 = time.perf_counter(); ocr.recognize(rgb, lang); dt = time.perf_counter() - t0
+            full_ocr = full_ocr or dt
+            t_ocr = f"{dt*1000:7.0f}"
+        png = len(vision._png_bytes(img))
+        up, _mime = vision.encode_for_llm(img, **opts)
+        print(f"{mode:7s} {r.w:>5d}x{r.h:<4d} {r.w*r.h/1e6:5.2f} {t_ocr:>7s} {png/1024:8.1f} {len(up)/1024:10.1f}")
+    ocr.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Лента чата: QListWidget + scrollToBottom на каждое сообщение (как было) против
+ChatView (модель, делегат с кэшем высот, страницы на диск). Offscreen Qt, окно
+показано, стиль приложения подключён. Каждый прогон — отдельный процесс, чтобы
+RSS был честным. Лента заполняется до N (события — каждые 500 сообщений), затем
+меряются 200 добавлений с отрисовкой после каждого и потоковый ответ: 400 кусков
+по ~10 символов в одно сообщение (старое — setText всей строки).
+
+  python bench/bench_chat_view.py [10000,100000]
+"""
+import os, sys, time, json, subprocess
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+FILL_TIMEOUT = 120.0
+# PySide6 6.12 на Python 3.11 теряет ссылку на None (как на True в bench_service) при
+# вызовах void-методов Qt из Python — ~2 на сообщение; запас, чтобы процесс дожил до конца
+_KEEP_NONE = [None] * 8_000_000
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return 0.0
+
+def message(i: int) -> str:
+    if i % 25 == 0:   # длинный ответ LLM, несколько КБ
+        return " ".join(f"Пункт {j}: открой меню, выбери нужный раздел и проверь настройки." for j in range(40))
+    return f"Сообщение {i}: как закрыть вкладку и не потерять изменения?"
+
+def child(impl: str, n: int) -> dict:
+    from pathlib import Path
+    from PySide6.QtWidgets import QApplication, QListWidget
+    app = QApplication([])
+    app.setStyleSheet((Path(BASE) / "red2" / "ui" / "style.qss").read_text(encoding="utf-8"))
+    rss0 = rss_mb()
+    if impl == "old":
+        w = QListWidget()
+        def append(role, text):
+            w.addItem(("Владыка:" if role == "user" else "Red:") + " " + text); w.scrollToBottom()
+            return w.count() - 1
+        def extend(row, acc):
+            w.item(row).setText("Red: " + acc); w.scrollToBottom()
+    else:
+        from red2.ui.chat_view import ChatView
+        w = ChatView()
+        append = w.append
+        def extend(uid, acc):
+            w.extend(uid, acc[-10:])
+    w.resize(700, 560); w.show(); app.processEvents()
+    t0 = time.perf_counter(); filled = n
+    for i in range(n):
+        append("user" if i % 2 else "assistant", message(i))
+        if i % 500 == 499:
+            app.processEvents()
+            if time.perf_counter() - t0 > FILL_TIMEOUT:
+                filled = i + 1; break
+    app.processEvents()
+    fill = time.perf_counter() - t0
+    lat = []
+    for i in range(200):
+        t = time.perf_counter()
+        append("user", message(filled + i)); app.processEvents()
+        lat.append(time.perf_counter() - t)
+    row = append("assistant", "")
+    acc = ""; slat = []
+    for i in range(400):
+        acc += f"кусок {i:03d} "
+        t = time.perf_counter(); extend(row, acc); app.processEvents(); slat.append(time.perf_counter() - t)
+    lat.sort(); slat.sort()
+    out = {"filled": filled, "fill_s": fill, "p50": lat[100], "p95": lat[190], "s_p50": slat[200], "s_p95": slat[380],
+           "rss": rss_mb() - rss0}
+    if impl == "new":
+        out["in_memory"] = w.chat.rowCount(); out["measured"] = w.delegate.measured; out["laid_out"] = w.delegate.laid_out
+    w.close()
+    return out
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        print(json.dumps(child(sys.argv[2], int(sys.argv[3])))); return
+    sizes = [int(x) for x in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000").split(",")]
+    for n in sizes:
+        for impl in ("old", "new"):
+            out = subprocess.run([sys.executable, __file__, "--child", impl, str(n)], capture_output=True, text=True)
+            try:
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+            except Exception:
+                print(impl, n, "failed:", out.stderr[-800:]); continue
+            extra = f"  rows in memory {r['in_memory']}, heights measured {r['measured']}, layouts {r['laid_out']}" \
+                if impl == "new" else ""
+            cut = "" if r["filled"] == n else f" (stopped at {r['filled']} after {FILL_TIMEOUT:.0f} s)"
+            print(f"{n:>7d} {impl}: fill {r['fill_s']:7.1f} s{cut}  append p50={r['p50']*1000:6.2f} ms "
+                  f"p95={r['p95']*1000:6.2f} ms  stream chunk p50={r['s_p50']*1000:6.2f} ms p95={r['s_p95']*1000:6.2f} ms  "
+                  f"RSS +{r['rss']:6.0f} MiB{extra}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+История диалога на 200 реплик против заглушки API (сервер тратит
+PREFILL_PER_KB на каждый КиБ промпта):
+  unbounded — вся история + контекст экрана копится в self.messages;
+  store     — Conversation: бюджет модели, свёртка старого, дедуп контекста экрана.
+Печатает токены промпта на запрос и задержку до ответа по ходу сессии.
+
+  python bench/bench_conversation.py [turns]
+"""
+import os, sys, time, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from bench._stub import StubServer
+
+PREFILL_PER_KB = 0.01
+MODEL = "gpt-4o-mini"
+SYSTEM = "Ты Red — краткий голосовой ассистент. Обращайся к пользователю «Владыка»."
+QUESTIONS = ["Что у меня на экране?", "Переведи заголовок.", "Как перезапустить сервер?",
+             "Напомни, о чём мы говорили.", "Открой браузер.", "Сколько времени займёт сборка?",
+             "Почему тест падает?", "Сделай краткий план на день."]
+
+def screen_ctx(i):
+    return [{"role": "system", "content": f"Контекст экрана: окно редактора, открыт файл module_{i % 7}.py"},
+            {"role": "system", "content": "Активное окно: Visual Studio Code"},
+            {"role": "system", "content": "OCR: def main():\n    run_server(port=8080)\n" * 6}]
+
+def run(mode, turns, http, srv):
+    from red2.core import conversation as cv, service
+    conv = cv.Conversation(SYSTEM, budget=cv.budget_for(MODEL))
+    summarize = cv.llm_summarizer(MODEL)
+    messages = [{"role": "system", "content": SYSTEM}]
+    toks, lats, checkpoints = [], [], []
+    jobs = []
+    for i in range(turns):
+        q = QUESTIONS[i % len(QUESTIONS)] + f" (#{i})"
+        ctx = screen_ctx(i) if i % 3 == 0 else []
+        if mode == "unbounded":
+            messages.extend(ctx); messages.append({"role": "user", "content": q})
+            msgs = list(messages)
+        else:
+            conv.add_user(q); msgs = conv.build(ctx)
+        t0 = time.perf_counter()
+        reply = http.chat_completions(MODEL, msgs)
+        lats.append(time.perf_counter() - t0)
+        toks.append(cv.messages_tokens(srv.last_request["messages"]))
+        if mode == "unbounded":
+            messages.append({"role": "assistant", "content": reply})
+        else:
+            conv.add_assistant(reply)
+            if conv.needs_compaction():
+                jobs.append(service.submit(conv.compact, summarize, backend="llm"))
+        if (i + 1) % 50 == 0:
+            checkpoints.append((i + 1, toks[-1], lats[-1]))
+    for j in jobs:
+        j.wait(30)
+    return toks, lats, checkpoints, conv.stats()
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with StubServer(first_token_delay=0.01, token_delay=0.0, prefill_per_kb=PREFILL_PER_KB) as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core import http_openai as http
+        print(f"turns={turns} prefill={PREFILL_PER_KB*1000:.0f} ms/KiB model={MODEL}")
+        for mode in ("unbounded", "store"):
+            n0 = srv.requests
+            toks, lats, cps, st = run(mode, turns, http, srv)
+            print(f"{mode:9s} prompt tokens: mean={statistics.mean(toks):7.0f} max={max(toks):6d} "
+                  f"total={sum(toks):8d} | latency p50={statistics.median(lats)*1000:6.1f} ms "
+                  f"max={max(lats)*1000:6.1f} ms | requests={srv.requests - n0}")
+            print("          " + "  ".join(f"turn {t}: {k} tok {l*1000:.0f} ms" for t, k, l in cps))
+            if mode == "store":
+                print(f"          compactions={st['compactions']} history={st['history_tokens']} tok "
+                      f"summary={st['summary_tokens']} tok budget={st['budget']}")
+
+if __name__ == "__main__":
+    main()
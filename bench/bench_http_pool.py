@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Латентность запроса через http_openai с пулом keep-alive соединений и без него.
+Локальный TLS-стенд (самоподписанный сертификат), опционально с имитацией RTT.
+
+  python bench/bench_http_pool.py [rtt_ms]
+"""
+import os, sys, time, tempfile, statistics, threading
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from bench._stub import StubServer
+
+N = 40
+THREADS = 4
+MSGS = [{"role": "user", "content": "ping"}]
+
+def pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+def run(http, use_pool: bool, wav: str):
+    http.USE_POOL = use_pool
+    http.close_connections()
+    http._POOL.created = http._POOL.reused = 0
+    chat, stt = [], []
+    for _ in range(N):
+        t0 = time.perf_counter(); http.chat_completions("stub", MSGS); chat.append(time.perf_counter() - t0)
+        t0 = time.perf_counter(); http.transcribe_whisper(wav); stt.append(time.perf_counter() - t0)
+    # параллельные воркеры (как одновременные QThread)
+    errors = []
+    def worker():
+        try:
+            for _ in range(N // THREADS):
+                http.chat_completions("stub", MSGS)
+        except Exception as e:
+            errors.append(e)
+    t0 = time.perf_counter()
+    ths = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in ths: t.start()
+    for t in ths: t.join()
+    par = time.perf_counter() - t0
+    return chat, stt, par, errors
+
+def main():
+    rtt = float(sys.argv[1]) / 1000.0 if len(sys.argv) > 1 else 0.0
+    with tempfile.TemporaryDirectory() as tmp, \
+         StubServer(first_token_delay=0.0, token_delay=0.0, transcribe_delay=0.0, rtt=rtt, tls=True) as srv:
+        wav = os.path.join(tmp, "a.wav")
+        with open(wav, "wb") as f:
+            f.write(b"RIFF" + b"\0" * 64000)
+        os.environ["SSL_CERT_FILE"] = srv.cafile
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core import http_openai as http
+        print(f"TLS stub {srv.base_url}, simulated RTT {rtt*1000:.0f} ms, {N} requests each")
+        for use_pool in (False, True):
+            chat, stt, par, errors = run(http, use_pool, wav)
+            print(f"pool={'on ' if use_pool else 'off'} chat p50 {statistics.median(chat)*1000:6.2f} ms "
+                  f"p90 {pct(chat, .9)*1000:6.2f} | whisper p50 {statistics.median(stt)*1000:6.2f} ms | "
+                  f"{THREADS} threads x {N // THREADS}: {par*1000:7.1f} ms | "
+                  f"conns created {http._POOL.created}, reused {http._POOL.reused}, errors {len(errors)}")
+
+if __name__ == "__main__":
+    main()
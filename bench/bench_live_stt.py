@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Реплей WAV-файлов в LiveTranscriber в реальном времени (блоки как у
+sounddevice) и замер задержки «конец речи -> финальный текст»
+против обычного пути (запись целиком -> stt_vosk_wav).
+
+  set VOSK_MODEL_PATH=...\\vosk-model-small-ru-0.22
+  python bench/bench_live_stt.py rec1.wav rec2.wav ...
+"""
+import os, sys, time, wave
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+import numpy as np
+from red2.core import config, stt
+from red2.core.live_stt import LiveTranscriber
+
+BLOCK_MS = 20
+
+def read_wav(path: str):
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise SystemExit(f"{path}: нужен 16-bit PCM")
+        sr, ch = wf.getframerate(), wf.getnchannels()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).reshape(-1, ch)
+    return sr, pcm
+
+def replay(path: str, model_dir: str):
+    sr, pcm = read_wav(path)
+    partials = []
+    live = LiveTranscriber(model_dir, samplerate=sr, on_partial=partials.append)
+    step = int(sr * BLOCK_MS / 1000)
+    t_start = time.monotonic()
+    for i in range(0, len(pcm), step):
+        # реальное время: блок приходит не раньше, чем «прозвучал»
+        delay = t_start + (i + step) / sr - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        live.feed(pcm[i:i + step].copy())
+    t_release = time.monotonic()
+    text = live.finish(timeout=30)
+    t_final = time.monotonic()
+    # конец речи по VAD (если в хвосте тишина), иначе — момент отпускания
+    speech_end = live.speech_end_t or t_release
+    return {
+        "duration": len(pcm) / sr,
+        "release_to_final": t_final - t_release,
+        "speech_end_to_final": t_final - speech_end,
+        "partials": len(partials),
+        "text": text,
+        "error": live.error,
+    }
+
+def batch(path: str):
+    t0 = time.perf_counter()
+    text = stt.stt_vosk_wav(path)
+    return time.perf_counter() - t0, text
+
+def main():
+    model_dir = config.vosk_model_path()
+    if not model_dir:
+        raise SystemExit("VOSK_MODEL_PATH не задан")
+    paths = sys.argv[1:]
+    if not paths:
+        raise SystemExit(__doc__)
+    stt.vosk_model(model_dir)  # прогрев файлового кэша, чтобы не мерить холодный диск
+    for p in paths:
+        r = replay(p, model_dir)
+        bt, btext = batch(p)
+        print(f"{os.path.basename(p)} ({r['duration']:.1f}s): live release->final {r['release_to_final']*1000:.0f} ms, "
+              f"speech end->final {r['speech_end_to_final']*1000:.0f} ms, partials {r['partials']} | "
+              f"batch after release {bt*1000:.0f} ms")
+        print(f"  live:  {r['text']!r}{'  ERROR ' + r['error'] if r['error'] else ''}")
+        print(f"  batch: {btext!r}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш ответов LLM: повтор записанной сессии против заглушки API.
+Сессия — JSONL с {"model", "messages", "temperature"?, "nocache"?} по строке;
+кэшируются только запросы с temperature=0 (как в llm.chat по умолчанию).
+Без аргумента — встроенная типичная сессия с теми же аргументами, что у
+приложения: описание неизменного экрана (_describe_llm, temperature=0),
+перевод того же OCR (без истории, temperature=0), вопросы в чат
+(температура по умолчанию — мимо кэша) и «придумай» с cache=False.
+Прогоны: без кэша / холодный кэш / тёплый кэш (новый процесс, та же база).
+
+  python bench/bench_llm_cache.py [session.jsonl]
+"""
+import os, sys, json, time, base64, tempfile, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from bench._stub import StubServer
+
+MODEL = "gpt-4o-mini"
+SYSTEM = {"role": "system", "content": "Ты Red — краткий голосовой ассистент."}
+
+def builtin_session():
+    from red2.core.vision import VISION_PROMPT   # после OPENAI_* из main: клиент читает их при импорте
+    shots = [base64.b64encode(bytes([i]) * 30_000).decode() for i in range(3)]
+    ocr = ["Settings  Network  Proxy  Apply", "Ошибка: файл не найден", "Build succeeded 0 warnings"]
+    out = []
+    for i in range(60):
+        s = i % 7
+        if s in (0, 1):     # Ctrl+4 по одному и тому же экрану
+            shot = shots[(i // 20) % 3]
+            out.append({"model": MODEL, "temperature": 0.0, "messages": [
+                {"role": "system", "content": VISION_PROMPT},
+                {"role": "user", "content": [{"type": "text", "text": "Заголовок активного окна: VS Code\n"},
+                                             {"type": "image_url", "image_url": {"url": "data:image/png;base64," + shot}}]}]})
+        elif s in (2, 3):   # «переведи» одного и того же текста
+            out.append({"model": MODEL, "temperature": 0.0, "messages": [
+                SYSTEM, {"role": "system", "content": "Ты переводчик. Переводи максимально кратко и точно без вступлений."},
+                {"role": "user", "content": f"Переведи на русский этот текст с экрана:\n{ocr[i % 3]}"}]})
+        elif s == 4:        # повторный вопрос в чат: температура по умолчанию, не кэшируется
+            q = ["Как перезапустить сервер?", "Как  перезапустить сервер? "][i % 2]
+            out.append({"model": MODEL, "messages": [SYSTEM, {"role": "user", "content": q}]})
+        elif s == 5:        # уникальный вопрос
+            out.append({"model": MODEL, "messages": [SYSTEM, {"role": "user", "content": f"Вопрос номер {i}"}]})
+        else:               # «придумай» — в обход кэша
+            out.append({"model": MODEL, "temperature": 1.0, "nocache": True,
+                        "messages": [SYSTEM, {"role": "user", "content": "Придумай шутку."}]})
+    return out
+
+def replay(session, use_cache, db):
+    from red2.core import llm, llm_cache
+    llm_cache._CACHE = llm_cache.LLMCache(db) if use_cache else None
+    orig = llm_cache.cache
+    if not use_cache:
+        llm_cache.cache = lambda: None
+    lats = []
+    try:
+        for r in session:
+            t0 = time.perf_counter()
+            llm.chat(r["messages"], model=r.get("model"), temperature=r.get("temperature"),
+                     cache=False if r.get("nocache") else None)
+            lats.append(time.perf_counter() - t0)
+    finally:
+        llm_cache.cache = orig
+    st = llm_cache._CACHE.stats() if use_cache else {}
+    if use_cache:
+        llm_cache._CACHE.close(); llm_cache._CACHE = None
+    return lats, st
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            session = [json.loads(l) for l in f if l.strip()]
+    with StubServer(first_token_delay=0.3, token_delay=0.002) as srv, tempfile.TemporaryDirectory() as d:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        if len(sys.argv) <= 1:
+            session = builtin_session()
+        db = os.path.join(d, "llm_cache.sqlite")
+        print(f"session: {len(session)} requests")
+        for name, use in (("no cache", False), ("cold cache", True), ("warm cache", True)):
+            n0 = srv.requests
+            lats, st = replay(session, use, db)
+            line = (f"{name:10s} total={sum(lats):6.2f} s p50={statistics.median(lats)*1000:7.1f} ms "
+                    f"api requests={srv.requests - n0:3d}")
+            if st:
+                line += (f" | hit_rate={st['hit_rate']*100:5.1f}% hits={st['hits']} misses={st['misses']} "
+                         f"bypass={st['bypass']} saved={st['saved_sec']:.2f} s entries={st['entries']}")
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Time-to-first-token / time-to-first-audio: блокирующий chat_completions
+против SSE-стрима с нарезкой на предложения.
+TTS имитируется: синтез занимает SYNTH_BASE + SYNTH_PER_CHAR * len(text).
+
+  python bench/bench_llm_stream.py
+"""
+import os, sys, time, threading, queue, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from bench._stub import StubServer
+
+SYNTH_BASE = 0.15
+SYNTH_PER_CHAR = 0.004
+RUNS = 5
+MSGS = [{"role": "user", "content": "Что делать, если не работает?"}]
+
+def fake_synth(text: str) -> None:
+    time.sleep(SYNTH_BASE + SYNTH_PER_CHAR * len(text))
+
+def run_blocking(http):
+    t0 = time.perf_counter()
+    text = http.chat_completions("stub", MSGS)
+    ttft = time.perf_counter() - t0
+    fake_synth(text)
+    return ttft, time.perf_counter() - t0
+
+def run_stream(http):
+    from red2.core.sentences import SentenceBuffer
+    q = queue.Queue(); first_audio = {}
+    t0 = time.perf_counter()
+    def synth_loop():
+        while True:
+            s = q.get()
+            if s is None: return
+            fake_synth(s)
+            first_audio.setdefault("t", time.perf_counter() - t0)
+    th = threading.Thread(target=synth_loop, daemon=True); th.start()
+    sb = SentenceBuffer(); ttft = None
+    for d in http.chat_completions_stream("stub", MSGS):
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        for s in sb.feed(d):
+            q.put(s)
+    tail = sb.flush()
+    if tail: q.put(tail)
+    q.put(None); th.join()
+    return ttft, first_audio.get("t", float("nan"))
+
+def main():
+    with StubServer() as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core import http_openai as http
+        for name, fn in (("blocking", run_blocking), ("stream", run_stream)):
+            ttft, ttfa = zip(*(fn(http) for _ in range(RUNS)))
+            print(f"{name:9s} TTFT median {statistics.median(ttft)*1000:7.1f} ms | "
+                  f"first audio median {statistics.median(ttfa)*1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Долгая память: вставка и поиск на 10k / 100k / 1M записей (синтетические
+реплики и описания экрана из словаря псевдослов). Запрос — запись с выкинутой
+третью слов; попадание — если исходная запись в top-5. Печатает скорость
+вставки (с SQLite и переиндексацией), RSS, размер базы, время загрузки с диска,
+p50/p95 поиска в бюджете 20 мс против полного перебора.
+
+  python bench/bench_memory.py [10000,100000,1000000]
+"""
+import os, sys, time, tempfile, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+import numpy as np
+from red2.core import memory
+
+BATCH = 10000
+QUERIES = 300
+BUDGET_MS = 20.0
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return 0.0
+
+def vocab(n=20000, seed=1):
+    rng = np.random.default_rng(seed)
+    syl = [a + b for a in "бвгдзклмнпрстфхцчшщ" for b in "аеиоуыэюя"]
+    return ["".join(syl[j] for j in rng.integers(0, len(syl), rng.integers(2, 5))) for _ in range(n)]
+
+def texts(words, start, n, seed):
+    rng = np.random.default_rng(seed)
+    lens = rng.integers(6, 17, n)
+    ids = rng.zipf(1.3, (n, 16)) % len(words)
+    kinds = ("turn", "screen", "ocr")
+    return [(kinds[(start + i) % 3], " ".join(words[j] for j in ids[i, :lens[i]])) for i in range(n)]
+
+def query_of(text, rng):
+    w = text.split()
+    keep = sorted(rng.choice(len(w), max(3, len(w) * 2 // 3), replace=False))
+    return " ".join(w[i] for i in keep)
+
+def brute(m, q, k=5):
+    ix = m._ix
+    s = np.concatenate([(ix.vecs[a:a + 65536].astype(np.float32) @ q) * ix.scale[a:a + 65536]
+                        for a in range(0, ix.n, 65536)])[:ix.n]
+    return set(int(ix.ids[i]) for i in np.argpartition(-s, k)[:k])
+
+def run(n, words):
+    tmp = tempfile.mkdtemp(prefix="red-bench-")
+    path = os.path.join(tmp, "memory.sqlite")
+    m = memory.Memory(path, max_items=0)
+    m.load()
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    kept = {}
+    per = -(-QUERIES * 2 // -(-n // BATCH))       # цели для запросов — равномерно по всем пачкам
+    for b in range(0, n, BATCH):
+        items = texts(words, b, min(BATCH, n - b), seed=b)
+        ids = m.add_many(items)
+        for i in range(0, len(ids), max(1, len(ids) // per)):
+            kept[ids[i]] = items[i][1]
+    dt = time.perf_counter() - t0
+    st = m.stats()
+    size = os.path.getsize(path) / 2**20
+    print(f"{n:>8d}: insert {n/dt:8.0f}/s ({dt:6.1f} s, reindex {st['reindex_sec']:5.1f} s)  "
+          f"lists={st['lists']:4d}  RSS +{rss_mb()-rss0:6.0f} MiB  db {size:6.0f} MiB")
+
+    rng = np.random.default_rng(7)
+    targets = list(kept.items()); rng.shuffle(targets); targets = targets[:QUERIES]
+    lat, hit, bl, bhit = [], 0, [], 0
+    for j, (tid, text) in enumerate(targets):
+        q = query_of(text, rng)
+        t = time.perf_counter(); hits = m.search(q, k=5, budget_ms=BUDGET_MS); lat.append(time.perf_counter() - t)
+        hit += any(h.id == tid for h in hits)
+        if j < 50:
+            t = time.perf_counter(); ex = brute(m, memory.embed(q)); bl.append(time.perf_counter() - t)
+            bhit += tid in ex
+    lat.sort(); st = m.stats()
+    print(f"{'':>8s}  search p50={lat[len(lat)//2]*1000:5.1f} ms p95={lat[int(len(lat)*.95)]*1000:5.1f} ms "
+          f"max={lat[-1]*1000:5.1f} ms recall@5={hit/len(targets):.0%} cut by budget {st['cut_by_budget']}/{st['searches']}"
+          f"  |  brute force p50={statistics.median(bl)*1000:6.1f} ms recall@5={bhit/len(bl):.0%}")
+    m.close()
+    t = time.perf_counter(); m2 = memory.Memory(path, max_items=0); k = m2.load()
+    print(f"{'':>8s}  reopen: load {k} vectors + index in {time.perf_counter()-t:5.1f} s")
+    m2.close(); del m, m2
+
+def capped(n, cap, words):
+    """Долгий сеанс с max_items: база и матрица не растут сверх cap."""
+    tmp = tempfile.mkdtemp(prefix="red-bench-")
+    m = memory.Memory(os.path.join(tmp, "memory.sqlite"), max_items=cap)
+    m.load()
+    t0 = time.perf_counter(); top = 0
+    for b in range(0, n, 1000):
+        m.add_many(texts(words, b, 1000, seed=b))
+        top = max(top, m.stats()["items"])
+    dt = time.perf_counter() - t0
+    st = m.stats(); rows = m._db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+    ok = top <= cap and rows == st["items"]
+    print(f"{'OK ' if ok else 'BAD'} cap {cap}: {n} inserts {n/dt:8.0f}/s, items max {top} now {st['items']} "
+          f"(db rows {rows}), evicted {st['evicted']}, lists={st['lists']}")
+    m.close()
+
+def main():
+    sizes = [int(x) for x in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000,1000000").split(",")]
+    words = vocab()
+    print(f"DIM={memory.DIM} ngrams={memory.NGRAMS} IVF from {memory.IVF_MIN}, nprobe=max({memory.NPROBE}, {memory.PROBE_SHARE:.0%} of lists), budget {BUDGET_MS:.0f} ms")
+    for n in sizes:
+        run(n, words)
+    capped(max(sizes), max(1000, max(sizes) // 4), words)
+
+if __name__ == "__main__":
+    main()
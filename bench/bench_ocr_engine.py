@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+OCR: холодный вызов (движок с загрузкой языков на каждый кадр — как было
+с pytesseract) против тёплого (tesserocr держит языки между вызовами).
+Плюс цена вариантов подготовки кадра в NumPy и их влияние на время OCR.
+Движки, которых нет, пропускаются.
+
+  python bench/bench_ocr_engine.py [images] [lang]
+"""
+import os, sys, time, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from bench._text import render_text
+from red2.core import ocr
+
+def ms(xs):
+    return f"p50={statistics.median(xs)*1000:7.1f} ms"
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    lang = sys.argv[2] if len(sys.argv) > 2 else "eng+rus"
+    band = [render_text(1920, 135, seed=i) for i in range(n)]          # полоса 1/8 кадра 1080p
+    full = [render_text(1920, 1080, seed=i, dark=i % 2 == 1) for i in range(2)]
+
+    variants = [("gray x1", 1, False), ("otsu x1", 1, True), ("gray x2", 2, False), ("otsu x2", 2, True)]
+    print("preprocess, frame 1920x1080:")
+    for name, scale, bin_ in variants:
+        t = []
+        for img in full:
+            t0 = time.perf_counter(); ocr.preprocess(img, scale, bin_); t.append(time.perf_counter() - t0)
+        print(f"  {name:8s} {ms(t)}")
+
+    ran = False
+    for kind in ocr.ENGINES:
+        try:
+            eng = ocr.create(kind, lang)
+        except Exception as e:
+            print(f"{kind:10s} unavailable: {type(e).__name__}: {e}")
+            continue
+        ran = True
+        cold, warm = [], []
+        for img in band:
+            g = ocr.preprocess(img)
+            t0 = time.perf_counter()
+            e2 = ocr.create(kind, lang); e2.recognize(g); e2.close()
+            cold.append(time.perf_counter() - t0)
+            t0 = time.perf_counter(); text = eng.recognize(g); warm.append(time.perf_counter() - t0)
+        print(f"{kind:10s} load {eng.load_sec*1000:6.1f} ms   band cold {ms(cold)}   warm {ms(warm)}   "
+              f"({statistics.median(cold)/statistics.median(warm):.1f}x)   sample: {' '.join(text.split())[:48]!r}")
+        for name, scale, bin_ in variants:
+            t = []
+            for img in band:
+                g = ocr.preprocess(img, scale, bin_)
+                t0 = time.perf_counter(); eng.recognize(g, dpi=ocr.BASE_DPI * scale); t.append(time.perf_counter() - t0)
+            print(f"           warm band, {name:8s} {ms(t)}")
+        eng.close()
+    if not ran:
+        print("no Tesseract here (pip install tesserocr / TESSERACT_PATH) — only preprocessing measured")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+OCR больших кадров: весь кадр одним вызовом Tesseract (как было) против
+плиток по пустым строкам/колонкам в пуле процессов на 1, 2, 4 … ядрах.
+Кадры синтетические, с настоящим текстом: 4K и два монитора 1920x1080 рядом.
+Печатает время, ускорение, долю распознаваемых пикселей и совпадение слов.
+
+  python bench/bench_ocr_tiled.py [lang] [workers,...]
+"""
+import os, sys, time, tempfile
+from collections import Counter
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+_TMP = tempfile.mkdtemp(prefix="red-bench-")
+os.environ["APPDATA"] = _TMP; os.environ["HOME"] = _TMP
+import numpy as np
+
+from bench import _text
+from red2.core import ocr
+
+def frames():
+    _text.WORDS = tuple(w for w in _text.WORDS if w.isascii())   # сверка слов без rus.traineddata
+    k4 = _text.render_text(3840, 2160, seed=7, pt=14)
+    left = _text.render_text(1920, 1080, seed=8, pt=11)
+    right = _text.render_text(1920, 1080, seed=9, pt=11, dark=True)
+    return [("4K 3840x2160", k4), ("2 monitors 3840x1080", np.concatenate([left, right], axis=1))]
+
+def words(text):
+    return [w for w in text.split() if w in _text.WORDS]
+
+def main():
+    lang = sys.argv[1] if len(sys.argv) > 1 else "eng"
+    counts = [int(c) for c in (sys.argv[2] if len(sys.argv) > 2 else "1,2,4").split(",")]
+    os.environ["TESSERACT_LANG"] = lang
+    eng = ocr.engine(lang)
+    if eng is None:
+        print("no Tesseract here (pip install tesserocr / TESSERACT_PATH)")
+        return
+    print(f"engine {eng.name} [{lang}], cpu_count={os.cpu_count()}")
+    for name, rgb in frames():
+        gray = ocr.preprocess(rgb)
+        t0 = time.perf_counter(); tiles = ocr.plan_tiles(gray); t_plan = time.perf_counter() - t0
+        px = sum((y1 - y0) * (x1 - x0) for y0, y1, x0, x1 in tiles)
+        print(f"-- {name}: {len(tiles)} tiles, {px / gray.size:.0%} of pixels, plan {t_plan*1000:.1f} ms")
+        t0 = time.perf_counter()
+        base_text = " ".join(eng.recognize(gray).split())
+        t_full = time.perf_counter() - t0
+        ref = Counter(words(base_text))
+        print(f"   whole frame, 1 call      {t_full:6.2f} s   words {len(words(base_text))}")
+        for n in counts:
+            if n > 1:   # поднять пул и движки в нём заранее
+                blank = np.full((32, 32), 255, np.uint8)
+                list(ocr.pool(n, eng.name, eng.lang).map(ocr._worker_ocr, [blank] * n, [ocr.BASE_DPI] * n))
+            t0 = time.perf_counter()
+            text = ocr.recognize_many([rgb], lang, workers=n)[0]
+            dt = time.perf_counter() - t0
+            got = words(text)
+            print(f"   tiled, {n} worker(s)       {dt:6.2f} s   {t_full / dt:4.2f}x   words {len(got)} "
+                  f"(common with whole frame: {sum((ref & Counter(got)).values())})")
+    ocr.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+PlaybackEngine на null-устройстве (реальное время, без звуковой карты):
+задержка старта, stop(), рампа ducking, стык кроссфейда, точность
+position() и цена callback на блок.
+
+  python bench/bench_playback.py [file.mp3]
+"""
+import os, sys, time, threading, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+import numpy as np
+from red2.core.playback import PlaybackEngine, decode
+
+SR = 24000
+
+def tone(sec: float, f: float = 220.0) -> np.ndarray:
+    t = np.arange(int(sec * SR)) / SR
+    return (0.5 * np.sin(2 * np.pi * f * t)).astype(np.float32)
+
+def wait_until(pred, timeout=2.0) -> float:
+    t0 = time.perf_counter()
+    while not pred() and time.perf_counter() - t0 < timeout:
+        time.sleep(0.0005)
+    return time.perf_counter() - t0
+
+def main():
+    eng = PlaybackEngine(samplerate=SR, null=True)
+    capture = []
+    orig = eng._callback
+    def tap(outdata, frames, ti, st):
+        orig(outdata, frames, ti, st)
+        capture.append(outdata[:, 0].copy())
+    eng._callback = tap
+
+    # int16 PCM: масштаб в [-1, 1], как у float
+    i16 = eng._prepare(np.array([16000, -16000, 32767, -32768], np.int16), SR)
+    assert np.abs(i16).max() <= 1.0 and abs(i16[0, 0] - 16000 / 32768) < 1e-6, i16[:, 0]
+    print(f"int16 input -> float32 peak {np.abs(i16).max():.3f}")
+
+    # старт: play() -> первый ненулевой блок
+    starts = []
+    for _ in range(10):
+        eng.first_output_t = None
+        t0 = time.perf_counter()
+        th = threading.Thread(target=eng.play, args=(tone(0.2),)); th.start()
+        wait_until(lambda: eng.first_output_t is not None)
+        starts.append(eng.first_output_t - t0); th.join()
+    block_ms = 1000.0 * eng.blocksize / SR
+    print(f"start latency p50 {statistics.median(starts)*1000:5.1f} ms, max {max(starts)*1000:5.1f} ms (block {block_ms:.0f} ms)")
+
+    # stop(): от вызова до тишины
+    stops = []
+    for _ in range(10):
+        cancel = threading.Event()
+        th = threading.Thread(target=eng.play, args=(tone(2.0), cancel)); th.start()
+        time.sleep(0.15)
+        t0 = time.perf_counter(); cancel.set(); eng.stop()
+        stops.append(t0 and wait_until(lambda: not eng.playing)); th.join()
+    print(f"stop -> silence p50 {statistics.median(stops)*1000:5.1f} ms, max {max(stops)*1000:5.1f} ms")
+
+    # ducking: время выхода на целевое усиление
+    th = threading.Thread(target=eng.play, args=(tone(1.5),)); th.start()
+    time.sleep(0.1); eng.duck(0.25, ramp_ms=150)
+    dt = wait_until(lambda: abs(eng._gain - 0.25) < 1e-3)
+    eng.unduck(ramp_ms=0); th.join()
+    print(f"duck to 0.25 reached in {dt*1000:5.1f} ms (ramp 150 ms)")
+
+    # кроссфейд против жёсткой замены: максимальный скачок сэмпла на стыке
+    for xf in (0, 30):
+        capture.clear()
+        th = threading.Thread(target=eng.play, args=(tone(1.0, 233),)); th.start()
+        time.sleep(0.313)   # режем посреди периода
+        if xf == 0:
+            eng.stop(fade_ms=0)
+        eng.play(tone(0.3, 330), crossfade_ms=xf); th.join()
+        sig = np.concatenate(capture)
+        sig = sig[np.nonzero(sig)[0][0]:]
+        print(f"{'crossfade 30 ms' if xf else 'hard cut       '}: max |Δsample| {np.abs(np.diff(sig[:int(0.6*SR)])).max():.3f}")
+
+    # position(): против настенных часов
+    th = threading.Thread(target=eng.play, args=(tone(1.0),)); th.start()
+    t0 = time.perf_counter(); errs = []
+    for _ in range(8):
+        time.sleep(0.1)
+        errs.append(abs(eng.position() - (time.perf_counter() - t0)))
+    th.join()
+    print(f"position() error avg {statistics.mean(errs)*1000:5.1f} ms")
+    print(f"callback cost {eng.callback_sec / max(1, eng.blocks) * 1e6:6.1f} us/block over {eng.blocks} blocks, underruns {eng.underruns}")
+
+    if len(sys.argv) > 1:
+        data = open(sys.argv[1], "rb").read()
+        t0 = time.perf_counter(); pcm, sr = decode(data); dt = time.perf_counter() - t0
+        print(f"decode {os.path.basename(sys.argv[1])}: {len(pcm)/sr:.2f}s audio in {dt*1000:.1f} ms")
+    eng.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш префикса промпта у провайдера: долгий диалог с длинным системным промптом
+и меняющимся контекстом экрана. Заглушка API отдаёт usage как OpenAI
+(cached_tokens — общий префикс с прошлыми запросами, от 1024 токенов кусками по 128);
+клиент пишет его по запросам в OPENAI_USAGE_LOG.
+  old — история обрезается по реплике (префикс сдвигается каждый запрос);
+  new — обрезка рывками до 70% бюджета, префикс стоит несколько запросов подряд.
+Отдельно — сериализация тела: json.dumps целиком (как было) против кэша сообщений.
+
+  python bench/bench_prompt_cache.py [turns]
+"""
+import os, sys, json, time, tempfile, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+_TMP = tempfile.mkdtemp(prefix="red-bench-")
+LOG = os.path.join(_TMP, "usage.jsonl")
+os.environ["OPENAI_USAGE_LOG"] = LOG
+
+from bench._stub import StubServer
+
+SYSTEM = ("Ты — Red, голосовой ассистент Владыки. Отвечай кратко, по делу, без вступлений. "
+          "Если вопрос про экран — опирайся на контекст экрана и OCR. ") + "".join(
+          f"Правило {i}: не повторяй вопрос, не извиняйся, называй конкретные шаги и клавиши. " for i in range(60))
+QUESTIONS = ["Что у меня на экране?", "Как закрыть эту вкладку?", "Переведи заголовок.",
+             "Почему не собирается проект?", "Что значит эта ошибка?", "Где настройки прокси?",
+             "Сколько времени займёт установка?", "Что дальше?"]
+
+def run(srv, trim_to: float, turns: int):
+    from red2.core import http_openai as http
+    from red2.core.conversation import Conversation
+    conv = Conversation(SYSTEM, budget=3000, trim_to=trim_to)
+    start = len(srv.usage_log)
+    for i in range(turns):
+        conv.add_user(f"{QUESTIONS[i % len(QUESTIONS)]} (шаг {i})")
+        ctx = [{"role": "system", "content": f"Контекст экрана: окно {i // 5}, редактор кода, файл main.py"}]
+        msgs = conv.build(ctx)
+        reply = "".join(http.chat_completions_stream("stub", msgs))
+        conv.add_assistant(reply + f" Итог шага {i}.")
+    us = srv.usage_log[start:]
+    prompt = sum(u["prompt_tokens"] for u in us)
+    cached = sum(u["prompt_tokens_details"]["cached_tokens"] for u in us)
+    hits = sum(1 for u in us if u["prompt_tokens_details"]["cached_tokens"])
+    return prompt, cached, hits, len(us), conv
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    with StubServer(reply="Нажми Ctrl+W, вкладка закроется. Несохранённые изменения попросят сохранить.",
+                    first_token_delay=0.0, token_delay=0.0) as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core import http_openai as http
+        print(f"{turns} turns, system prompt ~{len(SYSTEM)//4} tokens, budget 3000")
+        for name, trim_to in (("old", 1.0), ("new", 0.7)):
+            srv.prompts.clear()
+            prompt, cached, hits, n, conv = run(srv, trim_to, turns)
+            print(f"{name}: requests={n} prompt_tokens={prompt} cached_tokens={cached} "
+                  f"({cached / prompt:.0%} of prompt), requests with cache hit {hits}/{n}, trims={conv.trimmed}")
+        print("client usage_stats:", {k: round(v, 3) for k, v in http.usage_stats().items()})
+        with open(LOG, encoding="utf-8") as f:
+            lines = f.readlines()
+        print(f"per-request log {LOG}: {len(lines)} lines, e.g. {lines[-1].strip()}")
+
+        # сериализация тела запроса
+        msgs = conv.build([{"role": "system", "content": "Контекст экрана: редактор"}])
+        old_t, new_t = [], []
+        for _ in range(200):
+            t0 = time.perf_counter()
+            old = json.dumps({"model": "stub", "messages": msgs, "temperature": 0.4, "max_tokens": 800,
+                              "stream": True}).encode("utf-8")
+            t1 = time.perf_counter()
+            new = http._chat_body("stub", msgs, stream=True)
+            t2 = time.perf_counter()
+            old_t.append(t1 - t0); new_t.append(t2 - t1)
+        same = http._chat_body("stub", [dict(m) for m in msgs], stream=True) == new
+        print(f"body: json.dumps {len(old)/1024:.1f} KiB {statistics.median(old_t)*1e6:.0f} us  ->  "
+              f"cached template {len(new)/1024:.1f} KiB {statistics.median(new_t)*1e6:.0f} us; "
+              f"byte-identical on rebuild: {same}")
+
+if __name__ == "__main__":
+    main()
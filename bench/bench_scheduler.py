@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Планировщик запросов к LLM: пачки запросов во время генерации.
+Проверяет порядок (голос > текст > vision, FIFO внутри), что ничего
+не теряется, слияние дублей, supersede и переполнение очереди;
+меряет пропускную способность с «LLM» на потоках.
+Код выхода 1, если есть расхождения.
+
+  python bench/bench_scheduler.py
+"""
+import os, sys, time, threading
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from red2.core.scheduler import RequestScheduler
+
+FAILS = []
+
+def check(name, cond, detail=""):
+    print(f"{'OK ' if cond else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+    if not cond:
+        FAILS.append(name)
+
+class ManualLLM:
+    """Запросы завершаются вручную: finish() — текущий готов."""
+    def __init__(self):
+        self.started, self.cancelled = [], []
+        self.sched = None
+    def start(self, req): self.started.append(req)
+    def cancel(self, req): self.cancelled.append(req)
+    def finish(self): self.sched.done(self.started[-1])
+
+def burst_order():
+    m = ManualLLM(); s = m.sched = RequestScheduler(m.start, m.cancel, max_queue=200)
+    s.submit("typed", "первый")               # сразу в работу
+    sent = []
+    for i in range(30):
+        for kind in ("typed", "vision", "voice"):
+            r = s.submit(kind, f"{kind} {i}")
+            sent.append(r)
+    while s.busy:
+        m.finish()
+    order = [r.kind for r in m.started[1:]]
+    expect = ["voice"] * 30 + ["typed"] * 30 + ["vision"] * 30
+    check("burst: priority order voice > typed > vision", order == expect)
+    fifo = all([int(r.text.split()[1]) for r in m.started[1:] if r.kind == k] == list(range(30))
+               for k in ("voice", "typed", "vision"))
+    check("burst: FIFO within kind", fifo)
+    check("burst: no lost requests", len(m.started) == 91 and s.completed == 91 and all(r.status == "done" for r in sent),
+          f"started={len(m.started)} completed={s.completed}")
+
+def coalesce():
+    m = ManualLLM(); s = m.sched = RequestScheduler(m.start, m.cancel, coalesce_sec=1.2)
+    a = s.submit("voice", "Открой браузер")
+    dup_running = s.submit("voice", "открой  браузер")      # тот же текст, только что запущен
+    b = s.submit("typed", "погода")
+    dups = [s.submit("typed", "Погода") for _ in range(10)]  # уже в очереди
+    check("coalesce: duplicate of running request", a is not None and dup_running is None)
+    check("coalesce: duplicates of queued request", b is not None and all(d is None for d in dups)
+          and s.coalesced == 11, f"coalesced={s.coalesced}")
+    m.finish(); m.finish()
+    check("coalesce: answered once each", [r.text for r in m.started] == ["Открой браузер", "погода"])
+
+def supersede():
+    m = ManualLLM(); s = m.sched = RequestScheduler(m.start, m.cancel, policy="supersede")
+    a = s.submit("typed", "длинный ответ")
+    b = s.submit("voice", "стоп, другое")
+    check("supersede: newest replaces in-flight", a.status == "superseded" and m.cancelled == [a]
+          and s.current is b)
+    c = s.submit("vision", "что на экране")
+    check("supersede: lower priority waits", c.status == "queued" and s.current is b)
+    s.done(a)   # поздний done отменённого — игнор
+    check("supersede: late done ignored", s.current is b and s.completed == 0)
+    m.finish(); m.finish()
+    check("supersede: queue drained", [r.text for r in m.started] == ["длинный ответ", "стоп, другое", "что на экране"]
+          and not s.busy)
+
+def overflow():
+    m = ManualLLM(); s = m.sched = RequestScheduler(m.start, m.cancel, max_queue=4)
+    s.submit("typed", "в работе")
+    for i in range(3): s.submit("vision", f"vision {i}")
+    v = s.submit("voice", "голос")
+    t = s.submit("typed", "текст")   # 5-й в очереди -> выкидывается старейший vision
+    dropped = [r for r in (v, t) if r.status == "dropped"]
+    check("overflow: lowest priority evicted", s.dropped == 1 and not dropped
+          and [r.text for r in s.pending()] == ["голос", "текст", "vision 1", "vision 2"],
+          f"pending={[r.text for r in s.pending()]}")
+
+def throughput(n=2000, work=0.002):
+    done = threading.Event(); sched = None
+    def start(req):
+        def run():
+            time.sleep(work); sched.done(req)
+            if sched.completed == n: done.set()
+        threading.Thread(target=run, daemon=True).start()
+    sched = RequestScheduler(start, max_queue=n)
+    t0 = time.perf_counter()
+    senders = [threading.Thread(target=lambda k=k: [sched.submit(("voice", "typed")[k % 2], f"{k}-{i}")
+                                                   for i in range(n // 4)]) for k in range(4)]
+    for th in senders: th.start()
+    for th in senders: th.join()
+    ok = done.wait(60)
+    wall = time.perf_counter() - t0
+    st = sched.stats()
+    check("throughput: all completed from 4 concurrent senders", ok and st["completed"] == n and st["dropped"] == 0,
+          f"{st}")
+    print(f"     {n} requests x {work*1000:.0f} ms work: {wall:.2f} s, "
+          f"overhead {(wall - n*work)/n*1e6:.0f} us/request, {n/wall:.0f} req/s")
+
+def main():
+    burst_order(); coalesce(); supersede(); overflow(); throughput()
+    print(f"failures: {len(FAILS)}")
+    sys.exit(1 if FAILS else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Детектор изменений экрана: прогон последовательности скриншотов 1920x1080
+(повторный Ctrl+4, мигание курсора, часы, уведомление, прокрутка, смена окна).
+OCR и LLM подменены счётчиками; печатает, сколько вызовов сэкономлено,
+сколько пикселей ушло в OCR и цену отпечатка на кадр.
+
+  python bench/bench_screen_diff.py
+"""
+import os, sys, time, zlib, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+import numpy as np
+
+from red2.core.screen_diff import ScreenMemo, fingerprint
+
+H, W = 1080, 1920
+rng = np.random.default_rng(3)
+
+def page(seed):
+    """Светлый фон со строками «текста» (тёмные прямоугольники-глифы)."""
+    r = np.random.default_rng(seed)
+    img = np.full((H + 400, W, 3), 245, np.uint8)
+    for y in range(40, H + 380, 28):
+        x = 60
+        while x < W - 200:
+            w = int(r.integers(8, 60))
+            img[y:y + 14, x:x + w] = r.integers(20, 90)
+            x += w + int(r.integers(6, 14))
+    return img
+
+def frames():
+    a, b = page(1), page(2)
+    base = a[:H].copy()
+    seq = [("editor", base, "VS Code")]
+    seq += [("repeat", base.copy(), "VS Code")] * 4
+    cur = base.copy(); cur[600:620, 900:902] = 0                      # курсор
+    seq.append(("cursor blink", cur, "VS Code"))
+    clock = cur.copy(); clock[1050:1075, 1800:1900] = 90               # часы в трее
+    seq.append(("clock tick", clock, "VS Code"))
+    seq.append(("repeat", clock.copy(), "VS Code"))
+    toast = clock.copy(); toast[900:1040, 1500:1900] = 60              # уведомление
+    seq.append(("toast", toast, "VS Code"))
+    seq.append(("scroll", a[120:H + 120].copy(), "VS Code"))           # прокрутка
+    seq.append(("repeat", a[120:H + 120].copy(), "VS Code"))
+    seq.append(("window switch", b[:H].copy(), "Chrome"))
+    seq += [("repeat", b[:H].copy(), "Chrome")] * 3
+    typed = b[:H].copy(); typed[300:320, 200:700] = 30                 # набор в поле
+    seq.append(("typing", typed, "Chrome"))
+    seq.append(("back to editor", a[120:H + 120].copy(), "VS Code"))
+    return seq
+
+def main():
+    seq = frames()
+    calls = {"ocr": 0, "ocr_px": 0, "llm": 0}
+    def ocr(band):
+        calls["ocr"] += 1; calls["ocr_px"] += band.shape[0] * band.shape[1]
+        return f"t{zlib.crc32(band.tobytes()) & 0xffff:x}"
+    def describe(rgb, text, title):
+        calls["llm"] += 1
+        return f"{title}: {zlib.crc32(rgb.tobytes()) & 0xffff:x}"
+    memo = ScreenMemo(ocr, describe)
+    fp_ms = []
+    print(f"{'frame':16s} {'kind':6s} desc")
+    for name, img, title in seq:
+        t0 = time.perf_counter(); fingerprint(img); fp_ms.append((time.perf_counter() - t0) * 1000)
+        desc, text, kind = memo.update(img, title)
+        print(f"{name:16s} {kind:6s} {desc}")
+    n = len(seq); st = memo.stats()
+    print(f"\ncaptures={n}")
+    print(f"LLM calls      naive={n:3d}  memo={calls['llm']:3d}  avoided={n - calls['llm']}")
+    print(f"OCR pixels     naive={n * H * W / 1e6:6.1f} Mpx  memo={calls['ocr_px'] / 1e6:6.1f} Mpx  "
+          f"({calls['ocr']} region calls, {st['ocr_skipped']} regions reused)")
+    print(f"fingerprint    p50={statistics.median(fp_ms):.1f} ms/frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный прогон: сотни взаимодействий «Whisper -> LLM stream -> TTS»
+против локальной заглушки API, CONCURRENCY штук одновременно.
+  legacy  — как было: QThread на каждый запрос, поток + asyncio.run на каждую озвучку;
+  service — общий asyncio-сервис (core.service) и ServiceJob (ui/jobs.py).
+Каждый режим идёт в отдельном процессе; печатаются пик и число созданных
+потоков ОС, RSS и p50/p99 полного взаимодействия.
+
+  python bench/bench_service.py [interactions] [concurrency,...]
+"""
+import os, sys, json, time, asyncio, threading, subprocess, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+SYNTH_SEC = 0.02
+# PySide6 6.12 на Python 3.11 теряет ссылку на True при каждом Signal.emit();
+# на тысячах emit() это роняет процесс — держим запас ссылок до конца процесса
+_KEEP_TRUE = [True] * 1_000_000
+WAV = b"RIFF" + b"\0" * 32_000
+
+def _proc_status() -> dict:
+    out = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                k, _, v = line.partition(":")
+                out[k] = v.strip()
+    except OSError:
+        pass
+    return out
+
+def _tids() -> set:
+    try:
+        return set(os.listdir("/proc/self/task"))
+    except OSError:
+        return {threading.get_ident()}
+
+async def fake_synth(sentences):
+    for _ in sentences:
+        await asyncio.sleep(SYNTH_SEC)   # edge-tts: сетевой синтез фразы
+
+def run_mode(mode: str, n: int, conc: int) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from bench._stub import StubServer
+    srv = StubServer(first_token_delay=0.02, token_delay=0.001, transcribe_delay=0.02).__enter__()
+    os.environ["OPENAI_BASE_URL"] = srv.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    from PySide6.QtCore import QCoreApplication, QThread, QTimer, Signal
+    from red2.core import http_openai as http, service
+    from red2.core.sentences import SentenceBuffer
+    from red2.ui.jobs import ServiceJob, UiCall
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    msgs = [{"role": "user", "content": "Что делать?"}]
+
+    def stt_body():
+        return http.transcribe_whisper_bytes(WAV, filename="a.wav")
+
+    def llm_body(emit_sentence):
+        sb = SentenceBuffer(); parts = []
+        for d in http.chat_completions_stream("stub", msgs):
+            parts.append(d)
+            for s in sb.feed(d): emit_sentence(s)
+        tail = sb.flush()
+        if tail: emit_sentence(tail)
+        return "".join(parts)
+
+    if mode == "legacy":
+        class STT(QThread):
+            finished_ = Signal(str)
+            def run(self): self.finished_.emit(stt_body())
+        class LLM(QThread):
+            finished_ = Signal(str); sentence = Signal(str)
+            def run(self): self.finished_.emit(llm_body(self.sentence.emit))
+        def speak(sentences, done):
+            def _run():
+                asyncio.run(fake_synth(sentences)); ui.call.emit(done)
+            threading.Thread(target=_run, daemon=True).start()
+    else:
+        class STT(ServiceJob):
+            finished_ = Signal(str); backend = "stt"
+            def run(self): self.finished_.emit(stt_body())
+        class LLM(ServiceJob):
+            finished_ = Signal(str); sentence = Signal(str); backend = "llm"
+            def run(self): self.finished_.emit(llm_body(self.sentence.emit))
+        def speak(sentences, done):
+            service.submit(fake_synth, sentences, backend="tts", on_done=lambda _t: ui.call.emit(done))
+
+    ui = UiCall()
+    lat, live_objs = [], set()
+    state = {"started": 0, "done": 0}
+    peak = {"threads": 0}; seen = set()
+
+    def sample():
+        tids = _tids(); seen.update(tids)
+        peak["threads"] = max(peak["threads"], len(tids))
+
+    def start_one():
+        if state["started"] >= n:
+            return
+        state["started"] += 1
+        t0 = time.perf_counter(); sentences = []
+        stt_w = STT()
+        def on_text(_text):
+            llm_w = LLM(); live_objs.add(llm_w)
+            llm_w.sentence.connect(sentences.append)
+            def on_reply(_reply):
+                def done():
+                    lat.append(time.perf_counter() - t0)
+                    live_objs.discard(stt_w); live_objs.discard(llm_w)
+                    state["done"] += 1
+                    if state["done"] >= n: app.quit()
+                    else: start_one()
+                speak(list(sentences), done)
+            llm_w.finished_.connect(on_reply)
+            llm_w.start()
+        stt_w.finished_.connect(on_text)
+        live_objs.add(stt_w)
+        stt_w.start()
+
+    timer = QTimer(); timer.setInterval(5); timer.timeout.connect(sample); timer.start()
+    base_threads = len(_tids())
+    t_all = time.perf_counter()
+    for _ in range(conc):
+        start_one()
+    app.exec()
+    wall = time.perf_counter() - t_all
+    timer.stop(); sample()
+    st = _proc_status()
+    lat.sort()
+    res = {
+        "mode": mode, "n": len(lat), "wall": wall,
+        "base_threads": base_threads, "peak_threads": peak["threads"], "os_threads_seen": len(seen),
+        "rss_mb": int(st.get("VmRSS", "0 kB").split()[0]) / 1024,
+        "hwm_mb": int(st.get("VmHWM", "0 kB").split()[0]) / 1024,
+        "p50": statistics.median(lat), "p99": lat[min(len(lat) - 1, int(len(lat) * 0.99))],
+        "requests": srv.requests,
+    }
+    if mode == "service":
+        res["service"] = service.get().stats()
+        service.shutdown()
+    srv.__exit__(None, None, None)
+    return res
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        print(json.dumps(run_mode(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))), flush=True)
+        os._exit(0)   # не ждать финализации PySide с живыми QThread-объектами
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    concs = [int(c) for c in (sys.argv[2] if len(sys.argv) > 2 else "2,8").split(",")]
+    print(f"interactions={n} (whisper + llm stream + tts {SYNTH_SEC*1000:.0f} ms/phrase); "
+          f"service limits stt/llm/tts = 2 — при большей параллельности задачи ждут очереди")
+    for conc in concs:
+        print(f"-- concurrency={conc}")
+        for mode in ("legacy", "service"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, str(n), str(conc)],
+                                 capture_output=True, text=True, cwd=BASE)
+            if out.returncode != 0:
+                print(mode, "failed:\n", out.stderr[-2000:]); continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:8s} done={r['n']:4d} wall={r['wall']:5.2f} s  threads peak={r['peak_threads']:3d} "
+                  f"created={r['os_threads_seen']:5d}  RSS={r['rss_mb']:6.1f} MiB (peak {r['hwm_mb']:6.1f})  "
+                  f"p50={r['p50']*1000:6.1f} ms p99={r['p99']*1000:6.1f} ms")
+            if "service" in r:
+                s = r["service"]
+                print(f"         service: submitted={s['submitted']} completed={s['completed']} "
+                      f"failed={s['failed']} timeouts={s['timeouts']} pool_threads={s['pool_threads']}")
+
+if __name__ == "__main__":
+    main()
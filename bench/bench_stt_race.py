@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Гонка Vosk/Whisper: сценарии × политики против медленной заглушки Whisper.
+Офлайн-бэкенд — сценарный (задержка + текст + уверенность), чтобы
+прогонять крайние случаи без модели; с VOSK_MODEL_PATH и WAV-файлом
+добавляется прогон с настоящим Vosk.
+
+  python bench/bench_stt_race.py [file.wav]
+"""
+import os, sys, time, threading
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+import numpy as np
+from bench._stub import StubServer
+from red2.core.audio_buffer import AudioClip
+
+WHISPER_DELAY = 1.5
+
+def scripted(delay: float, text: str, conf: float):
+    def fn(audio, cancel: threading.Event):
+        if cancel.wait(delay):
+            return None
+        return text, conf
+    return fn
+
+# сценарий: (офлайн-бэкенд, ожидаемый победитель по политикам)
+SCENARIOS = {
+    "vosk fast+confident": (scripted(0.2, "открой браузер", 0.92),
+                            {"first_confident": "vosk", "prefer_online": "whisper", "offline_only": "vosk"}),
+    "vosk fast+unsure":    (scripted(0.2, "от край бра", 0.35),
+                            {"first_confident": "whisper", "prefer_online": "whisper", "offline_only": "vosk"}),
+    "vosk empty":          (scripted(0.2, "", 0.0),
+                            {"first_confident": "whisper", "prefer_online": "whisper", "offline_only": None}),
+    "vosk failed":         (lambda audio, cancel: None,
+                            {"first_confident": "whisper", "prefer_online": "whisper", "offline_only": None}),
+}
+
+class FakeLive:
+    """Живой Vosk, уже распознавший фразу по ходу записи."""
+    def __init__(self, text: str, conf: float):
+        self.text = text; self.confidence = conf; self.ok = True
+    def finish(self) -> str:
+        return self.text
+
+def main():
+    clip = AudioClip(np.zeros((16000, 1), dtype=np.int16), 16000)
+    with StubServer(transcript="открой браузер", transcribe_delay=WHISPER_DELAY) as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core.stt_race import STTOrchestrator, STTStats
+        fails = 0
+        for policy in ("first_confident", "prefer_online", "offline_only"):
+            for name, (vosk, expect) in SCENARIOS.items():
+                stats = STTStats()
+                orch = STTOrchestrator(policy=policy, online_timeout=3.0, vosk=vosk, stats=stats)
+                t0 = time.perf_counter(); text = orch.transcribe(clip); dt = time.perf_counter() - t0
+                winner = next((n for n, b in stats.summary().items() if b["wins"]), None)
+                ok = winner == expect[policy]
+                fails += not ok
+                print(f"{'OK ' if ok else 'BAD'} {policy:15s} {name:20s} -> {winner or '-':8s} "
+                      f"{dt*1000:6.0f} ms  {text!r}")
+        # живой Vosk уверен: prefer_online всё равно ждёт Whisper, остальные отвечают сразу
+        for policy, expect in (("first_confident", "vosk_live"), ("prefer_online", "whisper"), ("offline_only", "vosk_live")):
+            stats = STTStats()
+            orch = STTOrchestrator(policy=policy, online_timeout=3.0, vosk=scripted(0.2, "", 0.0), stats=stats)
+            t0 = time.perf_counter(); text = orch.transcribe(clip, live=FakeLive("открой браузер", 0.92))
+            dt = time.perf_counter() - t0
+            winner = next((n for n, b in stats.summary().items() if b["wins"]), None)
+            ok = winner == expect
+            fails += not ok
+            print(f"{'OK ' if ok else 'BAD'} {policy:15s} {'live confident':20s} -> {winner or '-':8s} "
+                  f"{dt*1000:6.0f} ms  {text!r}")
+        # Whisper недоступен: prefer_online должен уложиться в таймаут и вернуть Vosk
+        srv.transcribe_delay = 10.0
+        orch = STTOrchestrator(policy="prefer_online", online_timeout=1.0, vosk=scripted(0.2, "привет", 0.5))
+        t0 = time.perf_counter(); text = orch.transcribe(clip); dt = time.perf_counter() - t0
+        ok = text == "привет" and dt < 1.5
+        fails += not ok
+        print(f"{'OK ' if ok else 'BAD'} prefer_online   whisper hangs        -> {dt*1000:6.0f} ms  {text!r}")
+        orch = STTOrchestrator(policy="prefer_online", online_timeout=1.0, vosk=scripted(0.2, "", 0.0))
+        t0 = time.perf_counter(); text = orch.transcribe(clip, live=FakeLive("привет", 0.92)); dt = time.perf_counter() - t0
+        ok = text == "привет" and dt < 1.5
+        fails += not ok
+        print(f"{'OK ' if ok else 'BAD'} prefer_online   live, whisper hangs  -> {dt*1000:6.0f} ms  {text!r}")
+        if len(sys.argv) > 1 and os.getenv("VOSK_MODEL_PATH"):
+            srv.transcribe_delay = WHISPER_DELAY
+            for policy in ("first_confident", "prefer_online", "offline_only"):
+                orch = STTOrchestrator(policy=policy)
+                t0 = time.perf_counter(); text = orch.transcribe(sys.argv[1]); dt = time.perf_counter() - t0
+                print(f"real vosk {policy:15s} {dt*1000:6.0f} ms  {text!r}")
+            for n, b in orch.stats.summary().items():
+                print(f"  {n}: {b}")
+        print("failures:", fails)
+        sys.exit(1 if fails else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Объём отправки и полное время транскрипции Whisper для разных кодеков
+(WAV / FLAC / OGG) с обрезкой тишины и без, через заглушку с
+ограниченной пропускной способностью.
+
+  python bench/bench_stt_upload.py [kbit_per_sec]
+"""
+import os, sys, time
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+import numpy as np
+from bench._stub import StubServer
+from red2.core.audio_buffer import AudioClip
+
+SR = 16000
+
+def utterance(speech_sec: float = 12.0, lead: float = 1.5, tail: float = 2.5) -> AudioClip:
+    """Тишина с лёгким шумом + «речь» (модулированные гармоники) + тишина."""
+    rng = np.random.default_rng(1)
+    t = np.arange(int(speech_sec * SR)) / SR
+    env = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t) ** 2
+    voice = sum(np.sin(2 * np.pi * f * t * (1 + 0.02 * np.sin(2 * np.pi * 0.7 * t))) / k
+                for k, f in enumerate((140, 280, 420, 900, 1800), 1))
+    speech = (env * voice * 5000).astype(np.int16)
+    noise = lambda sec: rng.normal(0, 30, int(sec * SR)).astype(np.int16)
+    pcm = np.concatenate([noise(lead), speech, noise(tail)]).reshape(-1, 1)
+    return AudioClip(pcm, SR)
+
+def main():
+    kbps = float(sys.argv[1]) if len(sys.argv) > 1 else 512.0
+    clip = utterance()
+    with StubServer(transcribe_delay=0.3, bandwidth=kbps * 1000 / 8) as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core import stt
+        print(f"clip {clip.duration:.1f}s, link {kbps:.0f} kbit/s")
+        for codec in ("wav", "flac", "ogg"):
+            for trim in (False, True):
+                b0 = srv.bytes_in
+                t0 = time.perf_counter()
+                stt.stt_openai_wav(clip, codec=codec, trim=trim)
+                dt = time.perf_counter() - t0
+                print(f"{codec:4s} trim={'on ' if trim else 'off'}: uploaded {(srv.bytes_in - b0)/1024:7.1f} KiB, "
+                      f"end-to-end {dt*1000:7.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Значок в трее: как было (каждые 80 мс новый QPixmap 128x128 с градиентами и
+новый QIcon) против атласа кадров с адаптивной частотой. Offscreen Qt, трей —
+заглушка, которая, как система, берёт из значка картинку 32x32. Сценарии по
+SEC секунд: idle, listening (уровень микрофона шумит), speaking; печатает CPU
+процесса в пересчёте на минуту, setIcon в минуту и сколько кадров нарисовано.
+
+  python bench/bench_tray_anim.py [sec]
+"""
+import os, sys, time, math, random
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# PySide6 6.12 на Python 3.11 теряет ссылки на None/True при вызовах из Python (см. bench_service)
+_KEEP = [None] * 2_000_000 + [True] * 2_000_000
+
+from PySide6.QtCore import Qt, QObject, QTimer, QEventLoop
+from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QLinearGradient, QBrush
+from PySide6.QtWidgets import QApplication
+from red2.ui.tray_anim import TrayAnimator
+from red2.ui.anim_clock import AnimClock
+
+class FakeTray:
+    def __init__(self):
+        self.sets = 0
+    def setIcon(self, icon):
+        self.sets += 1
+        icon.pixmap(32, 32)   # что делает платформа с новым значком
+
+class OldTrayAnimator(QObject):
+    """TrayAnimator до атласа (копия для сравнения)."""
+    def __init__(self, tray):
+        super().__init__()
+        self.tray=tray; self.state="idle"; self.level=0.0; self._t=0
+        self.timer=QTimer(self); self.timer.setInterval(80); self.timer.timeout.connect(self._tick); self.timer.start()
+    def set_state(self,s): self.state=s
+    def set_level(self,v): self.level=max(0.0,min(1.0,float(v)))
+    def _tick(self): self._t=(self._t+1)%10000; self.tray.setIcon(self._build_icon())
+    def _build_icon(self):
+        size=128; pm=QPixmap(size,size); pm.fill(Qt.transparent); p=QPainter(pm)
+        try:
+            p.setRenderHint(QPainter.Antialiasing,True); p.setBrush(QColor(16,18,22)); p.setPen(Qt.NoPen); p.drawEllipse(2,2,size-4,size-4)
+            bars=6
+            for i in range(bars):
+                import math as _m
+                phase=self._t*0.18+i*0.9
+                if self.state=="idle": amp=0.15+0.05*_m.sin(phase)
+                elif self.state=="listening": amp=0.25+0.6*self.level+0.12*_m.sin(phase*1.3)
+                elif self.state=="speaking": amp=0.5+0.25*_m.sin(phase*2.2)
+                else: amp=0.08
+                amp=max(0.05,min(1.0,amp)); w=(size-28)//bars; x=14+i*w; h=int((size-28)*amp); y=size-14-h
+                grad=QLinearGradient(x,y,x+w,y); grad.setColorAt(0.0,QColor("#FF0033")); grad.setColorAt(1.0,QColor("#FF1A8A"))
+                p.fillRect(x+2,y,w-4,h,QBrush(grad))
+            p.setPen(QColor(255,0,51,180)); p.setBrush(Qt.NoBrush); p.drawEllipse(2,2,size-4,size-4)
+        finally: p.end()
+        return QIcon(pm)
+
+def run(app, cls, state, sec, paused=False):
+    tray = FakeTray()
+    anim = cls(tray) if cls is OldTrayAnimator else cls(tray, clock=AnimClock())
+    anim.set_state(state)
+    if paused:
+        anim.set_paused(True)
+    level = QTimer(); rnd = random.Random(1)
+    level.setInterval(90)   # как level_timer в окне
+    level.timeout.connect(lambda: anim.set_level(0.5 + 0.4 * math.sin(time.monotonic() * 3) + rnd.uniform(-0.1, 0.1)))
+    if state == "listening":
+        level.start()
+    loop = QEventLoop(); QTimer.singleShot(int(sec * 1000), loop.quit)
+    c0 = time.process_time(); loop.exec(); cpu = time.process_time() - c0
+    level.stop()
+    if hasattr(anim, "timer"): anim.timer.stop()
+    else: anim.set_paused(True)
+    built = getattr(anim, "frames_built", tray.sets)
+    return cpu / sec * 60, tray.sets / sec * 60, built
+
+def main():
+    sec = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    app = QApplication([])
+    print(f"{sec:.0f} s per scenario, numbers per minute")
+    for state in ("idle", "listening", "speaking"):
+        base = None
+        for name, cls in (("old", OldTrayAnimator), ("atlas", TrayAnimator)):
+            cpu, sets, built = run(app, cls, state, sec)
+            base = base or cpu
+            print(f"{state:9s} {name:5s}: CPU {cpu*1000:7.0f} ms/min ({base/max(cpu, 1e-9):5.1f}x)  "
+                  f"setIcon {sets:5.0f}/min  frames drawn {built}")
+    cpu, sets, built = run(app, TrayAnimator, "idle", sec, paused=True)
+    print(f"{'locked':9s} atlas: CPU {cpu*1000:7.0f} ms/min  setIcon {sets:5.0f}/min")
+
+if __name__ == "__main__":
+    main()
+    sys.stdout.flush(); os._exit(0)   # без финализации: запас ссылок выше не должен освобождаться
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш синтезированной речи: поток реплик с повторами (служебные фразы
+часто, уникальные ответы редко) через _EdgeTTS с фейковым сетевым синтезом.
+Показывает долю попаданий, сэкономленное время синтеза, задержку попадания
+из памяти/с диска и работу дискового лимита.
+
+  python bench/bench_tts_cache.py
+"""
+import os, sys, time, random, asyncio, tempfile, threading, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from red2.core import tts, tts_cache
+
+SYNTH_SEC = 0.05          # сетевой синтез одной фразы (сжато для скорости прогона)
+MP3_BYTES = 24_000        # ~3 с речи при 64 кбит/с
+
+COMMON = ["Слушаю, Владыка.", "Готово.", "Секунду, смотрю на экран.",
+          "Не расслышала, повтори, пожалуйста.", "Настройки применены."]
+
+class FakeEdge(tts._EdgeTTS):
+    synth_calls = 0
+    async def _synth_net(self, text, cancel, c=None):
+        FakeEdge.synth_calls += 1
+        t0 = time.perf_counter()
+        await asyncio.sleep(SYNTH_SEC)
+        data = (text.encode("utf-8") * (MP3_BYTES // max(1, len(text.encode("utf-8"))) + 1))[:MP3_BYTES]
+        if c is not None:
+            c.put(self._key(text), data, time.perf_counter() - t0)
+        return data
+
+def workload(n=300, seed=7):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        if rnd.random() < 0.6:
+            out.append(COMMON[min(int(rnd.expovariate(0.8)), len(COMMON) - 1)])
+        else:
+            out.append(f"Уникальный ответ номер {i}.")
+    return out
+
+def run(edge, phrases):
+    loop = asyncio.new_event_loop()
+    lat = []
+    try:
+        for ph in phrases:
+            t0 = time.perf_counter()
+            d = edge._synth(ph, threading.Event())
+            if asyncio.iscoroutine(d):
+                d = loop.run_until_complete(d)
+            lat.append(time.perf_counter() - t0)
+    finally:
+        loop.close()
+    return lat
+
+def main():
+    phrases = workload()
+    with tempfile.TemporaryDirectory() as d:
+        # 1) без кэша
+        tts_cache._CACHE = None
+        orig = tts_cache.cache
+        tts_cache.cache = lambda: None
+        FakeEdge.synth_calls = 0
+        t0 = time.perf_counter(); run(FakeEdge(), phrases); no_cache = time.perf_counter() - t0
+        calls_nc = FakeEdge.synth_calls
+        tts_cache.cache = orig
+
+        # 2) с кэшем + прогрев служебных фраз
+        c = tts_cache.TTSCache(d, disk_max_bytes=64 << 20, mem_max_bytes=16 << 20)
+        tts_cache._CACHE = c
+        edge = FakeEdge()
+        FakeEdge.synth_calls = 0
+        t0 = time.perf_counter(); warmed = edge.warm(COMMON); warm_t = time.perf_counter() - t0
+        c.hits_mem = c.hits_disk = c.misses = 0; c.saved_sec = 0.0
+        FakeEdge.synth_calls = 0
+        t0 = time.perf_counter(); lat = run(edge, phrases); cached = time.perf_counter() - t0
+        st = c.stats()
+        hit_lat = [l for l, ph in zip(lat, phrases) if ph in COMMON]
+
+        # 3) новый процесс: память пуста, попадания с диска
+        c2 = tts_cache.TTSCache(d, disk_max_bytes=64 << 20)
+        tts_cache._CACHE = c2
+        disk_lat = run(FakeEdge(), COMMON)
+        st2 = c2.stats()
+
+        # 4) дисковый лимит: 1 МиБ
+        with tempfile.TemporaryDirectory() as d3:
+            c3 = tts_cache.TTSCache(d3, disk_max_bytes=1 << 20, mem_max_bytes=256 << 10)
+            for i in range(200):
+                c3.put(tts_cache.make_key(f"фраза {i}", "v", 175, 0.9), b"x" * MP3_BYTES, SYNTH_SEC)
+            st3 = c3.stats()
+        tts_cache._CACHE = None
+
+    print(f"phrases={len(phrases)} unique={len(set(phrases))} synth={SYNTH_SEC*1000:.0f} ms")
+    print(f"no cache     total={no_cache:6.2f} s  synth calls={calls_nc}")
+    print(f"warm-up      {warmed} phrases in {warm_t*1000:.0f} ms")
+    print(f"with cache   total={cached:6.2f} s  synth calls={FakeEdge.synth_calls}  "
+          f"hit_rate={st['hit_rate']*100:.1f}%  saved={st['saved_sec']:.2f} s")
+    print(f"mem hit      p50={statistics.median(hit_lat)*1e6:.0f} us")
+    print(f"disk hit     p50={statistics.median(disk_lat)*1e6:.0f} us  hits_disk={st2['hits_disk']}")
+    print(f"disk limit   1 MiB -> {st3['disk_bytes']/1024:.0f} KiB on disk, "
+          f"{st3['mem_entries']} in memory ({st3['mem_bytes']/1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()
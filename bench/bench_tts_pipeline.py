@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Конвейер TTS по фразам с фейковым синтезатором/плеером:
+время до первого звука, паузы между фразами и скорость stop().
+Синтез: SYNTH_BASE + SYNTH_PER_CHAR * len; звучание: PLAY_PER_CHAR * len.
+
+  python bench/bench_tts_pipeline.py
+"""
+import os, sys, time, threading, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from red2.core.tts import PhrasePipeline
+from red2.core.sentences import split_sentences
+
+SYNTH_BASE = 0.25        # сетевой оверхед Edge на запрос
+SYNTH_PER_CHAR = 0.003
+PLAY_PER_CHAR = 0.012    # ~80 символов/с речи, сжато для скорости прогона
+
+TEXT = ("Владыка, задача принята. Сначала проверь подключение к сети и ключ API. "
+        "Затем перезапусти приложение и повтори запрос. Если ошибка останется, "
+        "открой настройки и смени базовый адрес сервера. После этого снова нажми Ctrl+3. "
+        "Я буду рядом и помогу, если что-то пойдёт не так.")
+
+def fake_synth(text, cancel):
+    cancel.wait(SYNTH_BASE + SYNTH_PER_CHAR * len(text))
+    return text.encode("utf-8")
+
+def fake_play(data, cancel):
+    cancel.wait(PLAY_PER_CHAR * len(data.decode("utf-8")))
+
+def whole_text():
+    t0 = time.perf_counter()
+    data = fake_synth(TEXT, threading.Event())
+    ttfa = time.perf_counter() - t0
+    fake_play(data, threading.Event())
+    return ttfa, [], time.perf_counter() - t0
+
+def sequential():
+    t0 = time.perf_counter(); starts, ends = [], []
+    for s in split_sentences(TEXT):
+        data = fake_synth(s, threading.Event())
+        starts.append(time.perf_counter()); fake_play(data, threading.Event()); ends.append(time.perf_counter())
+    return starts[0] - t0, [b - a for a, b in zip(ends, starts[1:])], ends[-1] - t0
+
+def pipelined(depth=2):
+    done = threading.Event()
+    s = PhrasePipeline(fake_synth, fake_play, depth=depth).run(split_sentences(TEXT), on_done=done.set)
+    done.wait()
+    gaps = [b - a for a, b in zip(s.play_ends, s.play_starts[1:])]
+    return s.play_starts[0] - s.t_open, gaps, s.play_ends[-1] - s.t_open
+
+def cancel_latency():
+    done = threading.Event()
+    s = PhrasePipeline(fake_synth, fake_play).run(split_sentences(TEXT), on_done=done.set)
+    time.sleep(1.0)
+    t0 = time.perf_counter(); s.cancel(); done.wait()
+    return time.perf_counter() - t0
+
+def main():
+    print(f"{len(split_sentences(TEXT))} phrases, {len(TEXT)} chars")
+    for name, fn in (("whole text", whole_text), ("per-phrase, no prefetch", sequential),
+                     ("pipeline depth=1", lambda: pipelined(1)), ("pipeline depth=2", pipelined)):
+        ttfa, gaps, total = fn()
+        g = f"gaps avg {statistics.mean(gaps)*1000:5.0f} ms max {max(gaps)*1000:5.0f} ms" if gaps else "gaps -"
+        print(f"{name:24s} first audio {ttfa*1000:6.0f} ms | {g:32s} | total {total*1000:6.0f} ms")
+    print(f"stop() -> on_done: {cancel_latency()*1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
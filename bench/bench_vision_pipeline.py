@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Ctrl+4 от снимка до описания: OCR, затем LLM (как было) против OCR и LLM
+параллельно с ожиданием OCR для подсказки не дольше ocr_wait.
+Снимок экрана и заголовок окна подменены, OCR — задержкой как у Tesseract
+на 1080p, LLM — локальная заглушка API. Печатает p50 времени до OCR и до
+описания, сколько подсказок ушло с OCR и сколько раз запрошен заголовок окна.
+
+  python bench/bench_vision_pipeline.py [captures]
+"""
+import os, sys, time, statistics, tempfile
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_TMP = tempfile.mkdtemp(prefix="red-bench-")
+os.environ["APPDATA"] = _TMP; os.environ["HOME"] = _TMP
+
+from bench._stub import StubServer
+from bench.bench_screen_diff import page, H
+
+OCR_SEC = 1.2          # Tesseract eng+rus на полный кадр 1080p
+LLM_SEC = 0.9          # первый токен vision-модели
+
+MODES = [("sequential (old)", None), ("parallel wait 0.3s", 0.3),
+         ("parallel no wait", 0.0), ("parallel wait 1.5s", 1.5)]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    with StubServer(reply="Браузер, открыта страница документации.", first_token_delay=LLM_SEC,
+                    token_delay=0.0, bandwidth=2.5e6) as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from red2.core import vision, service, window_geom
+        frames = [vision.rgb_to_image(page(10 + i)[:H]) for i in range(n)]
+        rows = 8
+
+        def ocr(band):
+            time.sleep(OCR_SEC / rows)
+            return "строка текста"
+
+        print(f"{n} captures, each a new window: OCR {OCR_SEC:.1f} s/frame, LLM first token {LLM_SEC:.1f} s")
+        base = None
+        for mi, (name, wait) in enumerate(MODES):
+            state = {"i": 0, "titles": 0}
+            def grab():
+                return frames[state["i"]]
+            class Windows(window_geom.Backend):
+                def active_window(self):
+                    state["titles"] += 1   # новый заголовок — мимо кэша ответов
+                    return window_geom.WindowInfo(f"Окно {mi}-{state['i']}", None)
+            vision.grab_screen_image = grab
+            window_geom.set_backend(Windows())
+            vision._MEMO = None
+            memo = vision._memo("auto"); memo.ocr_fn = ocr; memo.ocr_many = None
+            t_ocr, t_desc = [], []
+            for i in range(n):
+                state["i"] = i
+                got = {}
+                t0 = time.perf_counter()
+                desc, text, _ = vision.quick_screen_context_ultra_brief(
+                    on_ocr=lambda o, t: got.setdefault("ocr", time.perf_counter()), ocr_wait=wait, mode="full")
+                t1 = time.perf_counter()
+                assert desc and not desc.startswith("Не смог"), desc
+                t_ocr.append(got.get("ocr", t1) - t0); t_desc.append(t1 - t0)
+            st = memo.stats()
+            p_desc = statistics.median(t_desc)
+            base = base or p_desc
+            print(f"{name:20s} to OCR p50={statistics.median(t_ocr)*1000:6.0f} ms  "
+                  f"to description p50={p_desc*1000:6.0f} ms ({base/p_desc:.2f}x)  "
+                  f"OCR in prompt {n - st['ocr_late']}/{n}  title lookups {state['titles']}/{n}")
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Загрузка скриншота в vision-модель: PNG во всё разрешение (как было) против
+уменьшенного JPEG/WebP. Для 720p / 1080p / 1440p / 4K печатает время
+кодирования, размер тела запроса и полный круг до ответа против локальной
+заглушки API с ограниченным каналом на приём (по умолчанию 2.5 МБ/с ≈ 20 Мбит/с).
+
+  python bench/bench_vision_upload.py [runs] [bandwidth_bytes_per_sec]
+"""
+import os, sys, time, statistics, tempfile
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# prefs и кэш ответов — во временном каталоге, чтобы не трогать настоящие
+_TMP = tempfile.mkdtemp(prefix="red-bench-")
+os.environ["APPDATA"] = _TMP; os.environ["HOME"] = _TMP
+import numpy as np
+
+from bench._stub import StubServer
+
+SIZES = [("720p", 1280, 720), ("1080p", 1920, 1080), ("1440p", 2560, 1440), ("4K", 3840, 2160)]
+CONFIGS = [
+    ("png full (old)", dict(max_dim=0, format="png", quality=-1, gray=False), None),
+    ("jpeg q70 1024", dict(max_dim=1024, format="jpeg", quality=70, gray=False), "low"),
+    ("webp q70 1024", dict(max_dim=1024, format="webp", quality=70, gray=False), "low"),
+    ("jpeg gray 768", dict(max_dim=768, format="jpeg", quality=60, gray=True), "low"),
+]
+
+def screen(w: int, h: int, seed: int = 5) -> np.ndarray:
+    """Окно с текстом, панелью и «картинкой» (градиент с шумом) — как типичный скриншот."""
+    r = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 246, np.uint8)
+    img[:h // 24] = (32, 36, 48)                                  # заголовок
+    img[h - h // 20:] = (28, 28, 32)                              # панель задач
+    img[h // 24:h - h // 20, :w // 6] = (230, 232, 236)           # боковая панель
+    line = max(14, h // 40)
+    for y in range(h // 12, h - h // 8, line):
+        x = w // 6 + 40
+        while x < w - w // 3:
+            gw = int(r.integers(6, 40))
+            img[y:y + line // 2, x:x + gw] = r.integers(20, 90)
+            x += gw + int(r.integers(4, 10))
+    ph, pw = h // 3, w // 4                                       # картинка справа
+    yy, xx = np.mgrid[0:ph, 0:pw]
+    pic = np.stack([(xx * 255 // pw), (yy * 255 // ph), ((xx + yy) * 127 // (pw + ph)) + 60], -1)
+    pic = pic + r.integers(-18, 18, pic.shape)
+    img[h // 8:h // 8 + ph, w - pw - 40:w - 40] = np.clip(pic, 0, 255).astype(np.uint8)
+    return img
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    bw = float(sys.argv[2]) if len(sys.argv) > 2 else 2.5e6
+    with StubServer(reply="Редактор кода, открыт файл vision.py.", first_token_delay=0.05,
+                    token_delay=0.0, bandwidth=bw, prefill_per_kb=0.0002) as srv:
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-stub"
+        from PySide6.QtGui import QGuiApplication
+        app = QGuiApplication.instance() or QGuiApplication([])
+        from red2.core import vision
+
+        print(f"uplink {bw / 1e6:.1f} MB/s, {runs} runs per cell; OCR по-прежнему берёт исходные пиксели без потерь")
+        print(f"{'screen':6s} {'config':15s} {'encode ms':>9s} {'payload KiB':>11s} {'round trip ms':>13s}")
+        seq = 0; worst = {}
+        for name, w, h in SIZES:
+            img = vision.rgb_to_image(screen(w, h))
+            for cname, opts, detail in CONFIGS:
+                enc, rtt, size = [], [], 0
+                for _ in range(runs):
+                    t0 = time.perf_counter()
+                    data, mime = vision.encode_for_llm(img, **opts)
+                    t1 = time.perf_counter()
+                    seq += 1   # уникальный заголовок — мимо кэша ответов
+                    before = srv.bytes_in
+                    vision._describe_llm(data, "", f"bench {seq}", mime=mime, detail=detail)
+                    rtt.append(time.perf_counter() - t1); enc.append(t1 - t0)
+                    size = srv.bytes_in - before
+                print(f"{name:6s} {cname:15s} {statistics.median(enc)*1000:9.1f} {size/1024:11.1f} "
+                      f"{statistics.median(rtt)*1000:13.1f}")
+                worst.setdefault(cname, []).append(statistics.median(enc) + statistics.median(rtt))
+        req = srv.last_request["messages"][1]["content"][1]["image_url"]
+        print("last request: mime", req["url"][5:req["url"].index(";")], "detail", req.get("detail"))
+        old = sum(worst["png full (old)"]); new = sum(worst["jpeg q70 1024"])
+        print(f"total encode+round trip over all sizes: png {old:.2f} s -> jpeg {new:.2f} s ({old/new:.1f}x)")
+        del app
+
+if __name__ == "__main__":
+    main()
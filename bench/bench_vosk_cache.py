@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Первый (холодный) и тёплые вызовы stt_vosk_wav с реестром моделей.
+Нужна маленькая модель, например vosk-model-small-ru-0.22.
+
+  set VOSK_MODEL_PATH=...\\vosk-model-small-ru-0.22
+  python bench/bench_vosk_cache.py [file.wav]
+"""
+import os, sys, time, math, wave, struct, tempfile, statistics
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from red2.core import config, stt
+
+WARM_RUNS = 10
+
+def synth_wav(path: str, sec: float = 2.0, sr: int = 16000) -> None:
+    # тон + шум вместо речи: для замера латентности содержимое не важно
+    n = int(sec * sr)
+    frames = b"".join(struct.pack("<h", int(6000 * math.sin(2 * math.pi * 220 * i / sr))) for i in range(n))
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(sr); wf.writeframes(frames)
+
+def main():
+    model_dir = config.vosk_model_path()
+    if not model_dir:
+        raise SystemExit("VOSK_MODEL_PATH не задан")
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tmp, "tone.wav")
+        if len(sys.argv) <= 1:
+            synth_wav(wav)
+        t0 = time.perf_counter(); stt.stt_vosk_wav(wav); cold = time.perf_counter() - t0
+        warm = []
+        for _ in range(WARM_RUNS):
+            t0 = time.perf_counter(); stt.stt_vosk_wav(wav); warm.append(time.perf_counter() - t0)
+        print(f"cold call {cold*1000:8.1f} ms")
+        print(f"warm call {statistics.median(warm)*1000:8.1f} ms median ({WARM_RUNS} runs)")
+        for d, st in stt.vosk_stats().items():
+            print(f"{d}: loads {st['loads']}, hits {st['hits']}, load {st['load_sec']*1000:.0f} ms, loaded {st['loaded']}")
+        stt.vosk_unload()
+        print("after vosk_unload():", {d: st["loaded"] for d, st in stt.vosk_stats().items()})
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from red2.core import audio, stt
 
 rec = audio.Recorder(samplerate=16000, channels=1)
 print("Recording 5s...")
-rec.start(); time.sleep(5); path = rec.stop()
-print("Saved:", path)
-txt = stt.stt_vosk_wav(path) or stt.stt_openai_wav(path)
+rec.start(); time.sleep(5); clip = rec.stop()
+print("Recorded:", f"{clip.duration:.2f}s" if clip else "nothing")
+txt = clip and (stt.stt_vosk_wav(clip) or stt.stt_openai_wav(clip))
 print("Transcript:", txt)
@@ -2,20 +2,29 @@
 # -*- coding: utf-8 -*-
 import sys, os, time as _time
 from pathlib import Path
-from PySide6.QtCore import Qt, QThread, Signal, QTimer, QObject
-from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QLinearGradient, QBrush
+from PySide6.QtCore import Qt, Signal, QTimer, QObject
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QFrame,
-    QLabel, QPushButton, QLineEdit, QListWidget, QSystemTrayIcon, QMenu
+    QLabel, QPushButton, QLineEdit, QSystemTrayIcon, QMenu
 )
 
-from .core import config, llm, stt, audio, tts
+from .core import config, llm, stt, audio, tts, playback, service, ocr as redocr, memory as redmemory
+from .core.live_stt import LiveTranscriber
+from .core.stt_race import STTOrchestrator
+from .core.scheduler import RequestScheduler
+from .core.conversation import Conversation, budget_for, llm_summarizer
+from .core.sentences import SentenceBuffer
 from .core import vision as redvision
 from .splash import SplashWindow
 from .preflight import run_preflight
 from .ui.neon_widgets import NeonSideBar
 from .ui.settings_dialog import SettingsDialog
+from .ui.region_select import RegionSelector
+from .ui.chat_view import ChatView
+from .ui.tray_anim import TrayAnimator
+from .ui import anim_clock
 from .ui import user_prefs
+from .ui.jobs import ServiceJob, UiCall
 
 APP_TITLE = "Red Assistant — Voice MVP (Minimal)"
 MIN_RECORD_SEC = 0.20
@@ -24,82 +33,86 @@ def log(*a):
     try: print(*a, flush=True)
     except: pass
 
-# ------------ Tray animator --------------
-class TrayAnimator(QObject):
-    def __init__(self, tray: QSystemTrayIcon):
-        super().__init__()
-        self.tray=tray; self.state="idle"; self.level=0.0; self._t=0
-        self.timer=QTimer(self); self.timer.setInterval(80); self.timer.timeout.connect(self._tick); self.timer.start()
-    def initial_icon(self)->QIcon: return self._build_icon()
-    def set_state(self,s): self.state=s
-    def set_level(self,v): self.level=max(0.0,min(1.0,float(v)))
-    def _tick(self): self._t=(self._t+1)%10000; self.tray.setIcon(self._build_icon())
-    def _build_icon(self)->QIcon:
-        size=128; pm=QPixmap(size,size); pm.fill(Qt.transparent); p=QPainter(pm)
-        try:
-            p.setRenderHint(QPainter.Antialiasing,True); p.setBrush(QColor(16,18,22)); p.setPen(Qt.NoPen); p.drawEllipse(2,2,size-4,size-4)
-            bars=6
-            for i in range(bars):
-                import math as _m
-                phase=self._t*0.18+i*0.9
-                if self.state=="idle": amp=0.15+0.05*_m.sin(phase)
-                elif self.state=="listening": amp=0.25+0.6*self.level+0.12*_m.sin(phase*1.3)
-                elif self.state=="speaking": amp=0.5+0.25*_m.sin(phase*2.2)
-                else: amp=0.08
-                amp=max(0.05,min(1.0,amp)); w=(size-28)//bars; x=14+i*w; h=int((size-28)*amp); y=size-14-h
-                grad=QLinearGradient(x,y,x+w,y); grad.setColorAt(0.0,QColor("#FF0033")); grad.setColorAt(1.0,QColor("#FF1A8A"))
-                p.fillRect(x+2,y,w-4,h,QBrush(grad))
-            p.setPen(QColor(255,0,51,180)); p.setBrush(Qt.NoBrush); p.drawEllipse(2,2,size-4,size-4)
-        finally: p.end()
-        return QIcon(pm)
-
 # ------------ Workers ------------
-class VisionWorker(QThread):
+class VisionWorker(ServiceJob):
     finished = Signal(str,str,str)   # desc, ocr, title
-    failed = Signal(str)
-    def __init__(self, lang="auto"):
+    ocr_ready = Signal(str,str)      # ocr, title — приходит раньше описания
+    backend = "vision"; timeout = 90.0
+    def __init__(self, lang="auto", ocr_wait=0.3, mode=None, rect=None):
         super().__init__()
         self.lang = lang
+        self.ocr_wait = None if ocr_wait is None or ocr_wait < 0 else float(ocr_wait)
+        self.mode = mode; self.rect = rect
+    def _ocr(self, ocr, title):
+        if self.live: self.ocr_ready.emit(ocr, title)
     def run(self):
         try:
-            # если redvision поддерживает язык — пробуем передать, иначе просто игнор
-            try:
-                desc, ocr, title = redvision.quick_screen_context_ultra_brief(lang=self.lang)
-            except TypeError:
-                desc, ocr, title = redvision.quick_screen_context_ultra_brief()
-            self.finished.emit(desc, ocr, title)
+            desc, ocr, title = redvision.quick_screen_context_ultra_brief(
+                lang=self.lang, on_ocr=self._ocr, ocr_wait=self.ocr_wait, mode=self.mode, rect=self.rect)
+            if self.live: self.finished.emit(desc, ocr, title)
         except Exception as e:
-            self.failed.emit(f"{type(e).__name__}: {e}")
+            if self.live: self.failed.emit(f"{type(e).__name__}: {e}")
 
-class STTWorker(QThread):
-    finished = Signal(str); failed = Signal(str)
-    def __init__(self, wav): super().__init__(); self.wav=wav
+class STTWorker(ServiceJob):
+    finished = Signal(str)
+    backend = "stt"; timeout = 60.0
+    def __init__(self, clip, live=None, orch=None):
+        super().__init__(); self.clip=clip; self.live_stt=live; self.orch=orch or STTOrchestrator()
     def run(self):
         try:
-            text = stt.stt_vosk_wav(self.wav) or stt.stt_openai_wav(self.wav)
-            self.finished.emit((text or '').strip())
-        except Exception as e: self.failed.emit(f"{type(e).__name__}: {e}")
-
-class LLMWorker(QThread):
-    finished = Signal(str); failed = Signal(str)
-    def __init__(self, msgs, model:str):
-        super().__init__(); self.msgs=msgs; self.model=model
+            text = self.orch.transcribe(self.clip, live=self.live_stt)
+            if self.live: self.finished.emit((text or '').strip())
+        finally: self.clip=None; self.live_stt=None   # освободить буфер записи для следующей
+
+class LiveSignals(QObject):
+    partial = Signal(str)   # частичная гипотеза живого STT (из потока распознавания)
+
+class LLMWorker(ServiceJob):
+    finished = Signal(str)
+    delta = Signal(str)      # stream: очередной кусок текста
+    sentence = Signal(str)   # stream: готовое предложение для TTS
+    backend = "llm"; timeout = 180.0
+    def __init__(self, msgs, model:str, stream:bool=False, recall=None, temperature=None):
+        super().__init__(); self.msgs=msgs; self.model=model; self.stream=stream; self.recall=recall; self.temperature=temperature
     def run(self):
-        try: self.finished.emit(llm.chat(self.msgs, model=self.model))
-        except Exception as e: self.failed.emit(f"{type(e).__name__}: {e}")
+        if self.recall:
+            # поиск по памяти здесь, а не в GUI: SQLite может ждать фоновую запись в память
+            try: mem=self.recall()
+            except Exception as e: mem=None; print("Memory recall error:", e)
+            if mem: self.msgs=self.msgs[:-1]+[mem]+self.msgs[-1:]   # перед последним вопросом
+        if not self.stream:
+            text=llm.chat(self.msgs, model=self.model, temperature=self.temperature)
+            if self.live: self.finished.emit(text)
+            return
+        sb=SentenceBuffer(); parts=[]
+        it=llm.chat_stream(self.msgs, model=self.model, temperature=self.temperature)
+        try:
+            for d in it:
+                if not self.live: return   # отмена: закрываем поток, соединение не переиспользуется
+                parts.append(d); self.delta.emit(d)
+                for s in sb.feed(d): self.sentence.emit(s)
+        finally: it.close()
+        if not self.live: return
+        tail=sb.flush()
+        if tail: self.sentence.emit(tail)
+        self.finished.emit("".join(parts).strip())
 
 # ------------ Main -------------
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle(APP_TITLE); self.resize(1000,720)
-        self._vision=None; self._stt=None; self._llm=None
-        self._llm_busy=False
+        self._vision=None; self._stt=None; self._llm=None; self._live=None; self._region=None
+        self._live_sig=LiveSignals(); self._live_sig.partial.connect(self._on_live_partial)
+        self._ui=UiCall()
+        self._llm_streamed=False; self._last_question=""; self._stream_uid=None
         self._hotkey_setup_done=False
         self._kb_hooked=False
         self.last_screen_desc=""; self.last_screen_ocr=""; self.last_screen_title=""
-        self._last_stt_text=""; self._last_stt_ts=0.0
         self.prefs = user_prefs.load()
+        # очередь запросов к LLM: голос > текст > vision, дубли сливаются
+        self.sched=RequestScheduler(start=self._start_llm, cancel=self._cancel_llm,
+                                    policy=self.prefs.get("llm_request_policy","queue"))
 
         # left neon bar
         self.neon = NeonSideBar()
@@ -116,7 +129,8 @@ class MainWindow(QMainWindow):
         v.addWidget(top)
 
         chat=QFrame(objectName="Panel"); cl=QVBoxLayout(chat); cl.setContentsMargins(14,14,14,14)
-        self.chat_list=QListWidget(); cl.addWidget(self.chat_list,1)
+        self.chat_list=ChatView(max_rows=int(self.prefs.get("chat_max_rows",500)), page=int(self.prefs.get("chat_page",250)))
+        cl.addWidget(self.chat_list,1)
         il=QHBoxLayout(); self.inp=QLineEdit(); self.inp.setPlaceholderText("Владыка, введите запрос..."); self.send_btn=QPushButton("Send")
         il.addWidget(self.inp,1); il.addWidget(self.send_btn); cl.addLayout(il)
         v.addWidget(chat,1)
@@ -131,19 +145,44 @@ class MainWindow(QMainWindow):
             self.tray.setContextMenu(menu); self.tray.activated.connect(lambda r: self.showNormal() if r==QSystemTrayIcon.Trigger else None); self.tray.show()
             a_open.triggered.connect(self.show_window); a_quit.triggered.connect(QApplication.instance().quit); a_vis.triggered.connect(self.describe_screen_now); a_settings.triggered.connect(self.open_settings)
             self.hide(); self._append("assistant","Started to tray.")
+            self._watch_session_lock()
         else: self.anim=None; self.show()
 
-        self.messages=[{"role":"system","content":config.load_system_prompt()}]; 
-        self.rec=audio.Recorder(); 
+        self.conv=Conversation(config.load_system_prompt(),
+                               budget=budget_for(self.prefs.get("model") or "gpt-4o-mini", self.prefs))
+        self.rec=audio.Recorder(persist=bool(self.prefs.get("keep_recordings", False)),
+                                keep_files=int(self.prefs.get("keep_recordings_max", 20)))
         self.tts=tts.TTS(rate=int(self.prefs.get("tts_rate",175)), volume=float(self.prefs.get("tts_volume",0.9)))
+        self.tts.warm_async()
+        service.submit(redocr.warm, self.prefs.get("ocr_lang","auto"), backend="ocr")   # языки Tesseract — заранее
+        self.memory=redmemory.memory()
+        if self.memory: service.submit(self.memory.load, backend="memory")   # векторы с диска — в фоне
 
         self.btn_talk.pressed.connect(self._start_rec); self.btn_talk.released.connect(self._stop_rec_and_transcribe)
         self.inp.returnPressed.connect(self._send_text); self.send_btn.clicked.connect(self._send_text)
         self.btn_settings.clicked.connect(self.open_settings)
 
-        self.level_timer=QTimer(self); self.level_timer.setInterval(90); self.level_timer.timeout.connect(self._update_level); self.level_timer.start()
+        self._level_sub=anim_clock.clock().add(lambda now: self._update_level(), 90, "level")   # общие часы с полосой и треем
         self._setup_hotkeys_split()
 
+    # ----- блокировка сеанса (Windows): значок никто не видит — анимация трея на паузе -----
+    def _watch_session_lock(self):
+        if os.name!="nt": return
+        try:
+            import ctypes; ctypes.windll.wtsapi32.WTSRegisterSessionNotification(int(self.winId()), 0)   # NOTIFY_FOR_THIS_SESSION
+        except Exception as e: log("WTS session notify unavailable:", e)
+
+    def nativeEvent(self, event_type, message):
+        if os.name=="nt" and getattr(self,"anim",None) and event_type==b"windows_generic_MSG":
+            try:
+                from ctypes import wintypes
+                m=wintypes.MSG.from_address(int(message))
+                if m.message==0x02B1 and m.wParam in (7, 8):   # WM_WTSSESSION_CHANGE: LOCK / UNLOCK
+                    self.anim.set_paused(m.wParam==7)
+                    if getattr(self,"_level_sub",None): anim_clock.clock().set_active(self._level_sub, m.wParam==8)
+            except Exception: pass
+        return super().nativeEvent(event_type, message)
+
     # ----- Settings -----
     def open_settings(self):
         dlg = SettingsDialog(self)
@@ -152,12 +191,18 @@ class MainWindow(QMainWindow):
 
     def apply_prefs(self, prefs:dict):
         self.prefs = prefs
+        self.sched.policy = prefs.get("llm_request_policy","queue")
+        if self.memory is None and prefs.get("memory", False):   # память включили в настройках
+            self.memory=redmemory.memory()
+            if self.memory: service.submit(self.memory.load, backend="memory")
         # TTS
         try:
             self.tts.stop()
         except Exception:
             pass
         self.tts = tts.TTS(rate=int(self.prefs.get("tts_rate",175)), volume=float(self.prefs.get("tts_volume",0.9)))
+        self.tts.warm_async()   # голос мог смениться — другие ключи кэша
+        service.submit(redocr.warm, self.prefs.get("ocr_lang","auto"), backend="ocr")
         # state label could include model
         self._append("assistant", f"Настройки применены: модель={self.prefs.get('model')}, TTS={self.prefs.get('tts_rate')} / {self.prefs.get('tts_volume')}")
 
@@ -167,9 +212,22 @@ class MainWindow(QMainWindow):
         except Exception: pass
         if hasattr(self,'anim') and self.anim: self.anim.set_state("speaking")
         self.neon.set_state("speaking")
-        self.tts.speak(text, on_done=lambda: (hasattr(self,'anim') and self.anim and self.anim.set_state('idle'),
-                                              self.neon.set_state("idle"),
-                                              self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4")))
+        self.tts.speak(text, on_done=lambda: self._ui.call.emit(self._speak_done))
+
+    def _speak_done(self):
+        if hasattr(self,'anim') and self.anim: self.anim.set_state('idle')
+        self.neon.set_state("idle")
+        self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
+
+    def _speak_sentence(self, text: str):
+        # потоковый ответ: первое предложение прерывает прошлую речь, дальше — в очередь
+        if not self._llm_streamed:
+            self._llm_streamed=True
+            try: self.tts.stop()
+            except Exception: pass
+            if hasattr(self,'anim') and self.anim: self.anim.set_state("speaking")
+            self.neon.set_state("speaking")
+        self.tts.enqueue(text)
 
     # ----- hotkeys -----
     def _setup_hotkeys_split(self):
@@ -220,18 +278,39 @@ class MainWindow(QMainWindow):
 
     def describe_screen_now(self):
         if self._vision and self._vision.isRunning(): self._append("assistant","Vision уже выполняется…"); return
-        self._vision=VisionWorker(lang=self.prefs.get("ocr_lang","auto")); self._vision.finished.connect(self._on_vision_ready)
+        mode=self.prefs.get("vision_capture","full")
+        if mode=="rect":   # сначала выделить область, снимок — после закрытия затемнения
+            self._region=RegionSelector()
+            self._region.selected.connect(lambda r: QTimer.singleShot(150, lambda: self._start_vision("rect", r)))
+            self._region.cancelled.connect(lambda: setattr(self, "_region", None))
+            self._region.show(); self._region.activateWindow(); return
+        self._start_vision(mode)
+
+    def _start_vision(self, mode, rect=None):
+        self._region=None
+        self._vision=VisionWorker(lang=self.prefs.get("ocr_lang","auto"), ocr_wait=float(self.prefs.get("vision_ocr_wait",0.3)),
+                                  mode=mode, rect=rect)
+        self._vision.ocr_ready.connect(lambda ocr, title: self._on_vision_ready(None, ocr, title))
+        self._vision.finished.connect(self._on_vision_ready)
         self._vision.failed.connect(lambda e: self._append("assistant", f"Vision ошибка: {e}"))
         self._vision.finished.connect(lambda *a: setattr(self, "_vision", None)); self._vision.start()
 
     def _on_vision_ready(self, desc, ocr, title):
-        self.last_screen_desc=desc or ""; self.last_screen_ocr=(ocr or "")[:2000]; self.last_screen_title=title or ""
+        # desc=None — пока только OCR (описание ещё в пути): перевод экрана уже может его взять
+        self.last_screen_ocr=(ocr or "")[:2000]; self.last_screen_title=title or ""
+        if desc is None: return
+        self.last_screen_desc=desc or ""
+        self._remember(("screen", f"{title or '(окно)'}: {desc}") if desc else None,
+                       ("ocr", f"{title or '(окно)'}: {ocr[:500]}") if ocr else None)
         if self.last_screen_desc:
             self._speak(self.last_screen_desc)
             self._append("assistant", f"Экран: {self.last_screen_desc}")
 
     def _update_level(self):
         lvl = self.rec.current_level() if self.rec else 0.0
+        eng = playback.current()
+        if eng is not None and eng.playing and not getattr(self,"_recording",False):
+            lvl = min(1.0, eng.level() * 4.0)   # полоски дышат в такт речи Red
         if hasattr(self,'anim') and self.anim: self.anim.set_level(lvl)
         self.neon.set_level(lvl)
 
@@ -242,8 +321,16 @@ class MainWindow(QMainWindow):
         if hasattr(self,'anim') and self.anim: self.anim.set_state("listening")
         self.neon.set_state("listening")
         self.state_lbl.setText("State: Listening  |  PTT: Ctrl+3  |  Vision: Ctrl+4"); self.btn_talk.setChecked(True)
-        try: self.rec.start()
+        self._live=None
+        model_dir=config.vosk_model_path()
+        if model_dir and self.prefs.get("stt_streaming", True):
+            self._live=LiveTranscriber(model_dir, samplerate=self.rec.samplerate, on_partial=self._live_sig.partial.emit)
+        eng = playback.current()
+        if eng is not None: eng.duck(0.2)   # приглушить Red, пока Владыка говорит
+        try: self.rec.start(live=self._live)
         except Exception as e:
+            if self._live: self._live.cancel(); self._live=None
+            if eng is not None: eng.unduck()
             self._append("assistant", f"Микрофон ошибка: {e}")
             if hasattr(self,'anim') and self.anim: self.anim.set_state("idle")
             self.neon.set_state("idle")
@@ -251,55 +338,79 @@ class MainWindow(QMainWindow):
 
     def _stop_rec_and_transcribe(self, from_hotkey=False):
         if not getattr(self,"_recording",False): return
-        self._recording=False; wav=""
-        try: wav=self.rec.stop()
+        self._recording=False; clip=None
+        live, self._live = self._live, None
+        eng = playback.current()
+        if eng is not None: eng.unduck()
+        try: clip=self.rec.stop()
         except Exception as e: self._append("assistant", f"Запись ошибка: {e}")
-        if not wav or float(getattr(self.rec,"last_duration",0.0)) < MIN_RECORD_SEC:
+        if not clip or float(getattr(self.rec,"last_duration",0.0)) < MIN_RECORD_SEC:
+            if live: live.cancel()
             if hasattr(self,'anim') and self.anim: self.anim.set_state("idle")
             self.neon.set_state("idle")
             self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4"); self.btn_talk.setChecked(False)
-            if wav: self._append("assistant", f"Запись слишком короткая (<{MIN_RECORD_SEC:.2f}с)."); return
+            if clip: self._append("assistant", f"Запись слишком короткая (<{MIN_RECORD_SEC:.2f}с)."); return
             return
         if hasattr(self,'anim') and self.anim: self.anim.set_state("idle")
         self.neon.set_state("idle")
         self.state_lbl.setText("State: Transcribing…  |  PTT: Ctrl+3  |  Vision: Ctrl+4"); self.btn_talk.setChecked(False)
-        self._stt=STTWorker(wav); self._stt.finished.connect(self._on_stt_text); self._stt.failed.connect(self._on_stt_err); self._stt.start()
-
-    # ----- debounce STT and singleflight LLM -----
-    def _start_llm(self, msgs):
-        if self._llm_busy:
-            return
-        self._llm_busy=True
+        self._stt=STTWorker(clip, live=live, orch=STTOrchestrator.from_prefs(self.prefs)); self._stt.finished.connect(self._on_stt_text); self._stt.failed.connect(self._on_stt_err); self._stt.start()
+
+    # ----- request queue -> LLM -----
+    def _submit_request(self, kind, text):
+        req=self.sched.submit(kind, text)
+        if req is None: return   # такой же запрос уже в очереди / только что отправлен
+        self._append("user", text)
+        if req.status=="queued":
+            self.state_lbl.setText(f"State: Queued ({len(self.sched.pending())})  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
+
+    def _start_llm(self, req):
+        # сообщения собираются при старте, а не при постановке: в них уже есть прошлые ответы
+        self.state_lbl.setText("State: Thinking…  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
         model = self.prefs.get("model") or "gpt-4o-mini"
-        self._llm=LLMWorker(msgs, model=model)
-        self._llm.finished.connect(self._on_llm_reply)
-        self._llm.failed.connect(self._on_llm_err)
-        def _clear():
-            self._llm_busy=False
-        self._llm.finished.connect(_clear)
-        self._llm.failed.connect(_clear)
-        self._llm.start()
+        self.conv.budget=budget_for(model, self.prefs)
+        # реплика Владыки попадёт в историю вместе с ответом (_on_llm_reply): сорванный запрос её не оставит
+        is_tr, target = self._is_translate_request(req.text); msgs=self._build_msgs(req.text, is_tr, target)
+        self._last_question=req.text
+        self._llm_streamed=False; self._stream_uid=None
+        w=self._llm=LLMWorker(msgs, model=model, stream=bool(self.prefs.get("llm_stream", True)),
+                              recall=None if is_tr else self._recall(req.text),
+                              temperature=0.0 if is_tr else None)   # перевод детерминирован — тот же OCR берётся из кэша
+        w.sentence.connect(self._bind_llm(w, self._speak_sentence))
+        w.delta.connect(self._bind_llm(w, self._on_llm_delta))
+        w.finished.connect(self._bind_llm(w, self._on_llm_reply))
+        w.failed.connect(lambda err: w is self._llm and self._on_llm_err(err))
+        w.finished.connect(lambda *_: self.sched.done(req))
+        w.failed.connect(lambda *_: self.sched.done(req))
+        w.req=req
+        w.start()
+
+    def _bind_llm(self, w, fn):
+        # сигналы, уже стоящие в очереди Qt от отменённого/сменённого воркера, до нового запроса не доходят
+        return lambda arg: fn(arg) if w is self._llm and w.live else None
+
+    def _cancel_llm(self, req):
+        w=self._llm
+        if w is not None and getattr(w,"req",None) is req:
+            w.cancel()
+            try: self.tts.stop()
+            except Exception: pass
 
     def _on_stt_text(self, text):
         if not text:
             self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4"); return
-        now=_time.time()
-        if text == self._last_stt_text and (now - self._last_stt_ts) < 1.2:
-            return
-        self._last_stt_text, self._last_stt_ts = text, now
+        self._submit_request("voice", text)
 
-        self._append("user", text); self.state_lbl.setText("State: Thinking…  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
-        is_tr, target = self._is_translate_request(text); msgs=self._build_msgs(is_tr, target)
-        self._start_llm(msgs)
+    def _on_live_partial(self, text):
+        if getattr(self,"_recording",False) and text:
+            self.state_lbl.setText(f"State: Listening: …{text[-48:]}  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
 
     def _on_stt_err(self, err): self._append("assistant", f"STT ошибка: {err}"); self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
 
     def _send_text(self):
         txt=self.inp.text().strip()
         if not txt: return
-        self.inp.clear(); self._append("user", txt); self.state_lbl.setText("State: Thinking…  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
-        is_tr, target = self._is_translate_request(txt); msgs=self._build_msgs(is_tr, target)
-        self._start_llm(msgs)
+        self.inp.clear(); self._submit_request("typed", txt)
 
     # ----- build messages helpers -----
     def _is_translate_request(self, text: str) -> tuple[bool, str]:
@@ -312,46 +423,94 @@ class MainWindow(QMainWindow):
             target=mapping.get(target,target); return True, target
         return False, ""
 
-    def _build_msgs(self, is_tr: bool, target: str):
-        msgs=self.messages[:]
+    def _remember(self, *items):
+        # запись в долгую память — в фоне, UI не ждёт SQLite и векторизации
+        items=[i for i in items if i]
+        if not self.prefs.get("memory_screen", False):
+            items=[i for i in items if i[0] not in ("screen","ocr")]   # экран может содержать пароли и личное
+        if items and self.memory and self.prefs.get("memory", False):
+            service.submit(self.memory.add_many, items, backend="memory")
+
+    def _recall(self, query: str):
+        # функция для LLM-воркера: воспоминания по вопросу в пределах memory_budget_ms;
+        # реплики этого сеанса уже в истории/summary
+        if not (query and self.memory and self.prefs.get("memory", False)): return None
+        mem=self.memory; k=int(self.prefs.get("memory_k",3))
+        budget=float(self.prefs.get("memory_budget_ms",20)); min_score=float(self.prefs.get("memory_min_score",0.3))
+        def recall():
+            hits=mem.search(query, k=k, budget_ms=budget, min_score=min_score,
+                            skip=lambda h: h.kind=="turn" and h.session==mem.session)
+            return {"role":"system","content": redmemory.format_hits(hits)} if hits else None
+        return recall
+
+    def _build_msgs(self, question: str, is_tr: bool, target: str):
+        # история из self.conv (в пределах бюджета) + контекст экрана перед вопросом (память добавит воркер)
+        ctx=[]; user=question
         if is_tr:
             ocr_text=self.last_screen_ocr or ""
             if not ocr_text:
-                try: _, ocr_text, _ = redvision.quick_screen_context_ultra_brief()
+                try: _, ocr_text, _ = redvision.quick_screen_context_ultra_brief(lang=self.prefs.get("ocr_lang","auto"))
                 except Exception: pass
             if not ocr_text:
-                msgs.append({"role":"system","content":"На экране текста не найдено. Кратко скажи об этом."})
-                msgs.append({"role":"user","content":"Переведи текст с экрана."})
+                ctx.append({"role":"system","content":"На экране текста не найдено. Кратко скажи об этом."})
+                user="Переведи текст с экрана."
             else:
-                msgs.append({"role":"system","content":"Ты переводчик. Переводи максимально кратко и точно без вступлений."})
-                msgs.append({"role":"user","content":f"Переведи на {target} этот текст с экрана:\n{ocr_text}"})
+                ctx.append({"role":"system","content":"Ты переводчик. Переводи максимально кратко и точно без вступлений."})
+                user=f"Переведи на {target} этот текст с экрана:\n{ocr_text}"
+            # без истории: переводу она не нужна, а ключ кэша от неё менялся бы с каждой репликой
+            return [self.conv.system]+ctx+[{"role":"user","content":user}]
         else:
-            if self.last_screen_desc: msgs.append({"role":"system","content": f"Контекст экрана: {self.last_screen_desc}"})
-            if self.last_screen_title: msgs.append({"role":"system","content": f"Активное окно: {self.last_screen_title}"})
-            if self.last_screen_ocr: msgs.append({"role":"system","content": f"OCR: {self.last_screen_ocr[:800]}"})
-        return msgs
+            if self.last_screen_desc: ctx.append({"role":"system","content": f"Контекст экрана: {self.last_screen_desc}"})
+            if self.last_screen_title: ctx.append({"role":"system","content": f"Активное окно: {self.last_screen_title}"})
+            if self.last_screen_ocr: ctx.append({"role":"system","content": f"OCR: {self.last_screen_ocr[:800]}"})
+        return self.conv.build(ctx, user=user)
 
     def _on_llm_reply(self, content):
-        self.messages.append({"role":"assistant","content": content}); self._append("assistant", content)
-        self._speak(content)
-
-    def _on_llm_err(self, err): self._append("assistant", f"LLM ошибка: {err}"); self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
+        if content: self.conv.add_user(self._last_question); self.conv.add_assistant(content)
+        if self._stream_uid is not None: self.chat_list.set_text(self._stream_uid, content); self._stream_uid=None
+        else: self._append("assistant", content)
+        self._remember(("turn", f"Владыка: {self._last_question}\nRed: {content}") if content else None)
+        if self.conv.needs_compaction():
+            # старые реплики сворачиваются в фоне дешёвой моделью
+            summarize=llm_summarizer(self.prefs.get("summary_model") or "gpt-4o-mini", self.conv.summary_words)
+            service.submit(self.conv.compact, summarize, backend="llm", timeout=60.0)
+        if self._llm_streamed: self.tts.enqueue("", on_done=lambda: self._ui.call.emit(self._speak_done))
+        else: self._speak(content)
+
+    def _on_llm_delta(self, d):
+        # потоковый ответ дописывается в одну строку ленты на месте
+        if self._stream_uid is None: self._stream_uid=self._append("assistant", d)
+        else: self.chat_list.extend(self._stream_uid, d)
+
+    def _on_llm_err(self, err):
+        self._stream_uid=None; self._append("assistant", f"LLM ошибка: {err}")
+        if self._llm_streamed:
+            # уже начатая реплика: договорить принятые фразы и закрыть сессию TTS, иначе «speaking» навсегда
+            self._llm_streamed=False
+            self.tts.enqueue("", on_done=lambda: self._ui.call.emit(self._speak_done))
+        else: self.state_lbl.setText("State: Idle  |  PTT: Ctrl+3  |  Vision: Ctrl+4")
 
     def show_window(self): self.showNormal(); self.raise_(); self.activateWindow()
-    def _append(self, role, text): self.chat_list.addItem(("Владыка:" if role=="user" else "Red:")+" "+text); self.chat_list.scrollToBottom()
+    def _append(self, role, text): return self.chat_list.append(role, text)
     def closeEvent(self, e):
         try:
+            self.sched.cancel_all()
             for t in (self._vision, self._stt, self._llm):
-                if t and t.isRunning(): t.wait(1000)
+                if t and t.isRunning(): t.cancel(); t.wait(1000)
+            self.tts.stop()
         finally: super().closeEvent(e)
 
 # ---------- main ----------
 def main():
+    import multiprocessing; multiprocessing.freeze_support()   # пул OCR в собранном exe
     app = QApplication(sys.argv); app.setApplicationName(APP_TITLE)
     try:
         qss = (Path(__file__).parent / "ui" / "style.qss").read_text(encoding="utf-8"); app.setStyleSheet(qss)
     except Exception: pass
 
+    # модель Vosk грузится в фоне, пока играет сплэш
+    stt.preload_vosk_async()
+
     # splash respect prefs
     prefs = user_prefs.load()
     if prefs.get("show_splash", True):
@@ -366,4 +525,9 @@ def main():
 
     win = MainWindow()
     win.show()
-    sys.exit(app.exec())
+    rc = app.exec()
+    service.shutdown()
+    redocr.close()
+    if win.memory: win.memory.close()
+    win.chat_list.close_spool()
+    sys.exit(rc)
@@ -1,30 +1,47 @@
 # -*- coding: utf-8 -*-
-import time, uuid, queue
-from pathlib import Path
+import time, uuid
+from typing import Optional
 import numpy as np
 import sounddevice as sd
-import soundfile as sf
-
-TMP = Path.cwd() / "tmp_audio"
-TMP.mkdir(exist_ok=True)
+from .audio_buffer import TMP, PcmRing, AudioClip, prune_recordings
 
 class Recorder:
-    def __init__(self, samplerate=16000, channels=1, dtype="int16"):
+    def __init__(self, samplerate=16000, channels=1, dtype="int16", max_sec=120.0,
+                 persist=False, keep_files=20, keep_days=3.0):
         self.samplerate = samplerate
         self.channels = channels
         self.dtype = dtype
-        self._q = queue.Queue()
+        self.max_sec = float(max_sec)
+        self.persist = bool(persist)       # сохранять записи в tmp_audio (для отладки)
+        self.keep_files = int(keep_files)
+        self.keep_days = float(keep_days)
+        self._rings = []
+        self._ring: Optional[PcmRing] = None
         self._stream = None
-        self._frames = []
         self._level = 0.0
         self._level_decay = 0.2  # smoothing factor (0..1)
         self._t0 = None
         self.last_duration = 0.0
+        self.live = None  # live_stt.LiveTranscriber, получает блоки во время записи
+        prune_recordings(TMP, self.keep_files, self.keep_days * 86400)
+
+    def _free_ring(self) -> PcmRing:
+        # буфер, в который ещё смотрит необработанный клип, не трогаем
+        for r in self._rings:
+            if not r.busy:
+                r.reset()
+                return r
+        r = PcmRing(self.samplerate, self.channels, self.max_sec, self.dtype)
+        self._rings.append(r)
+        return r
 
     def _callback(self, indata, frames, time_info, status):
         if status:
             pass
-        self._q.put(indata.copy())
+        blk = self._ring.write(indata)
+        live = self.live
+        if live is not None:
+            live.feed(blk)
         # compute RMS level (0..1)
         try:
             x = indata.astype(np.float32)
@@ -38,29 +55,33 @@ class Recorder:
     def current_level(self) -> float:
         return float(max(0.0, min(1.0, self._level)))
 
-    def start(self):
-        self._frames = []
+    def start(self, live=None):
+        self.live = live
+        self._ring = self._free_ring()
         self._level = 0.0
         self._t0 = time.time()
         self.last_duration = 0.0
         self._stream = sd.InputStream(samplerate=self.samplerate, channels=self.channels, dtype=self.dtype, callback=self._callback)
         self._stream.start()
 
-    def stop(self) -> str:
+    def stop(self) -> Optional[AudioClip]:
         if self._stream is None:
-            return ""
+            return None
         self._stream.stop()
         self._stream.close()
         self._stream = None
-        # drain queue
-        while not self._q.empty():
-            self._frames.append(self._q.get())
-        if not self._frames:
+        self.live = None
+        data = self._ring.view()
+        if len(data) == 0:
             self.last_duration = 0.0
-            return ""
-        data = np.concatenate(self._frames, axis=0)
-        # compute duration
-        self.last_duration = float(len(data) / float(self.samplerate))
-        fname = TMP / f"rec_{int(time.time())}_{uuid.uuid4().hex[:6]}.wav"
-        sf.write(str(fname), data, self.samplerate, subtype="PCM_16")
-        return str(fname)
+            return None
+        clip = AudioClip(data, self.samplerate, ring=self._ring)
+        self.last_duration = clip.duration
+        if self.persist:
+            try:
+                TMP.mkdir(exist_ok=True)
+                clip.save(TMP / f"rec_{int(time.time())}_{uuid.uuid4().hex[:6]}.wav")
+                prune_recordings(TMP, self.keep_files, self.keep_days * 86400)
+            except Exception:
+                pass
+        return clip
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Аудио в памяти: кольцевой PCM-буфер записи и клип, который STT-бэкенды
+читают напрямую, без промежуточного WAV на диске.
+"""
+import io, time, wave, weakref
+from pathlib import Path
+from typing import Optional, Iterator
+import numpy as np
+
+TMP = Path.cwd() / "tmp_audio"
+
+class PcmRing:
+    """
+    Заранее выделенный кольцевой буфер PCM. Пока запись короче max_sec,
+    view() отдаёт срез без копирования; при переполнении хранятся
+    последние max_sec секунд.
+    """
+    def __init__(self, samplerate: int, channels: int, max_sec: float = 120.0, dtype="int16"):
+        self.capacity = int(samplerate * max_sec)
+        self._buf = np.empty((self.capacity, channels), dtype=dtype)
+        self._w = 0
+        self._total = 0
+        self._clips = weakref.WeakSet()  # живые AudioClip, смотрящие в этот буфер
+
+    @property
+    def busy(self) -> bool:
+        return len(self._clips) > 0
+
+    def reset(self) -> None:
+        self._w = 0
+        self._total = 0
+
+    def write(self, block: np.ndarray) -> np.ndarray:
+        """Дописать блок; возвращает записанный участок (view, либо копию на стыке кольца)."""
+        cap = self.capacity
+        n = len(block)
+        if n >= cap:
+            block = block[-cap:]; n = cap
+        end = self._w + n
+        if end <= cap:
+            self._buf[self._w:end] = block
+            out = self._buf[self._w:end]
+        else:
+            k = cap - self._w
+            self._buf[self._w:] = block[:k]
+            self._buf[:n - k] = block[k:]
+            out = np.array(block)
+        self._w = end % cap
+        self._total += n
+        return out
+
+    def view(self) -> np.ndarray:
+        if self._total <= self.capacity:
+            return self._buf[:self._total]
+        return np.concatenate((self._buf[self._w:], self._buf[:self._w]))
+
+class AudioClip:
+    """
+    Запись в памяти: int16 PCM формы (frames, channels). Кодирование в
+    WAV/FLAC — только по запросу и в память (для HTTP-бэкендов).
+    pcm может смотреть в буфер Recorder: держите сам клип, а не голый pcm.
+    """
+    def __init__(self, pcm: np.ndarray, samplerate: int, ring: Optional[PcmRing] = None):
+        self.pcm = pcm
+        self.samplerate = int(samplerate)
+        self.path: Optional[str] = None
+        self.ring = ring                 # срезы этого клипа тоже должны держать буфер занятым
+        if ring is not None:
+            ring._clips.add(self)
+
+    @property
+    def channels(self) -> int:
+        return 1 if self.pcm.ndim == 1 else int(self.pcm.shape[1])
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / float(self.samplerate)
+
+    def __len__(self) -> int:
+        return len(self.pcm)
+
+    def mono(self) -> np.ndarray:
+        x = self.pcm
+        if x.ndim == 1:
+            return x
+        if x.shape[1] == 1:
+            return x[:, 0]
+        return x.mean(axis=1).astype(np.int16)
+
+    def iter_chunks(self, frames: int = 4000) -> Iterator[bytes]:
+        x = self.mono()
+        for i in range(0, len(x), frames):
+            yield x[i:i + frames].tobytes()
+
+    def to_wav_bytes(self) -> bytes:
+        bio = io.BytesIO()
+        with wave.open(bio, "wb") as wf:
+            wf.setnchannels(self.channels); wf.setsampwidth(2); wf.setframerate(self.samplerate)
+            wf.writeframes(np.ascontiguousarray(self.pcm, dtype=np.int16).tobytes())
+        return bio.getvalue()
+
+    def to_flac_bytes(self) -> bytes:
+        import soundfile as sf
+        bio = io.BytesIO()
+        sf.write(bio, self.pcm, self.samplerate, format="FLAC", subtype="PCM_16")
+        return bio.getvalue()
+
+    def save(self, path) -> str:
+        Path(path).write_bytes(self.to_wav_bytes())
+        self.path = str(path)
+        return self.path
+
+def prune_recordings(folder: Path = TMP, max_files: int = 20, max_age_sec: float = 3 * 86400) -> int:
+    """Удалить старые rec_*.wav: оставить не больше max_files и не старше max_age_sec."""
+    try:
+        files = sorted(folder.glob("rec_*.wav"), key=lambda p: p.stat().st_mtime, reverse=True)
+    except Exception:
+        return 0
+    now = time.time(); n = 0
+    for i, p in enumerate(files):
+        try:
+            if i >= max_files or now - p.stat().st_mtime > max_age_sec:
+                p.unlink(); n += 1
+        except Exception:
+            pass
+    return n
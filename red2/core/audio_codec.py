@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Подготовка записи к отправке в Whisper: обрезка тишины в начале/конце
+и сжатие (FLAC без потерь, OGG/Opus с потерями) в память.
+"""
+from typing import Tuple
+import numpy as np
+from .audio_buffer import AudioClip
+
+CODECS = ("flac", "ogg", "wav")
+
+def trim_silence(clip: AudioClip, threshold_db: float = -45.0, rel_db: float = 35.0,
+                 frame_ms: int = 20, pad_ms: int = 200) -> AudioClip:
+    """
+    Срезать тишину по краям. Кадр считается тихим, если он ниже
+    threshold_db dBFS или на rel_db тише самого громкого кадра.
+    Возвращает клип-view (без копирования); пустую запись не трогает.
+    """
+    x = clip.mono()
+    step = max(1, int(clip.samplerate * frame_ms / 1000))
+    n = len(x) // step
+    if n < 2:
+        return clip
+    fr = x[:n * step].reshape(n, step).astype(np.float32) / 32768.0
+    db = 10.0 * np.log10(np.mean(fr * fr, axis=1) + 1e-10)
+    loud = np.nonzero(db > max(threshold_db, float(db.max()) - rel_db))[0]
+    if loud.size == 0:
+        return clip
+    pad = int(clip.samplerate * pad_ms / 1000)
+    a = max(0, loud[0] * step - pad)
+    b = min(len(x), (loud[-1] + 1) * step + pad)
+    if a == 0 and b >= len(x):
+        return clip
+    out = AudioClip(clip.pcm[a:b], clip.samplerate, ring=clip.ring)   # view в буфер записи: пока жив — буфер занят
+    out.path = clip.path
+    return out
+
+def encode(clip: AudioClip, codec: str = "flac") -> Tuple[bytes, str, str]:
+    """(данные, имя файла, MIME). Если кодек недоступен — откат к WAV."""
+    codec = (codec or "wav").lower()
+    try:
+        if codec == "flac":
+            return clip.to_flac_bytes(), "audio.flac", "audio/flac"
+        if codec in ("ogg", "opus"):
+            return _to_ogg_bytes(clip), "audio.ogg", "audio/ogg"
+    except Exception as e:
+        print(f"Audio codec {codec} failed, fallback to WAV:", e)
+    return clip.to_wav_bytes(), "audio.wav", "audio/wav"
+
+def _to_ogg_bytes(clip: AudioClip) -> bytes:
+    import io
+    import soundfile as sf
+    # Opus есть только в libsndfile >= 1.0.29; иначе Vorbis
+    subtype = "OPUS" if "OPUS" in sf.available_subtypes("OGG") else "VORBIS"
+    bio = io.BytesIO()
+    sf.write(bio, clip.pcm, clip.samplerate, format="OGG", subtype=subtype)
+    return bio.getvalue()
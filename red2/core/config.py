@@ -42,3 +42,10 @@ def api_key() -> str | None:
 def vosk_model_path() -> str | None:
     p = get("VOSK_MODEL_PATH", "").strip()
     return p or None
+
+def vosk_idle_unload_sec() -> float:
+    # 0 — никогда не выгружать модель Vosk из памяти
+    try:
+        return float(get("VOSK_IDLE_UNLOAD_SEC", "900"))
+    except ValueError:
+        return 900.0
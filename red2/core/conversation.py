@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+История диалога с бюджетом токенов.
+  - оценка токенов (tiktoken, если установлен; иначе эвристика по символам);
+  - бюджет контекста на модель (CONTEXT_BUDGETS, переопределяется prefs["context_budget"]);
+  - старые реплики сворачиваются в краткое содержание дешёвой моделью (compact);
+  - системные сообщения с контекстом экрана не копятся: в запрос идёт
+    только последнее сообщение каждого вида («Контекст экрана», «OCR:» …);
+  - начало запроса держится неизменным от запроса к запросу (системный промпт,
+    summary, история), меняющийся контекст — в хвосте: так срабатывает кэш
+    промптов у провайдера. История обрезается рывками, а не по реплике.
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Iterable
+
+# токенов на запрос (без ответа): с запасом ниже окна модели — дешевле и быстрее
+CONTEXT_BUDGETS: Dict[str, int] = {
+    "gpt-4o-mini": 6000,
+    "gpt-4o": 6000,
+    "gpt-4.1-mini": 6000,
+    "gpt-3.5-turbo": 3000,
+}
+DEFAULT_BUDGET = 4000
+MSG_OVERHEAD = 4      # служебные токены на сообщение (role, разделители)
+
+# префиксы системных сообщений, из которых в запросе остаётся только последнее
+CONTEXT_PREFIXES = ("Контекст экрана:", "Активное окно:", "OCR:", "Из памяти:")
+
+SUMMARY_PREFIX = "Краткое содержание предыдущего разговора:"
+SUMMARY_PROMPT = (
+    "Сожми диалог ассистента Red с пользователем (Владыкой) в краткое содержание на русском: "
+    "факты, просьбы, решения и незакрытые вопросы. Без вступлений, не длиннее {limit} слов."
+)
+
+_enc = None
+_enc_tried = False
+
+def _encoder():
+    global _enc, _enc_tried
+    if not _enc_tried:
+        _enc_tried = True
+        try:
+            import tiktoken
+            _enc = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _enc = None
+    return _enc
+
+def estimate_tokens(text: str) -> int:
+    """Токены текста. Без tiktoken: ~4 символа ASCII или ~2.6 кириллицы на токен."""
+    if not text:
+        return 0
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text))
+    ascii_n = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_n / 4 + (len(text) - ascii_n) / 2.6) + 1
+
+def message_tokens(msg: dict) -> int:
+    return estimate_tokens(msg.get("content") or "") + MSG_OVERHEAD
+
+def messages_tokens(msgs: Iterable[dict]) -> int:
+    return sum(message_tokens(m) for m in msgs)
+
+def budget_for(model: str, prefs: Optional[dict] = None) -> int:
+    over = (prefs or {}).get("context_budget") or {}
+    if isinstance(over, dict) and model in over:
+        return int(over[model])
+    if isinstance(over, (int, float)) and over > 0:
+        return int(over)
+    return CONTEXT_BUDGETS.get(model, DEFAULT_BUDGET)
+
+def dedup_context(msgs: List[dict]) -> List[dict]:
+    """Из системных сообщений одного вида (и точных повторов) оставить последнее."""
+    seen = set(); out = []
+    for m in reversed(msgs):
+        if m.get("role") == "system":
+            c = m.get("content") or ""
+            key = next((p for p in CONTEXT_PREFIXES if c.startswith(p)), c)
+            if key in seen:
+                continue
+            seen.add(key)
+        out.append(m)
+    out.reverse()
+    return out
+
+class Conversation:
+    """
+    Реплики user/assistant + краткое содержание свёрнутой части.
+    build() собирает запрос в пределах бюджета; compact() сворачивает старое
+    (вызывать в фоне — это запрос к LLM).
+    """
+    def __init__(self, system_prompt: str, budget: int = DEFAULT_BUDGET, keep_recent: int = 6,
+                 compact_at: float = 0.6, summary_words: int = 120, trim_to: float = 0.7):
+        self.system = {"role": "system", "content": system_prompt}
+        self.budget = int(budget)
+        self.keep_recent = int(keep_recent)     # последние реплики не сворачиваются
+        self.compact_at = float(compact_at)     # доля бюджета, после которой пора сворачивать
+        self.summary_words = int(summary_words)
+        self.trim_to = float(trim_to)           # при обрезке оставить такую долю места под историю
+        self.summary = ""
+        self.turns: List[dict] = []
+        self._tok: List[int] = []
+        self._start = 0                         # первая реплика истории в запросе (до обрезки)
+        self._lock = threading.Lock()
+        self._compacting = False
+        self.compactions = 0
+        self.trimmed = 0
+
+    # ----- реплики -----
+    def add_user(self, text: str) -> None:
+        self._add("user", text)
+
+    def add_assistant(self, text: str) -> None:
+        self._add("assistant", text)
+
+    def _add(self, role: str, text: str) -> None:
+        text = (text or "").strip()
+        if not text:
+            return
+        with self._lock:
+            self.turns.append({"role": role, "content": text})
+            self._tok.append(estimate_tokens(text) + MSG_OVERHEAD)
+
+    def history_tokens(self) -> int:
+        with self._lock:
+            return sum(self._tok)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.turns = []; self._tok = []; self.summary = ""; self._start = 0
+
+    # ----- сборка запроса -----
+    def _head(self) -> List[dict]:
+        head = [self.system]
+        if self.summary:
+            head.append({"role": "system", "content": f"{SUMMARY_PREFIX}\n{self.summary}"})
+        return head
+
+    def build(self, context: Iterable[dict] = (), user: Optional[str] = None,
+              budget: Optional[int] = None) -> List[dict]:
+        """
+        [system, summary, ...история..., context, последний user].
+        user — подменить текст последней реплики пользователя только в этом запросе.
+        История сверх бюджета отрезается с начала (до compact()) — сразу до trim_to
+        места, чтобы следующие запросы начинались так же (кэш префикса).
+        """
+        budget = int(budget or self.budget)
+        ctx = dedup_context(list(context))
+        with self._lock:
+            turns = list(self.turns); toks = list(self._tok)
+            head = self._head(); start = min(self._start, len(turns))
+        last = None
+        if turns and turns[-1]["role"] == "user":
+            last = dict(turns.pop()); toks.pop()
+            if user is not None:
+                last["content"] = user
+        elif user is not None:
+            last = {"role": "user", "content": user}
+        fixed = messages_tokens(head) + messages_tokens(ctx) + (message_tokens(last) if last else 0)
+        room = budget - fixed
+        if sum(toks[start:]) > room:
+            i = len(turns); used = 0; lim = room * self.trim_to
+            while i > 0 and used + toks[i - 1] <= lim:
+                i -= 1; used += toks[i]
+            start = i
+            self.trimmed += 1
+            with self._lock:
+                self._start = start
+        hist = turns[start:]
+        if hist and hist[0]["role"] == "assistant" and start:
+            hist = hist[1:]   # не начинать с ответа без вопроса
+        return head + hist + ctx + ([last] if last else [])
+
+    # ----- свёртка -----
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            return (not self._compacting and len(self.turns) > self.keep_recent
+                    and sum(self._tok) > self.budget * self.compact_at)
+
+    def compact(self, summarize: Callable[[str, List[dict]], str]) -> bool:
+        """
+        Свернуть всё, кроме keep_recent последних реплик, в summary.
+        summarize(prev_summary, turns) -> новый summary. Реплики, добавленные
+        во время запроса, не теряются: убирается ровно снятый срез.
+        """
+        with self._lock:
+            if self._compacting or len(self.turns) <= self.keep_recent:
+                return False
+            self._compacting = True
+            n = len(self.turns) - self.keep_recent
+            if n < len(self.turns) and self.turns[n]["role"] == "assistant":
+                n += 1   # свежая часть начинается с вопроса
+            old = self.turns[:n]; prev = self.summary
+        try:
+            summary = (summarize(prev, old) or "").strip()
+            if not summary:
+                return False
+            with self._lock:
+                if self.turns[:n] == old:
+                    del self.turns[:n]; del self._tok[:n]
+                    self._start = max(0, self._start - n)
+                    self.summary = summary
+                    self.compactions += 1
+                    return True
+            return False
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"turns": len(self.turns), "history_tokens": sum(self._tok),
+                    "summary_tokens": estimate_tokens(self.summary),
+                    "compactions": self.compactions, "trimmed": self.trimmed, "budget": self.budget}
+
+def llm_summarizer(model: str, limit_words: int = 120) -> Callable[[str, List[dict]], str]:
+    """Свёртка через chat(): дешёвая модель, без стрима, temperature=0 — повтор той же свёртки берётся из кэша."""
+    from . import llm
+    def _summarize(prev: str, turns: List[dict]) -> str:
+        lines = []
+        if prev:
+            lines.append(f"Ранее: {prev}")
+        for t in turns:
+            who = "Владыка" if t["role"] == "user" else "Red"
+            lines.append(f"{who}: {t['content']}")
+        msgs = [{"role": "system", "content": SUMMARY_PROMPT.format(limit=limit_words)},
+                {"role": "user", "content": "\n".join(lines)}]
+        return llm.chat(msgs, model=model, temperature=0.0)
+    return _summarize
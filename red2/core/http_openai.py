@@ -1,15 +1,39 @@
 # -*- coding: utf-8 -*-
 """
-Minimal OpenAI HTTPS client via urllib (no httpx). Works with Python stdlib.
+Minimal OpenAI HTTPS client on http.client (no httpx). Works with Python stdlib.
+Соединения держатся живыми (keep-alive) в пуле по хосту, SSL-контекст
+создаётся один раз; пул потокобезопасен для параллельных задач сервиса (core.service).
 Env:
   OPENAI_API_KEY
   OPENAI_BASE_URL (default https://api.openai.com/v1)
+  OPENAI_HTTP_POOL=0 — отключить пул (новое соединение на каждый запрос)
+  OPENAI_USAGE_LOG=path.jsonl — писать токены каждого запроса (prompt / cached / completion)
+  HTTPS_PROXY / HTTP_PROXY / NO_PROXY (и системный прокси Windows) — как у urllib:
+  https идёт туннелем CONNECT через прокси, соединения с прокси тоже в пуле
+Тело чата собирается байт-в-байт одинаково для одинаковых сообщений (порядок ключей,
+UTF-8 без экранирования кириллицы); неизменные сообщения (системный промпт, история)
+берутся уже сериализованными из кэша.
 """
-import os, json, ssl, uuid
-from urllib import request, error
+import os, json, ssl, uuid, time, threading, base64
+import http.client
+import urllib.request
+from collections import OrderedDict
+from urllib.parse import urlsplit, unquote
 
 BASE = (os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
 KEY = os.getenv("OPENAI_API_KEY") or ""
+USE_POOL = os.getenv("OPENAI_HTTP_POOL", "1").strip() != "0"
+DEFAULT_TEMPERATURE = 0.4
+MAX_TOKENS = 800
+USAGE_LOG = os.getenv("OPENAI_USAGE_LOG", "").strip()
+
+# соединение, простоявшее дольше, считаем протухшим (сервер мог его закрыть)
+IDLE_TIMEOUT = 50.0
+MAX_IDLE_PER_HOST = 4
+
+# ошибки «сервер закрыл keep-alive соединение» — переподключаемся один раз
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
 
 def _headers(extra=None, content_type="application/json"):
     h = {
@@ -21,35 +45,274 @@ def _headers(extra=None, content_type="application/json"):
         h.update(extra)
     return h
 
+_ctx_lock = threading.Lock()
+_ctx_cached = None
+
 def _ctx():
-    return ssl.create_default_context()
+    global _ctx_cached
+    if not USE_POOL:
+        return ssl.create_default_context()
+    with _ctx_lock:
+        if _ctx_cached is None:
+            _ctx_cached = ssl.create_default_context()
+        return _ctx_cached
+
+_proxies = None
+
+def _proxy_for(scheme: str, host: str):
+    """(host, port, заголовок Proxy-Authorization или None) или None — без прокси."""
+    global _proxies
+    if _proxies is None:
+        _proxies = urllib.request.getproxies()   # окружение, на Windows — ещё и реестр
+    url = _proxies.get(scheme)
+    if not url or urllib.request.proxy_bypass(host):
+        return None
+    if "://" not in url:
+        url = "http://" + url
+    p = urlsplit(url)
+    auth = None
+    if p.username:
+        cred = f"{unquote(p.username)}:{unquote(p.password or '')}".encode("utf-8")
+        auth = "Basic " + base64.b64encode(cred).decode("ascii")
+    return p.hostname, p.port or 8080, auth
+
+class _Pool:
+    """Простаивающие соединения по ключу (scheme, host, port, proxy)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, key, timeout: float):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                conn, ts = idle.pop()
+                if now - ts < IDLE_TIMEOUT and conn.sock is not None:
+                    self.reused += 1
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+            self.created += 1
+        scheme, host, port, proxy = key
+        if proxy is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=_ctx())
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        elif scheme == "https":
+            conn = http.client.HTTPSConnection(proxy[0], proxy[1], timeout=timeout, context=_ctx())
+            conn.set_tunnel(host, port, headers={"Proxy-Authorization": proxy[2]} if proxy[2] else None)
+        else:
+            conn = http.client.HTTPConnection(proxy[0], proxy[1], timeout=timeout)
+        return conn, False
+
+    def release(self, key, conn, resp) -> None:
+        if not USE_POOL or resp.will_close or conn.sock is None:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns = [c for lst in self._idle.values() for c, _ in lst]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+_POOL = _Pool()
+
+def close_connections() -> None:
+    _POOL.close_all()
+
+def _open(method: str, url: str, body: bytes, headers: dict, timeout: float):
+    """
+    Отправить запрос через пул. Возвращает (key, conn, resp);
+    после полного чтения ответа соединение нужно вернуть через _POOL.release.
+    """
+    u = urlsplit(url)
+    scheme = (u.scheme or "https").lower()
+    port = u.port or (443 if scheme == "https" else 80)
+    proxy = _proxy_for(scheme, u.hostname)
+    key = (scheme, u.hostname, port, proxy)
+    path = u.path + ("?" + u.query if u.query else "")
+    if proxy is not None and scheme == "http":
+        # обычный http через прокси: абсолютный URL в строке запроса
+        path = f"http://{u.hostname}:{port}{path}"
+        if proxy[2]:
+            headers = dict(headers, **{"Proxy-Authorization": proxy[2]})
+    for attempt in (0, 1):
+        conn, reused = _POOL.acquire(key, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+        except _STALE_ERRORS:
+            conn.close()
+            if reused and attempt == 0:
+                continue
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        if resp.status >= 400:
+            try:
+                err_body = resp.read().decode("utf-8", "replace")
+            except Exception:
+                err_body = ""
+            _POOL.release(key, conn, resp)
+            raise RuntimeError(f"HTTP {resp.status} {resp.reason}: {err_body[:400]}")
+        return key, conn, resp
+
+def _post_json(url: str, body: bytes, headers: dict, timeout: float):
+    key, conn, resp = _open("POST", url, body, headers, timeout)
+    try:
+        data = resp.read()
+    except BaseException:
+        conn.close()
+        raise
+    _POOL.release(key, conn, resp)
+    return json.loads(data.decode("utf-8"))
+
+def _wrap_error(e: Exception) -> RuntimeError:
+    if isinstance(e, RuntimeError):
+        return e
+    return RuntimeError(f"Network error: {type(e).__name__}: {e}")
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8", "replace")
+
+_MSG_JSON: "OrderedDict[tuple, bytes]" = OrderedDict()
+_MSG_JSON_MAX = 512
+_msg_lock = threading.Lock()
 
-def chat_completions(model: str, messages):
+def _message_json(m: dict) -> bytes:
+    """Сообщение {role, content: str} -> JSON-байты, из кэша; прочие (картинки и т.п.) — как есть."""
+    c = m.get("content")
+    if not isinstance(c, str) or len(m) != 2 or "role" not in m:
+        return _dumps(m)
+    key = (m["role"], c)
+    with _msg_lock:
+        b = _MSG_JSON.get(key)
+        if b is not None:
+            _MSG_JSON.move_to_end(key)
+            return b
+    b = b'{"role":' + _dumps(m["role"]) + b',"content":' + _dumps(c) + b"}"
+    with _msg_lock:
+        _MSG_JSON[key] = b
+        while len(_MSG_JSON) > _MSG_JSON_MAX:
+            _MSG_JSON.popitem(last=False)
+    return b
+
+def _chat_body(model: str, messages, stream: bool = False, temperature: float | None = None) -> bytes:
     if not KEY:
         raise RuntimeError("OPENAI_API_KEY не задан.")
-    url = BASE + "/chat/completions"
-    data = json.dumps({
-        "model": model,
-        "messages": messages,
-        "temperature": 0.4,
-        "max_tokens": 800
-    }).encode("utf-8")
-    req = request.Request(url, data=data, headers=_headers(), method="POST")
+    t = DEFAULT_TEMPERATURE if temperature is None else temperature
+    parts = [b'{"model":', _dumps(model), b',"messages":[',
+             b",".join(_message_json(m) for m in messages),
+             b'],"temperature":', _dumps(t), b',"max_tokens":', _dumps(MAX_TOKENS)]
+    if stream:
+        parts.append(b',"stream":true')
+        if USAGE_LOG:
+            parts.append(b',"stream_options":{"include_usage":true}')
+    parts.append(b"}")
+    return b"".join(parts)
+
+# ----- учёт токенов (в т.ч. закэшированных провайдером) -----
+_usage_lock = threading.Lock()
+_usage = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+def _note_usage(model: str, u: dict | None, body_bytes: int) -> None:
+    if not u:
+        return
+    rec = {"t": round(time.time(), 3), "model": model,
+           "prompt_tokens": int(u.get("prompt_tokens") or 0),
+           "cached_tokens": int((u.get("prompt_tokens_details") or {}).get("cached_tokens") or 0),
+           "completion_tokens": int(u.get("completion_tokens") or 0),
+           "body_bytes": body_bytes}
+    with _usage_lock:
+        _usage["requests"] += 1
+        for k in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+            _usage[k] += rec[k]
+        if USAGE_LOG:
+            try:
+                with open(USAGE_LOG, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rec) + "\n")
+            except OSError:
+                pass
+
+def usage_stats() -> dict:
+    with _usage_lock:
+        u = dict(_usage)
+    u["cached_share"] = u["cached_tokens"] / u["prompt_tokens"] if u["prompt_tokens"] else 0.0
+    return u
+
+def chat_completions(model: str, messages, temperature: float | None = None):
+    data = _chat_body(model, messages, temperature=temperature)
     try:
-        with request.urlopen(req, context=_ctx(), timeout=30) as r:
-            body = r.read()
-            obj = json.loads(body.decode("utf-8"))
-            return obj["choices"][0]["message"]["content"].strip()
-    except error.HTTPError as e:
-        try:
-            err_body = e.read().decode("utf-8")
-        except Exception:
-            err_body = ""
-        raise RuntimeError(f"HTTP {e.code} {e.reason}: {err_body[:400]}")
+        obj = _post_json(BASE + "/chat/completions", data, _headers(), timeout=30)
+        _note_usage(model, obj.get("usage"), len(data))
+        return obj["choices"][0]["message"]["content"].strip()
     except Exception as e:
-        raise RuntimeError(f"Network error: {type(e).__name__}: {e}")
+        raise _wrap_error(e)
+
+def chat_completions_stream(model: str, messages, temperature: float | None = None):
+    """
+    Потоковый вариант (SSE, "stream": true): генератор текстовых дельт
+    по мере их прихода от сервера.
+    """
+    data = _chat_body(model, messages, stream=True, temperature=temperature)
+    try:
+        key, conn, resp = _open("POST", BASE + "/chat/completions", data, _headers(), timeout=30)
+    except Exception as e:
+        raise _wrap_error(e)
+    done = False
+    try:
+        while True:
+            raw = resp.readline()
+            if not raw:
+                break
+            line = raw.decode("utf-8", "replace").strip()
+            if not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            try:
+                obj = json.loads(payload)
+            except ValueError:
+                continue
+            if obj.get("usage"):
+                _note_usage(model, obj["usage"], len(data))   # последний чанк при include_usage
+            choices = obj.get("choices") or []
+            if not choices:
+                continue
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+        resp.read()  # дочитать хвост, чтобы соединение можно было переиспользовать
+        done = True
+    except Exception as e:
+        raise _wrap_error(e)
+    finally:
+        if done:
+            _POOL.release(key, conn, resp)
+        else:
+            conn.close()
 
 def transcribe_whisper(file_path: str, model: str = "whisper-1"):
+    with open(file_path, "rb") as f:
+        file_bytes = f.read()
+    return transcribe_whisper_bytes(file_bytes, model=model)
+
+def transcribe_whisper_bytes(file_bytes: bytes, model: str = "whisper-1",
+                             filename: str = "audio.wav", content_type: str = "audio/wav"):
     if not KEY:
         raise RuntimeError("OPENAI_API_KEY не задан.")
     url = BASE + "/audio/transcriptions"
@@ -64,26 +327,15 @@ def transcribe_whisper(file_path: str, model: str = "whisper-1"):
                 f"Content-Type: {content_type}\r\n\r\n").encode("utf-8")
         tail = b"\r\n"
         return head + data_bytes + tail
-    with open(file_path, "rb") as f:
-        file_bytes = f.read()
     body = b"".join([
         part("model", model),
-        file_part("file", "audio.wav", "audio/wav", file_bytes),
+        file_part("file", filename, content_type, file_bytes),
         (f"--{boundary}--\r\n").encode("utf-8")
     ])
     headers = _headers(content_type=f"multipart/form-data; boundary={boundary}")
-    req = request.Request(url, data=body, headers=headers, method="POST")
     try:
-        with request.urlopen(req, context=_ctx(), timeout=60) as r:
-            resp = r.read()
-            obj = json.loads(resp.decode("utf-8"))
-            # Some responses: {"text":"..."}
-            return obj.get("text") or obj.get("data", [{}])[0].get("text") or ""
-    except error.HTTPError as e:
-        try:
-            err_body = e.read().decode("utf-8")
-        except Exception:
-            err_body = ""
-        raise RuntimeError(f"HTTP {e.code} {e.reason}: {err_body[:400]}")
+        obj = _post_json(url, body, headers, timeout=60)
+        # Some responses: {"text":"..."}
+        return obj.get("text") or obj.get("data", [{}])[0].get("text") or ""
     except Exception as e:
-        raise RuntimeError(f"Network error: {type(e).__name__}: {e}")
+        raise _wrap_error(e)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Живое распознавание во время записи: блоки из audio.Recorder идут
+через VAD в Vosk KaldiRecognizer по мере поступления, частичные гипотезы
+отдаются колбэком, финальный текст готов почти сразу после отпускания PTT.
+"""
+import json, queue, time
+from collections import deque
+from typing import Callable, Optional
+import numpy as np
+from .vad import EnergyVAD
+from . import stt, service
+
+class LiveTranscriber:
+    def __init__(self, model_dir: str, samplerate: int = 16000,
+                 on_partial: Optional[Callable[[str], None]] = None, preroll_ms: int = 300):
+        self.model_dir = model_dir
+        self.samplerate = int(samplerate)
+        self.on_partial = on_partial
+        self.vad = EnergyVAD(samplerate=self.samplerate)
+        self.error: Optional[str] = None
+        self.had_speech = False
+        self.speech_end_t: Optional[float] = None   # monotonic, конец последней речи
+        self._preroll_max = int(self.samplerate * preroll_ms / 1000)
+        self._preroll = deque()
+        self._preroll_n = 0
+        self._texts = []
+        self._confs = []
+        self._last_partial = ""
+        self._final = ""
+        self._rec = None
+        self._cancelled = False
+        self._q: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        self._job = service.submit(self._loop, backend="live")
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def confidence(self) -> float:
+        """Средняя уверенность Vosk по словам (0..1); 0 — слов нет."""
+        return sum(self._confs) / len(self._confs) if self._confs else 0.0
+
+    def feed(self, block: np.ndarray) -> None:
+        """Вызывается из аудио-колбэка: только кладёт блок в очередь."""
+        self._q.put(block)
+
+    def finish(self, timeout: float = 5.0) -> str:
+        self._q.put(None)
+        if not self._job.wait(timeout):
+            # Vosk не дочитал очередь: ok=False, оркестратор распознает клип целиком
+            self.error = "timeout"
+            self.cancel()
+            return ""
+        return self._final
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self.on_partial = None
+        self._q.put(None)
+
+    def _loop(self) -> None:
+        try:
+            from vosk import KaldiRecognizer
+            self._rec = KaldiRecognizer(stt.vosk_model(self.model_dir), self.samplerate)
+            self._rec.SetWords(True)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        while True:
+            blk = self._q.get()
+            if blk is None or self._cancelled:
+                break
+            if self._rec is None:
+                continue
+            try:
+                self._process(blk)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                self._rec = None
+        if self._rec is not None and not self._cancelled:
+            try:
+                self._take(json.loads(self._rec.FinalResult()))
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+        self._final = " ".join(self._texts).strip()
+
+    def _process(self, blk: np.ndarray) -> None:
+        speech = self.vad.is_speech(blk)
+        if not self.had_speech:
+            # до начала речи держим только короткий преролл
+            self._preroll.append(blk); self._preroll_n += len(blk)
+            while self._preroll and self._preroll_n - len(self._preroll[0]) >= self._preroll_max:
+                self._preroll_n -= len(self._preroll.popleft())
+            if not speech:
+                return
+            self.had_speech = True
+            pending = list(self._preroll); self._preroll.clear(); self._preroll_n = 0
+        else:
+            pending = [blk]
+        if speech:
+            self.speech_end_t = None
+        elif self.speech_end_t is None:
+            self.speech_end_t = time.monotonic()
+        for b in pending:
+            self._accept(b)
+
+    def _accept(self, blk: np.ndarray) -> None:
+        x = blk[:, 0] if blk.ndim > 1 else blk
+        if x.dtype != np.int16:
+            x = np.clip(x * 32768.0, -32768, 32767).astype(np.int16) if x.dtype.kind == "f" else x.astype(np.int16)
+        if self._rec.AcceptWaveform(x.tobytes()):
+            self._take(json.loads(self._rec.Result()))
+            partial = ""
+        else:
+            partial = json.loads(self._rec.PartialResult()).get("partial", "")
+        if self.on_partial and partial != self._last_partial:
+            self._last_partial = partial
+            self.on_partial(" ".join(self._texts + ([partial] if partial else [])))
+
+    def _take(self, res: dict) -> None:
+        if res.get("text"):
+            self._texts.append(res["text"])
+        self._confs.extend(w.get("conf", 0.0) for w in res.get("result") or [])
@@ -1,12 +1,68 @@
 # -*- coding: utf-8 -*-
 # Use urllib-based client to avoid httpx issues.
-from typing import List, Dict
-from . import config
-from .http_openai import chat_completions
+import time
+from typing import List, Dict, Iterator
+from . import config, llm_cache
+from . import http_openai
+from .http_openai import chat_completions, chat_completions_stream, DEFAULT_TEMPERATURE
 
 def init_error():
     return None
 
-def chat(messages: List[Dict[str,str]], model: str | None = None) -> str:
+def _cache_key(messages, model: str, temperature, cache):
+    """
+    (кэш, ключ) или (None, None) — если кэш выключен или запрос не кэшируется.
+    cache=None — только детерминированные запросы (temperature == 0), True/False — явно.
+    """
+    c = llm_cache.cache()
+    if c is None:
+        return None, None
+    t = DEFAULT_TEMPERATURE if temperature is None else temperature
+    if not (cache if cache is not None else t == 0):
+        c.note_bypass()
+        return None, None
+    return c, llm_cache.make_key(model, messages, t, http_openai.BASE, http_openai.MAX_TOKENS)
+
+def chat(messages: List[Dict[str,str]], model: str | None = None,
+         temperature: float | None = None, cache: bool | None = None) -> str:
+    """cache: None — кэш только при temperature=0; True — и при другой температуре (повтор уместен); False — мимо."""
+    model = model or config.chat_model()
+    c, key = _cache_key(messages, model, temperature, cache)
+    if c is not None:
+        hit = c.get(key)
+        if hit is not None:
+            return hit
+    t0 = time.perf_counter()
+    text = chat_completions(model, messages, temperature=temperature)
+    if c is not None:
+        c.put(key, text, model, time.perf_counter() - t0)
+    return text
+
+def chat_stream(messages: List[Dict[str,str]], model: str | None = None,
+                temperature: float | None = None, cache: bool | None = None) -> Iterator[str]:
     model = model or config.chat_model()
-    return chat_completions(model, messages)
+    c, key = _cache_key(messages, model, temperature, cache)
+    if c is not None:
+        hit = c.get(key)
+        if hit is not None:
+            return _replay(hit)
+    it = chat_completions_stream(model, messages, temperature=temperature)
+    if c is None:
+        return it
+    return _record(it, c, key, model)
+
+def _replay(text: str) -> Iterator[str]:
+    yield text
+
+def _record(it, c, key: str, model: str) -> Iterator[str]:
+    # в кэш попадает только дочитанный до конца ответ (не отменённый)
+    t0 = time.perf_counter(); parts = []; complete = False
+    try:
+        for d in it:
+            parts.append(d)
+            yield d
+        complete = True
+    finally:
+        it.close()
+        if complete:
+            c.put(key, "".join(parts).strip(), model, time.perf_counter() - t0)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш ответов LLM в SQLite: ключ — sha256 от нормализованных
+(адрес API, модель, сообщения, температура, max_tokens). TTL, вытеснение по размеру
+(давно не читанные первыми), счётчики попаданий/промахов.
+"""
+import hashlib, json, sqlite3, threading, time
+from pathlib import Path
+from typing import Optional
+
+def _norm_content(c):
+    if isinstance(c, str):
+        return " ".join(c.split())
+    if isinstance(c, list):   # multimodal: нормализуем только текстовые части
+        return [{**p, "text": " ".join(p["text"].split())} if isinstance(p, dict) and p.get("type") == "text"
+                and isinstance(p.get("text"), str) else p for p in c]
+    return c
+
+def make_key(model: str, messages, temperature: float, base_url: str = "", max_tokens: int = 0) -> str:
+    norm = [{"role": m.get("role"), "content": _norm_content(m.get("content"))} for m in messages]
+    raw = json.dumps([base_url, model, round(float(temperature), 3), int(max_tokens), norm], ensure_ascii=False,
+                     sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    def __init__(self, path, ttl_sec: float = 24 * 3600, max_bytes: int = 20 << 20):
+        self.path = str(path)
+        self.ttl = float(ttl_sec)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER,
+            latency REAL, created REAL, accessed REAL, hits INTEGER DEFAULT 0)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.bypass = 0
+        self.stores = 0
+        self.expired = 0
+        self.evicted = 0
+        self.saved_sec = 0.0
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, latency, created FROM responses WHERE key=?",
+                                   (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self.ttl > 0 and now - row[2] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key=?", (key,)); self._db.commit()
+                self.expired += 1; self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed=?, hits=hits+1 WHERE key=?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            self.saved_sec += row[1] or 0.0
+            return row[0]
+
+    def put(self, key: str, response: str, model: str = "", latency: float = 0.0) -> None:
+        if not response:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses(key, model, response, size, latency, created, accessed)"
+                             " VALUES (?,?,?,?,?,?,?)", (key, model, response, size, latency, now, now))
+            self.stores += 1
+            self._evict()
+            self._db.commit()
+
+    def note_bypass(self) -> None:
+        with self._lock:
+            self.bypass += 1
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key=?", (key,))
+            total -= size; self.evicted += 1
+
+    def purge_expired(self) -> int:
+        if self.ttl <= 0:
+            return 0
+        with self._lock:
+            n = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            self._db.commit()
+            self.expired += n
+        return n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses"); self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "bypass": self.bypass,
+                    "hit_rate": self.hits / total if total else 0.0, "saved_sec": self.saved_sec,
+                    "stores": self.stores, "expired": self.expired, "evicted": self.evicted,
+                    "entries": n, "bytes": size}
+
+_CACHE: Optional[LLMCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def cache() -> Optional[LLMCache]:
+    """Общий кэш процесса по настройкам (None, если llm_cache выключен)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                from ..ui import user_prefs
+                prefs = user_prefs.load()
+                if not prefs.get("llm_cache", True):
+                    return None
+                _CACHE = LLMCache(user_prefs.data_dir() / "llm_cache.sqlite",
+                                  ttl_sec=float(prefs.get("llm_cache_ttl_h", 24)) * 3600,
+                                  max_bytes=int(prefs.get("llm_cache_mb", 20)) << 20)
+            except Exception as e:
+                print("LLM cache unavailable:", e)
+                return None
+        return _CACHE
+
+def stats() -> dict:
+    c = cache()
+    return c.stats() if c else {}
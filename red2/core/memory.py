@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Долгая память ассистента: прошлые реплики, описания экрана и куски OCR
+в SQLite, векторы — хешированные n-граммы символов (без модели, на CPU),
+поиск — NumPy.
+  - embed_many: 3- и 4-граммы кодов символов, полиномиальный хеш, корзина и знак
+    из разных битов, bincount по всей пачке сразу, L2-нормировка;
+  - в памяти и на диске вектор — int8 с масштабом строки (256 Б + 4 Б на запись;
+    int8 → float32 для matmul в разы дешевле, чем из float16);
+  - до IVF_MIN записей — полный перебор; дальше IVF: центроиды k-means (~√N),
+    векторы лежат в матрице сгруппированными по спискам, запрос смотрит
+    ближайшие списки, пока не кончится бюджет времени;
+  - новые записи копятся в хвосте (перебор) и вливаются в списки, когда хвост
+    дорастёт до 1/16 индекса; центроиды переобучаются, когда N вырос в 4 раза.
+Сверх max_items самые старые записи удаляются при записи (и при load()).
+Писатель один (add / load под _wlock), поиск берёт снимок массивов и не ждёт писателя.
+"""
+import sqlite3, threading, time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+DIM = 256
+NGRAMS = (3, 4)
+IVF_MIN = 20000        # меньше — полный перебор быстрее обучения
+NPROBE = 16            # списков на запрос (не меньше), если бюджет позволяет
+PROBE_SHARE = 0.1      # ... или такая доля всех списков
+MAX_LISTS = 1024
+TEXT_MAX = 1000        # символов текста в одной записи
+PREFIX = "Из памяти:"  # системное сообщение с найденным (одно на запрос, см. CONTEXT_PREFIXES)
+
+_P = np.uint64(1000003)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+class Hit(NamedTuple):
+    id: int
+    kind: str
+    text: str
+    score: float
+    created: float
+    session: float
+
+def _norm(text: str) -> str:
+    return " " + " ".join((text or "").lower().split()) + " "
+
+def embed_many(texts: Iterable[str]) -> np.ndarray:
+    """Тексты → (n, DIM) float32, строки нормированы (косинус = скалярное произведение)."""
+    texts = list(texts)
+    n = len(texts)
+    if not n:
+        return np.zeros((0, DIM), np.float32)
+    c = np.frombuffer("\x00".join(_norm(t) for t in texts).encode("utf-32-le"), np.uint32).astype(np.uint64)
+    row = np.cumsum(c == 0)                       # номер текста для каждой позиции
+    acc = np.zeros(n * DIM, np.float64)
+    for k in NGRAMS:
+        m = len(c) - k + 1
+        if m <= 0:
+            continue
+        h = np.full(m, k, np.uint64); ok = np.ones(m, bool)
+        for j in range(k):
+            cj = c[j:j + m]
+            h = h * _P + cj; ok &= cj != 0        # n-граммы через разделитель не считаются
+        h = h * _MIX
+        idx = row[:m][ok] * DIM + ((h[ok] >> np.uint64(40)) % np.uint64(DIM)).astype(np.int64)
+        sign = 1.0 - 2.0 * ((h[ok] >> np.uint64(33)) & np.uint64(1)).astype(np.float64)
+        acc += np.bincount(idx, weights=sign, minlength=n * DIM)
+    v = acc.reshape(n, DIM).astype(np.float32)
+    v /= np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-9)
+    return v
+
+def embed(text: str) -> np.ndarray:
+    return embed_many([text])[0]
+
+def quantize(v: np.ndarray):
+    """float32 (n, DIM) → int8 (n, DIM) и масштаб строки float32 (n,)."""
+    scale = np.maximum(np.abs(v).max(axis=1), 1e-9) / 127.0
+    return np.round(v / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+def _assign(vecs: np.ndarray, cent: np.ndarray, chunk: int = 32768) -> np.ndarray:
+    out = np.empty(len(vecs), np.int32)
+    for i in range(0, len(vecs), chunk):
+        out[i:i + chunk] = np.argmax(vecs[i:i + chunk].astype(np.float32) @ cent.T, axis=1)
+    return out
+
+def _kmeans(vecs: np.ndarray, k: int, iters: int = 8, seed: int = 0) -> np.ndarray:
+    """Сферический k-means по выборке (до 64 точек на центроид)."""
+    rng = np.random.default_rng(seed)
+    n = len(vecs)
+    sample = vecs[rng.choice(n, min(n, 64 * k), replace=False)].astype(np.float32)
+    sample /= np.maximum(np.linalg.norm(sample, axis=1, keepdims=True), 1e-9)
+    cent = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iters):
+        lab = _assign(sample, cent)
+        sums = np.zeros_like(cent)
+        np.add.at(sums, lab, sample)
+        empty = np.bincount(lab, minlength=k) == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        cent = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-9)
+    return cent
+
+class _Index(NamedTuple):
+    vecs: np.ndarray             # (cap, DIM) int8; [:indexed] сгруппированы по спискам
+    scale: np.ndarray            # масштаб строки, float32
+    ids: np.ndarray              # id строк SQLite в том же порядке
+    n: int
+    indexed: int
+    cent: Optional[np.ndarray]   # (lists, DIM) float32 или None — перебор
+    bounds: Optional[np.ndarray] # границы списков в [0, indexed)
+
+class Memory:
+    def __init__(self, path, max_items: int = 200_000, session: Optional[float] = None):
+        self.path = str(path)
+        self.max_items = int(max_items)
+        self.session = float(session if session is not None else time.time())
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER PRIMARY KEY, kind TEXT, text TEXT, created REAL, session REAL, vec BLOB)""")
+        self._db.commit()
+        self._dblock = threading.Lock()
+        self._wlock = threading.Lock()     # один писатель: add / load / переиндексация
+        self._lock = threading.Lock()      # подмена снимка индекса
+        self._ix = self._empty()
+        self._trained_at = 0
+        self._next_id = 1
+        self.loaded = False
+        self.adds = 0
+        self.evicted = 0
+        self.searches = 0
+        self.cut_by_budget = 0
+        self.reindex_sec = 0.0
+        self._lat = deque(maxlen=512)
+
+    @staticmethod
+    def _empty(cap: int = 0) -> _Index:
+        return _Index(np.zeros((cap, DIM), np.int8), np.zeros(cap, np.float32), np.zeros(cap, np.int64),
+                      0, 0, None, None)
+
+    # ----- запись -----
+    def load(self) -> int:
+        """Прочитать векторы с диска (старше max_items — удалить). Вызывать в фоне."""
+        with self._wlock:
+            return self._load()
+
+    def _load(self) -> int:
+        if self.loaded:
+            return self._ix.n
+        with self._dblock:
+            if self.max_items > 0:
+                self._db.execute("DELETE FROM memories WHERE id <= (SELECT id FROM memories "
+                                 "ORDER BY id DESC LIMIT 1 OFFSET ?)", (self.max_items,))
+                self._db.commit()
+            n = self._db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+            ix = self._empty(max(n, 1024))
+            i = 0
+            cur = self._db.execute("SELECT id, vec FROM memories ORDER BY id")
+            while True:
+                rows = cur.fetchmany(65536)
+                if not rows:
+                    break
+                raw = np.frombuffer(b"".join(r[1] for r in rows), np.uint8).reshape(len(rows), DIM + 4)
+                j = i + len(rows)
+                ix.vecs[i:j] = raw[:, :DIM].view(np.int8); ix.scale[i:j] = raw[:, DIM:].copy().view(np.float32)[:, 0]
+                ix.ids[i:j] = [r[0] for r in rows]; i = j
+            self._next_id = int(ix.ids[i - 1]) + 1 if i else 1
+        self._publish(ix._replace(n=i))
+        self._maybe_reindex()
+        self.loaded = True
+        return i
+
+    def add(self, kind: str, text: str) -> Optional[int]:
+        ids = self.add_many([(kind, text)])
+        return ids[0] if ids else None
+
+    def add_many(self, items: Iterable[Tuple[str, str]], created: Optional[float] = None) -> List[int]:
+        items = [(k, " ".join((t or "").split())[:TEXT_MAX]) for k, t in items]
+        items = [(k, t) for k, t in items if t]
+        if not items:
+            return []
+        vec, scale = quantize(embed_many([t for _, t in items]))
+        now = time.time() if created is None else float(created)
+        with self._wlock:
+            self._load()                          # add до load() — сначала прочитать диск
+            ids = list(range(self._next_id, self._next_id + len(items)))
+            self._next_id += len(items)
+            with self._dblock:
+                self._db.executemany("INSERT INTO memories(id, kind, text, created, session, vec) VALUES (?,?,?,?,?,?)",
+                                     [(i, k, t, now, self.session, v.tobytes() + sc.tobytes())
+                                      for i, (k, t), v, sc in zip(ids, items, vec, scale)])
+                self._db.commit()
+            ix = self._ix
+            a, b = ix.n, ix.n + len(ids)
+            if b > len(ix.vecs):                  # запас вдвое; читатели держат старые массивы
+                new = self._empty(max(1024, 2 * b))
+                new.vecs[:a] = ix.vecs[:a]; new.scale[:a] = ix.scale[:a]; new.ids[:a] = ix.ids[:a]
+                ix = new._replace(indexed=ix.indexed, cent=ix.cent, bounds=ix.bounds)
+            ix.vecs[a:b] = vec; ix.scale[a:b] = scale; ix.ids[a:b] = ids
+            self._publish(ix._replace(n=b))
+            self.adds += len(ids)
+            self._evict()
+            self._maybe_reindex()
+        return ids
+
+    def _evict(self) -> None:
+        """Сверх max_items — удалить самые старые (с запасом 1/64, чтобы не чистить на каждой записи)."""
+        ix = self._ix
+        if self.max_items <= 0 or ix.n <= self.max_items:
+            return
+        drop = ix.n - (self.max_items - self.max_items // 64)
+        cut = int(np.partition(ix.ids[:ix.n], drop - 1)[drop - 1])   # id растут: старые — меньшие
+        with self._dblock:
+            self._db.execute("DELETE FROM memories WHERE id <= ?", (cut,))
+            self._db.commit()
+        keep = ix.ids[:ix.n] > cut
+        new = self._empty(len(ix.vecs))
+        m = int(keep.sum())
+        new.vecs[:m] = ix.vecs[:ix.n][keep]; new.scale[:m] = ix.scale[:ix.n][keep]; new.ids[:m] = ix.ids[:ix.n][keep]
+        # порядок строк сохранён: границы списков — по числу оставшихся до них
+        kept = np.concatenate([[0], np.cumsum(keep[:ix.indexed])])
+        bounds = None if ix.bounds is None else kept[ix.bounds]
+        self._publish(new._replace(n=m, indexed=int(kept[-1]), cent=ix.cent, bounds=bounds))
+        self.evicted += ix.n - m
+
+    def _publish(self, ix: _Index) -> None:
+        with self._lock:
+            self._ix = ix
+
+    def _maybe_reindex(self) -> None:
+        ix = self._ix
+        if ix.n < IVF_MIN or ix.n - ix.indexed < max(4096, ix.indexed // 16):
+            return
+        t0 = time.perf_counter()
+        vecs = ix.vecs[:ix.n]
+        if ix.cent is None or ix.n >= 4 * self._trained_at:
+            cent = _kmeans(vecs, min(MAX_LISTS, int(np.sqrt(ix.n))))
+            lab = _assign(vecs, cent)
+            self._trained_at = ix.n
+        else:
+            cent = ix.cent
+            old = np.repeat(np.arange(len(cent), dtype=np.int32), np.diff(ix.bounds))
+            lab = np.concatenate([old, _assign(vecs[ix.indexed:], cent)])
+        order = np.argsort(lab, kind="stable")
+        new = self._empty(len(ix.vecs))
+        new.vecs[:ix.n] = vecs[order]; new.scale[:ix.n] = ix.scale[:ix.n][order]; new.ids[:ix.n] = ix.ids[:ix.n][order]
+        bounds = np.searchsorted(lab[order], np.arange(len(cent) + 1))
+        self._publish(new._replace(n=ix.n, indexed=ix.n, cent=cent, bounds=bounds))
+        self.reindex_sec += time.perf_counter() - t0
+
+    # ----- поиск -----
+    def search(self, text: str, k: int = 3, budget_ms: float = 20.0, min_score: float = 0.0,
+               skip: Optional[Callable[[Hit], bool]] = None, nprobe: Optional[int] = None) -> List[Hit]:
+        """
+        k ближайших записей. Сначала хвост (свежие, перебором), затем ближайшие
+        списки IVF по одному, пока не кончится budget_ms (хотя бы один список).
+        skip — отбросить запись (например, реплики, ещё живые в истории).
+        """
+        t0 = time.perf_counter()
+        deadline = t0 + budget_ms / 1000.0
+        with self._lock:
+            ix = self._ix
+        if not ix.n or not (text or "").strip():
+            return []
+        q = embed(text)
+        want = max(k * 4, 16)                       # с запасом под skip / min_score
+        rows: List[np.ndarray] = []; scores: List[np.ndarray] = []
+        cut = False
+
+        def scan(a: int, b: int):
+            s = (ix.vecs[a:b].astype(np.float32) @ q) * ix.scale[a:b]
+            if len(s) > want:
+                top = np.argpartition(-s, want)[:want]
+                s = s[top]; r = top + a
+            else:
+                r = np.arange(a, b)
+            rows.append(r); scores.append(s)
+
+        step = 16384
+        hi = ix.n
+        while hi > ix.indexed:                      # хвост, с новых
+            lo = max(ix.indexed, hi - step)
+            scan(lo, hi); hi = lo
+            if time.perf_counter() > deadline and hi > ix.indexed:
+                cut = True; break
+        if ix.cent is not None and not cut:
+            nprobe = nprobe or max(NPROBE, int(len(ix.cent) * PROBE_SHARE))
+            order = np.argsort(-(ix.cent @ q))[:max(1, nprobe)]
+            for j, c in enumerate(order):
+                if j and time.perf_counter() > deadline:
+                    cut = True; break
+                if ix.bounds[c + 1] > ix.bounds[c]:
+                    scan(int(ix.bounds[c]), int(ix.bounds[c + 1]))
+        if not rows:
+            return []
+        r = np.concatenate(rows); s = np.concatenate(scores)
+        best = np.argsort(-s)[:want]
+        cand = [(int(ix.ids[r[i]]), float(s[i])) for i in best if s[i] >= min_score]
+        hits = self._fetch(cand)
+        if skip is not None:
+            hits = [h for h in hits if not skip(h)]
+        dt = time.perf_counter() - t0
+        with self._lock:
+            self.searches += 1; self.cut_by_budget += cut
+            self._lat.append(dt)
+        return hits[:k]
+
+    def _fetch(self, cand: List[Tuple[int, float]]) -> List[Hit]:
+        if not cand:
+            return []
+        score = dict(cand)
+        with self._dblock:
+            got = self._db.execute(f"SELECT id, kind, text, created, session FROM memories WHERE id IN "
+                                   f"({','.join('?' * len(cand))})", [i for i, _ in cand]).fetchall()
+        hits = [Hit(i, kind, text, score[i], created, session) for i, kind, text, created, session in got]
+        hits.sort(key=lambda h: -h.score)
+        return hits
+
+    # ----- прочее -----
+    def clear(self) -> None:
+        with self._wlock:
+            with self._dblock:
+                self._db.execute("DELETE FROM memories"); self._db.commit()
+            self._publish(self._empty())
+            self._trained_at = 0
+
+    def close(self) -> None:
+        with self._dblock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            ix = self._ix
+            lat = sorted(self._lat)
+            return {"items": ix.n, "indexed": ix.indexed, "lists": 0 if ix.cent is None else len(ix.cent),
+                    "adds": self.adds, "evicted": self.evicted, "searches": self.searches, "cut_by_budget": self.cut_by_budget,
+                    "p50_ms": lat[len(lat) // 2] * 1000 if lat else 0.0,
+                    "p95_ms": lat[int(len(lat) * 0.95)] * 1000 if lat else 0.0,
+                    "reindex_sec": self.reindex_sec}
+
+def format_hits(hits: List[Hit], limit: int = 300) -> str:
+    names = {"turn": "разговор", "screen": "экран", "ocr": "текст с экрана"}
+    lines = [f"- [{names.get(h.kind, h.kind)}, {time.strftime('%d.%m %H:%M', time.localtime(h.created))}] "
+             f"{h.text[:limit]}" for h in hits]
+    return PREFIX + "\n" + "\n".join(lines)
+
+_MEM: Optional[Memory] = None
+_MEM_LOCK = threading.Lock()
+
+def memory() -> Optional[Memory]:
+    """Общая память процесса по настройкам (None, если memory выключена)."""
+    global _MEM
+    with _MEM_LOCK:
+        if _MEM is None:
+            try:
+                from ..ui import user_prefs
+                prefs = user_prefs.load()
+                if not prefs.get("memory", False):
+                    return None
+                _MEM = Memory(user_prefs.data_dir() / "memory.sqlite",
+                              max_items=int(prefs.get("memory_max_items", 200_000)))
+            except Exception as e:
+                print("Memory unavailable:", e)
+                return None
+        return _MEM
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+OCR-движки Tesseract с подготовкой кадра в NumPy.
+  tesserocr — API Tesseract в процессе: языки грузятся один раз на ocr_lang,
+              хэндлы (до POOL штук) живут между вызовами;
+  cli       — tesseract.exe, кадр подаётся в stdin как PGM (без PIL и временных
+              файлов). Процесс на вызов — держать CLI резидентным нельзя.
+Подготовка: серый, инверсия светлого текста на тёмном фоне, порог Оцу, увеличение.
+По умолчанию только серый и инверсия: на экранном шрифте LSTM Tesseract по серому
+кадру без увеличения не хуже и быстрее (bench/bench_ocr_engine.py).
+Крупные кадры (4K, несколько мониторов) режутся на плитки по пустым строкам и
+столбцам и распознаются в пуле процессов, по тёплому движку в каждом.
+"""
+import os, queue, shutil, subprocess, threading, time
+import multiprocessing as mp
+import concurrent.futures as cf
+from typing import Optional, List, Tuple
+import numpy as np
+
+ENGINES = ("tesserocr", "cli")
+POOL = 2               # хэндлов tesserocr (= лимит "ocr" в service.LIMITS)
+BASE_DPI = 96
+WIN_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+INK_DIFF = 28          # перепад яркости соседних пикселей, который считается «чернилами»
+COL_GAP = 48           # столько пустых столбцов подряд — граница колонок (панели, мониторы)
+LINE_GAP = 3           # строки текста с меньшим просветом — одна строка
+BLANK_SKIP = 64        # пустые полосы выше этого не распознаются (новая плитка)
+PAD = 4
+TILE_H = 360           # строки склеиваются в плитку до этой высоты; выше — режутся с перекрытием
+OVERLAP = 32
+TILE_MIN_PX = 2_500_000   # кадры крупнее идут плитками (1080p — ещё нет)
+
+def tess_lang(lang: str = "auto") -> str:
+    if not lang or lang == "auto":
+        return os.getenv("TESSERACT_LANG", "eng+rus")
+    return lang
+
+def tesseract_cmd() -> Optional[str]:
+    for c in (os.getenv("TESSERACT_PATH", ""), shutil.which("tesseract"), WIN_TESSERACT):
+        if c and os.path.isfile(c):
+            return c
+    return None
+
+# ----- подготовка кадра -----
+def otsu(gray: np.ndarray) -> int:
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    w0 = np.cumsum(hist); w1 = w0[-1] - w0
+    m = np.cumsum(hist * np.arange(256))
+    mu0 = m / np.maximum(w0, 1); mu1 = (m[-1] - m) / np.maximum(w1, 1)
+    return int(np.argmax(w0 * w1 * (mu0 - mu1) ** 2))
+
+def preprocess(rgb: np.ndarray, scale: int = 1, binarize: bool = False) -> np.ndarray:
+    """(h, w, 3) или (h, w) uint8 -> (h*scale, w*scale) uint8: тёмный текст на белом."""
+    if rgb.ndim == 3:
+        # яркость в целых (77, 150, 29)/256 — втрое быстрее float-версии
+        g = rgb[..., 0].astype(np.uint16); g *= 77
+        t = rgb[..., 1].astype(np.uint16); t *= 150; g += t
+        t = rgb[..., 2].astype(np.uint16); t *= 29; g += t
+        g >>= 8
+        g = g.astype(np.uint8)
+    else:
+        g = np.ascontiguousarray(rgb, np.uint8)
+    if binarize:
+        fg = g > otsu(g)
+        if fg.mean() < 0.5:
+            fg = ~fg       # светлого меньше — это текст на тёмной теме
+        g = fg.astype(np.uint8) * 255
+    elif g.mean() < 128:
+        g = 255 - g
+    if scale > 1:
+        g = np.repeat(np.repeat(g, scale, axis=0), scale, axis=1)
+    return np.ascontiguousarray(g)
+
+# ----- плитки -----
+def _runs(mask: np.ndarray, gap: int) -> List[Tuple[int, int]]:
+    """Отрезки True [a, b), слитые через просветы не длиннее gap."""
+    idx = np.flatnonzero(mask)
+    if not idx.size:
+        return []
+    br = np.flatnonzero(np.diff(idx) > gap + 1)
+    starts = np.r_[idx[0], idx[br + 1]]
+    ends = np.r_[idx[br], idx[-1]] + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def plan_tiles(gray: np.ndarray, tile_h: int = TILE_H, overlap: int = OVERLAP) -> List[Tuple[int, int, int, int]]:
+    """
+    Плитки (y0, y1, x0, x1) в порядке чтения: колонки слева направо, в колонке — сверху вниз.
+    Режутся по пустым строкам; пустые места не попадают никуда. Только строка выше
+    tile_h (картинка, крупный шрифт) режется внахлёст на overlap.
+    """
+    h, w = gray.shape
+    ink = np.abs(np.diff(gray.astype(np.int16), axis=1)) > INK_DIFF
+    ink[:, ink.mean(axis=0) > 0.5] = False   # вертикальные линии: рамки, стык мониторов
+    out = []
+    for x0, x1 in _runs(ink.any(axis=0), COL_GAP):
+        x0 = max(0, x0 - PAD); x1 = min(w, x1 + 1 + PAD)
+        cur = None
+        for y0, y1 in _runs(ink[:, x0:x1 - 1].any(axis=1), LINE_GAP):
+            y0 = max(0, y0 - PAD); y1 = min(h, y1 + PAD)
+            if cur is not None and y0 - cur[1] <= BLANK_SKIP and y1 - cur[0] <= tile_h:
+                cur[1] = y1
+                continue
+            if cur is not None:
+                out += _cut(cur[0], cur[1], x0, x1, tile_h, overlap)
+            cur = [max(y0, cur[1]) if cur is not None else y0, y1]
+        if cur is not None:
+            out += _cut(cur[0], cur[1], x0, x1, tile_h, overlap)
+    return out
+
+def _cut(y0: int, y1: int, x0: int, x1: int, tile_h: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    if y1 - y0 <= tile_h:
+        return [(y0, y1, x0, x1)]
+    step = tile_h - overlap
+    return [(y, min(y + tile_h, y1), x0, x1) for y in range(y0, y1 - overlap, step)]
+
+def _merge(texts: List[str]) -> str:
+    """Тексты плиток по порядку; строка, попавшая в обе плитки на стыке, — один раз."""
+    lines: List[str] = []
+    for t in texts:
+        cur = [" ".join(l.split()) for l in (t or "").splitlines()]
+        cur = [l for l in cur if l]
+        if lines and cur and cur[0] == lines[-1]:
+            cur = cur[1:]
+        lines += cur
+    return " ".join(lines)
+
+# ----- движки -----
+class OcrEngine:
+    name = "none"
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.load_sec = 0.0
+        self.calls = 0
+        self.busy_sec = 0.0
+
+    def recognize(self, gray: np.ndarray, dpi: int = BASE_DPI) -> str:
+        t0 = time.perf_counter()
+        try:
+            return self._recognize(gray, dpi)
+        finally:
+            self.calls += 1
+            self.busy_sec += time.perf_counter() - t0
+
+    def _recognize(self, gray: np.ndarray, dpi: int) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"engine": self.name, "lang": self.lang, "load_ms": self.load_sec * 1000, "calls": self.calls,
+                "mean_ms": self.busy_sec * 1000 / self.calls if self.calls else 0.0}
+
+class TesserocrEngine(OcrEngine):
+    name = "tesserocr"
+    def __init__(self, lang: str, size: int = POOL):
+        super().__init__(lang)
+        import tesserocr
+        self._mod = tesserocr
+        cmd = os.getenv("TESSERACT_PATH", "")
+        self._path = os.path.join(os.path.dirname(cmd), "tessdata") if cmd else None
+        self._free: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = max(1, int(size))
+        self._made = 0
+        t0 = time.perf_counter()
+        self._free.put(self._new())    # языки грузятся сейчас, а не на первом Ctrl+4
+        self.load_sec = time.perf_counter() - t0
+
+    def _new(self):
+        kw = {"lang": self.lang}
+        if self._path and os.path.isdir(self._path):
+            kw["path"] = self._path
+        api = self._mod.PyTessBaseAPI(**kw)
+        self._made += 1
+        return api
+
+    def _take(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._made < self._size:
+                return self._new()
+        return self._free.get()
+
+    def _recognize(self, gray: np.ndarray, dpi: int) -> str:
+        api = self._take()
+        try:
+            h, w = gray.shape
+            api.SetImageBytes(gray.tobytes(), w, h, 1, w)
+            api.SetSourceResolution(dpi)
+            return api.GetUTF8Text() or ""
+        finally:
+            self._free.put(api)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._free.get_nowait().End()
+            except queue.Empty:
+                break
+            except Exception:
+                pass
+
+class CliEngine(OcrEngine):
+    name = "cli"
+    def __init__(self, lang: str, cmd: Optional[str] = None):
+        super().__init__(lang)
+        self.cmd = cmd or tesseract_cmd()
+        if not self.cmd:
+            raise RuntimeError("tesseract не найден (TESSERACT_PATH)")
+
+    def _recognize(self, gray: np.ndarray, dpi: int) -> str:
+        h, w = gray.shape
+        pgm = b"P5\n%d %d\n255\n" % (w, h) + gray.tobytes()
+        flags = 0x08000000 if os.name == "nt" else 0   # CREATE_NO_WINDOW
+        out = subprocess.run([self.cmd, "stdin", "stdout", "-l", self.lang, "--dpi", str(dpi)],
+                             input=pgm, capture_output=True, timeout=60, creationflags=flags)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.decode("utf-8", "ignore").strip()[:200])
+        return out.stdout.decode("utf-8", "ignore")
+
+def create(kind: str, lang: str) -> OcrEngine:
+    if kind == "tesserocr":
+        return TesserocrEngine(lang)
+    if kind == "cli":
+        return CliEngine(lang)
+    raise ValueError(f"неизвестный OCR-движок: {kind}")
+
+# ----- общий движок процесса -----
+_ENGINE: Optional[OcrEngine] = None
+_ENGINE_KEY = None
+_ENGINE_LOCK = threading.Lock()
+
+def _prefs() -> dict:
+    try:
+        from ..ui import user_prefs
+        return user_prefs.load()
+    except Exception:
+        return {}
+
+def engine(lang: str = "auto", kind: Optional[str] = None) -> Optional[OcrEngine]:
+    """Тёплый движок для языка (пересоздаётся при смене ocr_lang / ocr_engine). None — OCR нет."""
+    global _ENGINE, _ENGINE_KEY
+    kind = kind or str(_prefs().get("ocr_engine", "auto"))
+    key = (kind, tess_lang(lang))
+    with _ENGINE_LOCK:
+        if _ENGINE_KEY == key:
+            return _ENGINE   # в том числе None: не искать tesseract на каждом вызове
+        if _ENGINE is not None:
+            _ENGINE.close()
+        _ENGINE = None; _ENGINE_KEY = key
+        for k in (ENGINES if kind == "auto" else (kind,)):
+            try:
+                _ENGINE = create(k, key[1])
+                break
+            except Exception as e:
+                print(f"OCR {k} unavailable:", e)
+        return _ENGINE
+
+def warm(lang: str = "auto") -> None:
+    """Загрузить языки заранее (в фоне при старте)."""
+    engine(lang)
+
+def recognize(rgb: np.ndarray, lang: str = "auto") -> str:
+    if rgb.shape[0] * rgb.shape[1] >= TILE_MIN_PX:
+        return recognize_many([rgb], lang)[0]
+    p = _prefs()
+    eng = engine(lang, str(p.get("ocr_engine", "auto")))
+    if eng is None:
+        return ""
+    scale = max(1, int(p.get("ocr_scale", 1)))
+    gray = preprocess(rgb, scale=scale, binarize=bool(p.get("ocr_binarize", False)))
+    return " ".join(eng.recognize(gray, dpi=BASE_DPI * scale).split())
+
+def recognize_many(imgs: List[np.ndarray], lang: str = "auto", workers: Optional[int] = None) -> List[str]:
+    """Несколько кадров/полос разом: все плитки всех кадров — в пул процессов."""
+    p = _prefs()
+    eng = engine(lang, str(p.get("ocr_engine", "auto")))
+    if eng is None:
+        return [""] * len(imgs)
+    scale = max(1, int(p.get("ocr_scale", 1)))
+    dpi = BASE_DPI * scale
+    jobs, owner = [], []
+    for i, img in enumerate(imgs):
+        gray = preprocess(img, scale=scale, binarize=bool(p.get("ocr_binarize", False)))
+        for y0, y1, x0, x1 in plan_tiles(gray, TILE_H * scale, OVERLAP * scale):
+            t = np.ascontiguousarray(gray[y0:y1, x0:x1])
+            if t.mean() < 128:
+                t = 255 - t   # тёмная тема на одном из мониторов
+            jobs.append(t); owner.append(i)
+    n = workers if workers is not None else default_workers(p)
+    if n > 1 and len(jobs) > 1:
+        texts = list(pool(n, eng.name, eng.lang).map(_worker_ocr, jobs, [dpi] * len(jobs), timeout=60))
+    else:
+        texts = [eng.recognize(g, dpi) for g in jobs]
+    per = [[] for _ in imgs]
+    for i, t in zip(owner, texts):
+        per[i].append(t)
+    return [_merge(t) for t in per]
+
+# ----- пул процессов: в каждом свой тёплый движок -----
+_W_ENGINE: Optional[OcrEngine] = None
+_POOL: Optional[cf.ProcessPoolExecutor] = None
+_POOL_KEY = None
+
+def default_workers(prefs: Optional[dict] = None) -> int:
+    n = int((prefs or {}).get("ocr_workers", 0))
+    if n > 0:
+        return n
+    return max(1, min(4, (os.cpu_count() or 1) - 1))   # одно ядро — GUI и звуку
+
+def _worker_init(kind: str, lang: str) -> None:
+    global _W_ENGINE
+    try:
+        _W_ENGINE = create(kind, lang)
+    except Exception as e:
+        print(f"OCR worker: {kind} unavailable:", e)
+
+def _worker_ocr(gray: np.ndarray, dpi: int) -> str:
+    return _W_ENGINE.recognize(gray, dpi) if _W_ENGINE is not None else ""
+
+def pool(workers: int, kind: str, lang: str) -> cf.ProcessPoolExecutor:
+    global _POOL, _POOL_KEY
+    key = (int(workers), kind, lang)
+    with _ENGINE_LOCK:
+        if _POOL is None or _POOL_KEY != key:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            # spawn и на Linux: fork процесса с живыми потоками (сервис, Qt) небезопасен
+            _POOL = cf.ProcessPoolExecutor(max_workers=key[0], mp_context=mp.get_context("spawn"),
+                                           initializer=_worker_init, initargs=(kind, lang))
+            _POOL_KEY = key
+        return _POOL
+
+def stats() -> dict:
+    return _ENGINE.stats() if _ENGINE is not None else {}
+
+def close() -> None:
+    global _ENGINE, _ENGINE_KEY, _POOL, _POOL_KEY
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.close()
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _ENGINE = None; _ENGINE_KEY = None; _POOL = None; _POOL_KEY = None
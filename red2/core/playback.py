@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Воспроизведение в процессе: MP3/WAV/OGG декодируются в PCM (soundfile),
+дальше — кольцевой буфер и callback-поток sounddevice. Поддерживает
+мгновенный stop (с коротким затуханием), ducking, кроссфейд и позицию
+воспроизведения для UI.
+Без аудиоустройства (headless Linux, RED_AUDIO_NULL=1) работает через
+NullOutputStream, который дёргает тот же callback в реальном времени.
+"""
+import io, os, threading, time
+from typing import Optional, Union
+import numpy as np
+
+class NullOutputStream:
+    """Псевдо-устройство вывода: вызывает callback блоками с темпом реального времени."""
+    def __init__(self, samplerate: int, channels: int, blocksize: int, callback, realtime: bool = True):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self.realtime = realtime
+        self.active = False
+        self._th = None
+
+    def start(self):
+        self.active = True
+        self._th = threading.Thread(target=self._loop, daemon=True)
+        self._th.start()
+
+    def _loop(self):
+        buf = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        period = self.blocksize / float(self.samplerate)
+        t_next = time.perf_counter()
+        while self.active:
+            self.callback(buf, self.blocksize, None, None)
+            if self.realtime:
+                t_next += period
+                delay = t_next - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    t_next = time.perf_counter()
+
+    def stop(self):
+        self.active = False
+        if self._th:
+            self._th.join(1.0)
+
+    def close(self):
+        self.stop()
+
+def decode(data: bytes) -> tuple:
+    """bytes (MP3/WAV/OGG/FLAC) -> (float32 PCM (frames, ch), samplerate)."""
+    import soundfile as sf
+    pcm, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    return pcm, sr
+
+def _resample(pcm: np.ndarray, src: int, dst: int) -> np.ndarray:
+    if src == dst or len(pcm) == 0:
+        return pcm
+    n = int(round(len(pcm) * dst / float(src)))
+    x_old = np.arange(len(pcm), dtype=np.float64)
+    x_new = np.linspace(0, len(pcm) - 1, n)
+    return np.stack([np.interp(x_new, x_old, pcm[:, c]) for c in range(pcm.shape[1])], axis=1).astype(np.float32)
+
+class PlaybackEngine:
+    """
+    Один долгоживущий поток вывода. play() блокирует вызывающий поток до
+    конца фрагмента (или отмены), callback только копирует из кольца.
+    Счётчики _wr/_rd — абсолютные номера кадров.
+    """
+    def __init__(self, samplerate: int = 24000, channels: int = 1, blocksize: int = 480,
+                 ring_sec: float = 10.0, device=None, null: Optional[bool] = None):
+        self.samplerate = int(samplerate)
+        self.channels = int(channels)
+        self.blocksize = int(blocksize)
+        self.device = device
+        self.null = (os.getenv("RED_AUDIO_NULL", "0") == "1") if null is None else bool(null)
+        self._cap = int(self.samplerate * ring_sec)
+        self._ring = np.zeros((self._cap, self.channels), dtype=np.float32)
+        self._wr = 0
+        self._rd = 0
+        self._cond = threading.Condition()
+        self._gain = 1.0
+        self._target_gain = 1.0
+        self._gain_step = 1.0
+        self._item_start = 0
+        self._item_end = 0
+        self._stream = None
+        self._level = 0.0
+        # счётчики для замеров
+        self.blocks = 0
+        self.underruns = 0
+        self.callback_sec = 0.0
+        self.first_output_t: Optional[float] = None
+
+    # ---- поток вывода ----
+    def _ensure_stream(self) -> None:
+        if self._stream is not None:
+            return
+        if not self.null:
+            try:
+                import sounddevice as sd
+                self._stream = sd.OutputStream(samplerate=self.samplerate, channels=self.channels,
+                                               dtype="float32", blocksize=self.blocksize,
+                                               device=self.device, callback=self._callback)
+                self._stream.start()
+                return
+            except Exception as e:
+                print("Audio output unavailable, using null device:", e)
+        self._stream = NullOutputStream(self.samplerate, self.channels, self.blocksize, self._callback)
+        self._stream.start()
+
+    def _callback(self, outdata, frames, time_info, status):
+        t0 = time.perf_counter()
+        with self._cond:
+            n = min(frames, self._wr - self._rd)
+            if n:
+                i = self._rd % self._cap
+                k = min(n, self._cap - i)
+                outdata[:k] = self._ring[i:i + k]
+                if k < n:
+                    outdata[k:n] = self._ring[:n - k]
+                if self.first_output_t is None:
+                    self.first_output_t = t0
+                if n < frames and self._rd + n < self._item_end:
+                    self.underruns += 1
+                self._rd += n
+                self._cond.notify_all()
+        outdata[n:] = 0
+        if n:
+            # ducking: линейная рампа усиления по блоку
+            g0 = self._gain
+            if g0 != self._target_gain:
+                d = self._target_gain - g0
+                g1 = g0 + max(-self._gain_step * frames, min(self._gain_step * frames, d))
+                outdata[:n] *= np.linspace(g0, g1, n, dtype=np.float32)[:, None]
+                self._gain = g1
+            elif g0 != 1.0:
+                outdata[:n] *= g0
+            self._level = float(np.sqrt(np.mean(np.square(outdata[:n]))))
+        else:
+            self._level = 0.0
+        self.blocks += 1
+        self.callback_sec += time.perf_counter() - t0
+
+    # ---- запись в кольцо ----
+    def _write(self, pcm: np.ndarray, cancel: Optional[threading.Event]) -> bool:
+        pos = 0
+        while pos < len(pcm):
+            with self._cond:
+                free = self._cap - (self._wr - self._rd)
+                if free == 0:
+                    self._cond.wait(0.05)
+                    if cancel is not None and cancel.is_set():
+                        return False
+                    continue
+                n = min(free, len(pcm) - pos)
+                i = self._wr % self._cap
+                k = min(n, self._cap - i)
+                self._ring[i:i + k] = pcm[pos:pos + k]
+                if k < n:
+                    self._ring[:n - k] = pcm[pos + k:pos + n]
+                self._wr += n
+                pos += n
+        return True
+
+    def _prepare(self, data: Union[bytes, np.ndarray], samplerate: Optional[int] = None) -> np.ndarray:
+        if isinstance(data, (bytes, bytearray)):
+            pcm, sr = decode(bytes(data))
+        else:
+            pcm = np.asarray(data)
+            if pcm.dtype.kind in "iu":
+                pcm = pcm.astype(np.float32) / 32768.0
+            else:
+                pcm = pcm.astype(np.float32, copy=False)
+            sr = samplerate or self.samplerate
+        if pcm.ndim == 1:
+            pcm = pcm[:, None]
+        pcm = _resample(pcm, sr, self.samplerate)
+        if pcm.shape[1] != self.channels:
+            pcm = np.repeat(pcm.mean(axis=1, keepdims=True), self.channels, axis=1)
+        return np.ascontiguousarray(pcm, dtype=np.float32)
+
+    # ---- публичное API ----
+    def play(self, data: Union[bytes, np.ndarray], cancel: Optional[threading.Event] = None,
+             samplerate: Optional[int] = None, crossfade_ms: int = 0) -> bool:
+        """
+        Проиграть фрагмент (bytes в любом формате soundfile или PCM-массив),
+        блокируясь до конца. False — если прервано через cancel/stop().
+        crossfade_ms > 0: если что-то ещё звучит, плавно заменить его новым.
+        """
+        pcm = self._prepare(data, samplerate)
+        if len(pcm) == 0:
+            return True
+        self._ensure_stream()
+        with self._cond:
+            pending = self._wr - self._rd
+            if crossfade_ms and pending > 0:
+                k = min(pending, len(pcm), int(self.samplerate * crossfade_ms / 1000), self._cap)
+                old = self._peek(k)
+                ramp = np.linspace(0.0, 1.0, k, dtype=np.float32)[:, None]
+                pcm = pcm.copy()
+                pcm[:k] = pcm[:k] * ramp + old * (1.0 - ramp)
+                self._wr = self._rd        # остаток старого звука выбрасываем
+            self._item_start = self._wr
+            self._item_end = self._wr + len(pcm)
+            end = self._item_end
+        if not self._write(pcm, cancel):
+            self.stop()
+            return False
+        with self._cond:
+            while self._rd < end:
+                if cancel is not None and cancel.is_set():
+                    break
+                if self._wr < end:        # stop() из другого потока сбросил кольцо
+                    return False
+                self._cond.wait(0.02)
+        if cancel is not None and cancel.is_set():
+            self.stop()
+            return False
+        return True
+
+    def _peek(self, k: int) -> np.ndarray:
+        i = self._rd % self._cap
+        if i + k <= self._cap:
+            return self._ring[i:i + k].copy()
+        return np.concatenate((self._ring[i:], self._ring[:k - (self._cap - i)]))
+
+    def stop(self, fade_ms: int = 8) -> None:
+        """Остановить сразу: доигрывается только короткое затухание (без щелчка)."""
+        with self._cond:
+            pending = self._wr - self._rd
+            k = min(pending, int(self.samplerate * fade_ms / 1000))
+            if k:
+                tail = self._peek(k) * np.linspace(1.0, 0.0, k, dtype=np.float32)[:, None]
+                self._ring[(self._rd + np.arange(k)) % self._cap] = tail
+            self._wr = self._rd + k
+            self._item_end = min(self._item_end, self._wr)
+            self._cond.notify_all()
+
+    def duck(self, gain: float = 0.25, ramp_ms: int = 150) -> None:
+        self._target_gain = float(max(0.0, min(1.0, gain)))
+        self._gain_step = abs(self._target_gain - self._gain) / max(1.0, self.samplerate * ramp_ms / 1000.0) or 1.0
+
+    def unduck(self, ramp_ms: int = 250) -> None:
+        self.duck(1.0, ramp_ms)
+
+    @property
+    def playing(self) -> bool:
+        return self._wr > self._rd
+
+    def position(self) -> float:
+        """Секунды, проигранные в текущем фрагменте (для синхронизации UI)."""
+        with self._cond:
+            done = min(self._rd, self._item_end) - self._item_start
+        return max(0.0, done / float(self.samplerate))
+
+    def level(self) -> float:
+        """RMS последнего выведенного блока, 0..1."""
+        return max(0.0, min(1.0, self._level))
+
+    def close(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.stop(); self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+_ENGINE: Optional[PlaybackEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+def engine() -> PlaybackEngine:
+    """Общий движок процесса (создаётся при первом обращении)."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = PlaybackEngine()
+        return _ENGINE
+
+def current() -> Optional[PlaybackEngine]:
+    """Движок, если он уже создан (не открывает устройство зря)."""
+    return _ENGINE
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Планировщик запросов к LLM вместо «занято — выбросить»:
+  - очередь с приоритетами: голос > набранный текст > vision;
+  - supersede: новый запрос (не ниже по приоритету) отменяет выполняющийся;
+  - coalesce: одинаковый текст, уже стоящий в очереди или только что запущенный, не дублируется.
+Без Qt: start(req) запускает работу, владелец зовёт done(req) по её окончании.
+"""
+import heapq, itertools, threading, time
+from typing import Callable, Optional, List, Any, Dict
+
+# "vision" — для вопросов по снимку экрана; само описание экрана (VisionWorker) идёт мимо очереди
+PRIORITY: Dict[str, int] = {"voice": 0, "typed": 1, "vision": 2}
+POLICIES = ("queue", "supersede")
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+class Request:
+    __slots__ = ("id", "kind", "text", "payload", "prio", "status", "t_submit", "t_start", "t_done", "key")
+    def __init__(self, rid: int, kind: str, text: str, payload: Any = None):
+        self.id = rid
+        self.kind = kind
+        self.text = text
+        self.payload = payload
+        self.prio = PRIORITY.get(kind, max(PRIORITY.values()) + 1)
+        self.status = "queued"    # queued | running | done | superseded | dropped
+        self.t_submit = time.monotonic()
+        self.t_start: Optional[float] = None
+        self.t_done: Optional[float] = None
+        self.key = _norm(text)
+
+    def __repr__(self) -> str:
+        return f"Request({self.id}, {self.kind}, {self.status}, {self.text[:24]!r})"
+
+class RequestScheduler:
+    def __init__(self, start: Callable[[Request], None], cancel: Optional[Callable[[Request], None]] = None,
+                 policy: str = "queue", coalesce_sec: float = 1.2, max_queue: int = 16):
+        self._start = start
+        self._cancel = cancel
+        self.policy = policy if policy in POLICIES else "queue"
+        self.coalesce_sec = float(coalesce_sec)
+        self.max_queue = int(max_queue)
+        self._lock = threading.RLock()
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self.current: Optional[Request] = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.dropped = 0
+        self.started = 0
+        self.completed = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None
+
+    def pending(self) -> List[Request]:
+        with self._lock:
+            return [r for _, _, r in sorted(self._heap)]
+
+    def submit(self, kind: str, text: str, payload: Any = None,
+               supersede: Optional[bool] = None) -> Optional[Request]:
+        """Поставить запрос. None — слит с таким же (уже в очереди или только что запущен)."""
+        victim = None
+        with self._lock:
+            now = time.monotonic()
+            key = _norm(text)
+            for _, _, r in self._heap:
+                if r.key == key:
+                    self.coalesced += 1
+                    return None
+            cur = self.current
+            if cur is not None and cur.key == key and now - cur.t_submit < self.coalesce_sec:
+                self.coalesced += 1
+                return None
+            req = Request(next(self._ids), kind, text, payload)
+            self.submitted += 1
+            sup = (self.policy == "supersede") if supersede is None else supersede
+            if cur is not None and sup and req.prio <= cur.prio:
+                cur.status = "superseded"; cur.t_done = now
+                self.current = None; self.superseded += 1
+                victim = cur
+            heapq.heappush(self._heap, (req.prio, next(self._seq), req))
+            if len(self._heap) > self.max_queue:
+                # переполнение: выкидываем самый низкоприоритетный и самый старый из них
+                worst = max(self._heap, key=lambda e: (e[0], -e[1]))
+                self._heap.remove(worst); heapq.heapify(self._heap)
+                worst[2].status = "dropped"; worst[2].t_done = now
+                self.dropped += 1
+        if victim is not None and self._cancel:
+            self._cancel(victim)
+        self._pump()
+        return req
+
+    def done(self, req: Request) -> None:
+        """Запрос отработал (успешно или с ошибкой). Поздний done() отменённого игнорируется."""
+        with self._lock:
+            if self.current is not req:
+                return
+            req.status = "done"; req.t_done = time.monotonic()
+            self.current = None
+            self.completed += 1
+        self._pump()
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            victims = [r for _, _, r in self._heap]
+            self._heap = []
+            cur, self.current = self.current, None
+            now = time.monotonic()
+            for r in victims:
+                r.status = "dropped"; r.t_done = now
+            self.dropped += len(victims)
+            if cur is not None:
+                cur.status = "superseded"; cur.t_done = now
+                self.superseded += 1
+        if cur is not None and self._cancel:
+            self._cancel(cur)
+
+    def _pump(self) -> None:
+        with self._lock:
+            if self.current is not None or not self._heap:
+                return
+            _, _, req = heapq.heappop(self._heap)
+            req.status = "running"; req.t_start = time.monotonic()
+            self.current = req
+            self.started += 1
+        try:
+            self._start(req)
+        except Exception as e:
+            print("scheduler start error:", e)
+            self.done(req)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"submitted": self.submitted, "coalesced": self.coalesced, "superseded": self.superseded,
+                    "dropped": self.dropped, "started": self.started, "completed": self.completed,
+                    "queued": len(self._heap), "busy": self.current is not None}
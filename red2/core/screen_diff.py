@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Отпечаток экрана и повторное использование описания/OCR.
+Кадр ужимается до серых миниатюр по сетке ячеек; сравнение миниатюр
+даёт «тот же экран» / «мелкое изменение» / «другой экран» и список
+изменившихся полос (полоса = строка сетки во всю ширину). OCR идёт
+участками, разрезанными по пустым строкам рядом с границами полос;
+при мелком изменении распознаются заново только задетые участки.
+Когда нужен и OCR, и LLM, они идут параллельно (OCR — задачей общего сервиса).
+"""
+import threading
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+GRID = (8, 8)          # строк x столбцов ячеек
+CELL = 8               # миниатюра ячейки CELL x CELL
+CELL_DIFF = 6.0        # средняя разница яркости (0..255), после которой ячейка «изменилась»
+MINOR_FRACTION = 0.10  # доля изменившихся ячеек, при которой описание ещё переиспользуется
+DHASH_MAJOR = 12       # столько разных бит dHash — кадр другой целиком (скролл, смена окна)
+OCR_TIMEOUT = 60.0     # дольше результата параллельного OCR не ждём
+INK_DIFF = 40.0        # перепад яркости соседних пикселей, считающийся «чернилами»
+INK_MIN = 2            # столько перепадов в строке — в ней что-то написано
+
+def to_gray(rgb: np.ndarray) -> np.ndarray:
+    if rgb.ndim == 2:
+        return rgb.astype(np.float32)
+    return (rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114).astype(np.float32)
+
+def _shrink(gray: np.ndarray, oh: int, ow: int) -> np.ndarray:
+    """Среднее по блокам; блоки покрывают кадр целиком (края — тоже, например панель задач)."""
+    h, w = gray.shape
+    ys = (np.arange(oh + 1) * h) // oh
+    xs = (np.arange(ow + 1) * w) // ow
+    sums = np.add.reduceat(np.add.reduceat(gray, ys[:-1], axis=0), xs[:-1], axis=1)
+    return sums / np.outer(np.diff(ys), np.diff(xs))
+
+class Fingerprint:
+    __slots__ = ("shape", "thumbs", "dhash")
+    def __init__(self, shape, thumbs: np.ndarray, dhash: int):
+        self.shape = shape        # (h, w) исходного кадра
+        self.thumbs = thumbs      # (rows, cols, CELL, CELL) float32
+        self.dhash = dhash        # 64-битный dHash всего кадра
+
+def fingerprint(rgb: np.ndarray, grid: Tuple[int, int] = GRID, cell: int = CELL) -> Fingerprint:
+    shape = rgb.shape[:2]
+    gray = to_gray(rgb[::2, ::2])   # для отпечатка хватает каждого второго пикселя
+    rows, cols = grid
+    small = _shrink(gray, rows * cell, cols * cell)
+    thumbs = small.reshape(rows, cell, cols, cell).transpose(0, 2, 1, 3).copy()
+    d = _shrink(gray, 8, 9)
+    bits = (d[:, 1:] > d[:, :-1]).flatten()
+    dhash = int(np.packbits(bits).view(">u8")[0])
+    return Fingerprint(shape, thumbs, dhash)
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def changed_cells(prev: Fingerprint, cur: Fingerprint, thresh: float = CELL_DIFF) -> np.ndarray:
+    """Маска (rows, cols) изменившихся ячеек."""
+    return np.abs(cur.thumbs - prev.thumbs).mean(axis=(2, 3)) > thresh
+
+def compare(prev: Optional[Fingerprint], cur: Fingerprint,
+            minor: float = MINOR_FRACTION) -> Tuple[str, List[int]]:
+    """("same" | "minor" | "major", номера изменившихся полос)."""
+    rows = cur.thumbs.shape[0]
+    if prev is None or prev.shape != cur.shape or prev.thumbs.shape != cur.thumbs.shape:
+        return "major", list(range(rows))
+    mask = changed_cells(prev, cur)
+    if not mask.any():
+        return "same", []
+    bands = [int(r) for r in np.nonzero(mask.any(axis=1))[0]]
+    if mask.mean() <= minor and hamming(prev.dhash, cur.dhash) < DHASH_MAJOR:
+        return "minor", bands
+    return "major", bands
+
+def band_bounds(h: int, rows: int, r: int) -> Tuple[int, int]:
+    return (h * r) // rows, (h * (r + 1)) // rows
+
+def ink_rows(rgb: np.ndarray) -> np.ndarray:
+    """Есть ли в строке пикселей «чернила» (перепады яркости вдоль строки, как у текста)."""
+    gray = to_gray(rgb[:, ::2])
+    ink = np.abs(np.diff(gray, axis=1)) > INK_DIFF
+    ink[:, ink.mean(axis=0) > 0.5] = False   # вертикальные линии: рамки панелей, стык мониторов
+    return ink.sum(axis=1) > INK_MIN
+
+def cut_at_blank(ink: np.ndarray, y0: int, y1: int, rows: int) -> List[int]:
+    """
+    Границы участков [y0, y1): у каждой границы полос сетки внутри — ближайшая пустая
+    строка в пределах трети полосы; нет пустой — граница пропускается (строка текста не режется).
+    """
+    h = ink.shape[0]
+    reach = max(1, h // rows // 3)
+    cuts = [y0]
+    for r in range(1, rows):
+        y = band_bounds(h, rows, r)[0]
+        lo, hi = max(cuts[-1] + reach, y - reach), min(y1 - reach, y + reach)   # без узких обрезков
+        if lo >= hi:
+            continue
+        blank = np.flatnonzero(~ink[lo:hi])
+        if blank.size:
+            cuts.append(lo + int(blank[np.argmin(np.abs(blank + lo - y))]))
+    return cuts + [y1]
+
+class ScreenMemo:
+    """
+    Помнит прошлый кадр: описание, OCR по участкам и отпечаток.
+    Участки — горизонтальные полосы во всю ширину, разрезанные по пустым строкам
+    (см. cut_at_blank): строка текста целиком попадает в один участок.
+    ocr(rgb) -> str; describe(rgb, ocr_text, title) -> str — подставляются снаружи;
+    ocr_many([rgb, ...]) -> [str, ...] — несколько участков разом (параллельно), если есть.
+    """
+    def __init__(self, ocr: Callable[[np.ndarray], str], describe: Callable[[np.ndarray, str, str], str],
+                 grid: Tuple[int, int] = GRID,
+                 ocr_many: Optional[Callable[[List[np.ndarray]], List[str]]] = None):
+        self.ocr_fn = ocr
+        self.ocr_many = ocr_many
+        self.describe_fn = describe
+        self.grid = grid
+        self._lock = threading.Lock()
+        self.fp: Optional[Fingerprint] = None
+        self.title = ""
+        self.desc = ""
+        self.segs: List[list] = []   # [y0, y1, text] по порядку, покрывают кадр
+        self.captures = 0
+        self.llm_calls = 0
+        self.llm_skipped = 0
+        self.ocr_calls = 0
+        self.ocr_skipped = 0
+        self.ocr_late = 0      # описание ушло в LLM без OCR: не уложился в ocr_wait
+
+    @staticmethod
+    def _join(segs: List[list]) -> str:
+        return " ".join(s[2] for s in segs if s[2])[:2000]
+
+    @property
+    def ocr_text(self) -> str:
+        return self._join(self.segs)
+
+    def _plan(self, rgb: np.ndarray, bands: List[int], segs: List[list], full: bool) -> List[list]:
+        """
+        Новые участки: весь кадр (full) или участки прошлого кадра, задетые изменившимися
+        полосами, — расширенные, пока их граница в новом кадре не пустая (строку не режем).
+        Возвращает полный список; у участков, которые надо распознать, text = None.
+        """
+        h = rgb.shape[0]; rows = self.grid[0]
+        ink = ink_rows(rgb)
+        if full or not segs:
+            c = cut_at_blank(ink, 0, h, rows)
+            return [[a, b, None] for a, b in zip(c[:-1], c[1:])]
+        dirty = [False] * len(segs)
+        for r in bands:
+            y0, y1 = band_bounds(h, rows, r)
+            for i, (a, b, _) in enumerate(segs):
+                if a < y1 and b > y0:
+                    dirty[i] = True
+        grown = True
+        while grown:
+            grown = False
+            for i in range(len(segs) - 1):
+                if dirty[i] != dirty[i + 1] and ink[segs[i][1] - 1: segs[i][1] + 1].any():
+                    dirty[i] = dirty[i + 1] = grown = True
+        out, i = [], 0
+        while i < len(segs):
+            if not dirty[i]:
+                out.append(segs[i]); i += 1; continue
+            j = i
+            while j + 1 < len(segs) and dirty[j + 1]:
+                j += 1
+            c = cut_at_blank(ink, segs[i][0], segs[j][1], rows)
+            out += [[a, b, None] for a, b in zip(c[:-1], c[1:])]
+            i = j + 1
+        return out
+
+    def _ocr_segs(self, rgb: np.ndarray, plan: List[list]) -> List[list]:
+        todo = [s for s in plan if s[2] is None]
+        crops = [rgb[a:b] for a, b, _ in todo]
+        if self.ocr_many is not None and len(crops) > 1:
+            try:
+                texts = self.ocr_many(crops)
+            except Exception:
+                texts = [""] * len(crops)
+        else:
+            texts = []
+            for c in crops:
+                try:
+                    texts.append(self.ocr_fn(c))
+                except Exception:
+                    texts.append("")
+        done = {id(s): " ".join((t or "").split()) for s, t in zip(todo, texts)}
+        self.ocr_calls += len(todo)
+        self.ocr_skipped += len(plan) - len(todo)
+        return [[s[0], s[1], done[id(s)]] if s[2] is None else s for s in plan]
+
+    def update(self, rgb: np.ndarray, title: str = "", force: bool = False,
+               on_ocr: Optional[Callable[[str], None]] = None,
+               ocr_wait: Optional[float] = None) -> Tuple[str, str, str]:
+        """
+        Вернуть (desc, ocr, kind) для кадра. Большое изменение или force — OCR всего кадра
+        (участками по пустым строкам); мелкое — только задетых участков;
+        LLM — только при большом изменении или смене активного окна.
+        Если нужен LLM, OCR идёт параллельно с ним: в подсказку попадает OCR,
+        успевший за ocr_wait с (None — ждать OCR до конца, 0 — не ждать);
+        on_ocr(text) зовётся, как только OCR готов, — раньше описания.
+        Запрос к LLM идёт без блокировки: ocr_text и мелкие обновления ему не ждут.
+        """
+        with self._lock:
+            self.captures += 1
+            fp = fingerprint(rgb, self.grid)
+            kind, bands = compare(self.fp, fp)
+            if force:
+                kind = "major"
+            full = kind == "major" or not self.segs
+            if kind == "same" and self.segs:
+                self.ocr_skipped += len(self.segs)
+            self.fp = fp
+            new_title, self.title = title != self.title, title
+            if not (kind == "major" or not self.desc or new_title):
+                if kind != "same":
+                    self.segs = self._ocr_segs(rgb, self._plan(rgb, bands, self.segs, full))
+                self.llm_skipped += 1
+                return self.desc, self.ocr_text, kind
+            self.llm_calls += 1
+            prev = self.segs
+            plan = self._plan(rgb, bands, prev, full) if (kind != "same" or not prev) else prev
+        box, ready = {}, threading.Event()
+        def _ocr():
+            out = prev
+            try:
+                out = self._ocr_segs(rgb, plan) if plan is not prev else prev
+                if on_ocr is not None:
+                    on_ocr(self._join(out))   # до ready: OCR дойдёт раньше описания
+            finally:
+                box["segs"] = out
+                ready.set()
+        if ocr_wait is None:
+            _ocr()
+        else:
+            from . import service
+            service.submit(_ocr, backend="ocr", name="ocr")
+        hint = ""
+        if ready.wait(ocr_wait or 0):
+            hint = self._join(box["segs"])
+        else:
+            self.ocr_late += 1
+        desc = None
+        try:
+            desc = self.describe_fn(rgb, hint, title)
+        finally:
+            ready.wait(OCR_TIMEOUT)
+            with self._lock:
+                if self.fp is fp:   # пока шёл LLM, кадр не сменился — результат про него
+                    self.segs = box.get("segs", prev)
+                    self.desc = desc or ""   # ошибку не запоминаем: в следующий раз спросим снова
+        return desc, self._join(box.get("segs", prev)), kind
+
+    def reset(self) -> None:
+        with self._lock:
+            self.fp = None; self.desc = ""; self.segs = []; self.title = ""
+
+    def stats(self) -> dict:
+        return {"captures": self.captures, "llm_calls": self.llm_calls, "llm_skipped": self.llm_skipped,
+                "ocr_calls": self.ocr_calls, "ocr_skipped": self.ocr_skipped, "ocr_late": self.ocr_late}
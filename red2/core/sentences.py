@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Нарезка потокового текста LLM на предложения для поэтапной озвучки.
+"""
+import re
+from typing import List
+
+# конец предложения: .!?… (+ закрывающие кавычки/скобки) и пробел, либо перевод строки
+_BOUNDARY = re.compile(r'[.!?…]+["»)\]]*\s+|\n+')
+_SOFT = re.compile(r'[,;:—–]\s+')
+
+class SentenceBuffer:
+    """
+    Копит дельты и отдаёт готовые предложения.
+    min_chars — слишком короткие куски склеиваются со следующими,
+    max_chars — длинный хвост без точки режется по запятой/пробелу.
+    """
+    def __init__(self, min_chars: int = 12, max_chars: int = 240):
+        self.min_chars = int(min_chars)
+        self.max_chars = int(max_chars)
+        self._buf = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buf += delta or ""
+        out = []
+        while True:
+            cut = self._find_cut()
+            if cut <= 0:
+                break
+            s = self._buf[:cut].strip()
+            self._buf = self._buf[cut:].lstrip()
+            if s:
+                out.append(s)
+        return out
+
+    def flush(self) -> str:
+        s = self._buf.strip()
+        self._buf = ""
+        return s
+
+    def _find_cut(self) -> int:
+        for m in _BOUNDARY.finditer(self._buf):
+            if len(self._buf[:m.end()].strip()) >= self.min_chars:
+                return m.end()
+        if len(self._buf) > self.max_chars:
+            head = self._buf[:self.max_chars]
+            soft = [m.end() for m in _SOFT.finditer(head)]
+            if soft:
+                return soft[-1]
+            sp = head.rfind(" ")
+            return sp + 1 if sp > 0 else self.max_chars
+        return -1
+
+def split_sentences(text: str, min_chars: int = 12, max_chars: int = 240) -> List[str]:
+    sb = SentenceBuffer(min_chars=min_chars, max_chars=max_chars)
+    out = sb.feed(text)
+    tail = sb.flush()
+    if tail:
+        out.append(tail)
+    return out
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Единый фоновый asyncio-цикл для всего I/O (HTTP, edge-tts, STT, vision).
+Корутины исполняются прямо в цикле, блокирующие вызовы (http.client, Vosk,
+воспроизведение) — в общем пуле потоков, которые переиспользуются.
+У каждого бэкенда свой лимит параллелизма, у задачи — таймаут и отмена.
+Qt сюда не тянется: результат отдаётся колбэком on_done из потока цикла.
+"""
+import asyncio, threading, time
+import concurrent.futures as cf
+from typing import Callable, Optional, Dict, Any
+
+# сколько задач каждого бэкенда выполняется одновременно (остальные ждут)
+LIMITS: Dict[str, int] = {
+    "llm": 2, "stt": 2, "vosk": 2, "whisper": 2, "live": 2,
+    "tts": 2, "tts_warm": 1, "audio": 2, "vision": 1, "ocr": 2, "memory": 1, "default": 4,
+}
+
+class Task:
+    """Ручка задачи. cancel() выставляет cancel_event (для блокирующего кода) и отменяет корутину."""
+    def __init__(self, name: str, backend: str, cancel: Optional[threading.Event] = None):
+        self.name = name
+        self.backend = backend
+        self.cancel_event = cancel or threading.Event()
+        self.t_submit = time.perf_counter()
+        self.t_start: Optional[float] = None
+        self.t_end: Optional[float] = None
+        self._fut: Optional[cf.Future] = None
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+        if self._fut is not None:
+            self._fut.cancel()
+
+    def done(self) -> bool:
+        return self._fut is not None and self._fut.done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._fut is None:
+            return True
+        try:
+            self._fut.exception(timeout)
+        except cf.CancelledError:
+            pass
+        except cf.TimeoutError:
+            return False
+        return True
+
+    def result(self, timeout: Optional[float] = None):
+        return self._fut.result(timeout)
+
+    def error(self) -> Optional[BaseException]:
+        """Исключение задачи (CancelledError — если отменена) или None."""
+        if self._fut is None or not self._fut.done():
+            return None
+        if self._fut.cancelled():
+            return cf.CancelledError()
+        return self._fut.exception()
+
+class AsyncService:
+    def __init__(self, limits: Optional[Dict[str, int]] = None, workers: Optional[int] = None):
+        self.limits = {**LIMITS, **(limits or {})}
+        self.workers = int(workers or sum(self.limits.values()))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._th: Optional[threading.Thread] = None
+        self._pool: Optional[cf.ThreadPoolExecutor] = None
+        self._sems: Dict[str, asyncio.Semaphore] = {}
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self.active: Dict[str, int] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timeouts = 0
+
+    # ----- цикл -----
+    def start(self) -> "AsyncService":
+        with self._lock:
+            if self._th is None or not self._th.is_alive():
+                self._ready.clear()
+                self._pool = cf.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="red-io")
+                self._th = threading.Thread(target=self._run_loop, name="red-loop", daemon=True)
+                self._th.start()
+        self._ready.wait()
+        return self
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_default_executor(self._pool)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            for t in asyncio.all_tasks(loop):
+                t.cancel()
+            try:
+                loop.run_until_complete(asyncio.sleep(0))
+            except Exception:
+                pass
+            loop.close()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def in_loop(self) -> bool:
+        return self._th is not None and threading.current_thread() is self._th
+
+    def _sem(self, backend: str) -> asyncio.Semaphore:
+        s = self._sems.get(backend)
+        if s is None:
+            s = self._sems[backend] = asyncio.Semaphore(max(1, self.limits.get(backend, self.limits["default"])))
+        return s
+
+    # ----- задачи -----
+    def submit(self, fn: Callable, *args, backend: str = "default", timeout: Optional[float] = None,
+               cancel: Optional[threading.Event] = None,
+               on_done: Optional[Callable[[Task], None]] = None, name: str = "") -> Task:
+        """
+        fn — корутинная функция (выполняется в цикле) или обычная (в пуле потоков).
+        Блокирующему коду отмена видна только через cancel (threading.Event).
+        on_done(task) зовётся из потока цикла после любого исхода.
+        """
+        task = Task(name or getattr(fn, "__name__", "task"), backend, cancel)
+        loop = self.loop
+        with self._lock:
+            self.submitted += 1
+        task._fut = asyncio.run_coroutine_threadsafe(self._job(task, fn, args, timeout), loop)
+        if on_done is not None:
+            task._fut.add_done_callback(lambda _f: self._safe(on_done, task))
+        return task
+
+    async def _job(self, task: Task, fn: Callable, args: tuple, timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        cur = asyncio.current_task()
+        self._tasks.add(cur)
+        sem = self._sem(task.backend); held = False
+        try:
+            await sem.acquire(); held = True
+            task.t_start = time.perf_counter()
+            self.active[task.backend] = self.active.get(task.backend, 0) + 1
+            try:
+                if task.cancel_event.is_set():   # отменили, пока ждала очереди
+                    raise asyncio.CancelledError()
+                if asyncio.iscoroutinefunction(fn):
+                    aw = fn(*args)
+                else:
+                    # таймаут/отмена блокирующий вызов не останавливают: слот бэкенда занят,
+                    # пока поток действительно не закончит, иначе лимит превышается
+                    cfut = self._pool.submit(fn, *args)
+                    cfut.add_done_callback(lambda _f: self._release_soon(loop, sem, task.backend))
+                    held = False
+                    aw = asyncio.wrap_future(cfut, loop=loop)
+                res = await (asyncio.wait_for(aw, timeout) if timeout else aw)
+                self.completed += 1
+                return res
+            except asyncio.TimeoutError:
+                task.cancel_event.set()
+                self.timeouts += 1
+                raise TimeoutError(f"{task.backend}: нет ответа за {timeout:.1f} с") from None
+            except asyncio.CancelledError:
+                task.cancel_event.set()
+                self.cancelled += 1
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                task.t_end = time.perf_counter()
+        finally:
+            if held:
+                self._release(sem, task.backend)
+            self._tasks.discard(cur)
+
+    def _release(self, sem: asyncio.Semaphore, backend: str) -> None:
+        self.active[backend] -= 1
+        sem.release()
+
+    def _release_soon(self, loop: asyncio.AbstractEventLoop, sem: asyncio.Semaphore, backend: str) -> None:
+        # из потока пула: семафор asyncio трогаем только в потоке цикла
+        try:
+            loop.call_soon_threadsafe(self._release, sem, backend)
+        except RuntimeError:
+            pass   # цикл уже остановлен (shutdown)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Выполнить корутину в цикле и дождаться результата (не из потока цикла)."""
+        if self.in_loop():
+            raise RuntimeError("AsyncService.run() из потока цикла — используйте await")
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return fut.result(timeout)
+        except cf.TimeoutError:
+            fut.cancel()
+            raise TimeoutError(f"нет ответа за {timeout:.1f} с") from None
+
+    def call_soon(self, fn: Callable, *args) -> None:
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    @staticmethod
+    def _safe(fn: Callable, *args) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            print("service callback error:", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": threading.active_count(),
+            "pool_threads": len(getattr(self._pool, "_threads", ())),
+            "active": {k: v for k, v in self.active.items() if v},
+            "pending": len(self._tasks),
+            "submitted": self.submitted, "completed": self.completed, "failed": self.failed,
+            "cancelled": self.cancelled, "timeouts": self.timeouts,
+        }
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        th, loop = self._th, self._loop
+        if th is None or loop is None or not th.is_alive():
+            return
+        def _stop():
+            for t in list(self._tasks):
+                t.cancel()
+            loop.call_soon(loop.stop)
+        loop.call_soon_threadsafe(_stop)
+        th.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._th = None; self._loop = None; self._sems = {}
+
+_SVC: Optional[AsyncService] = None
+_SVC_LOCK = threading.Lock()
+
+def get() -> AsyncService:
+    """Общий сервис процесса (запускается при первом обращении)."""
+    global _SVC
+    with _SVC_LOCK:
+        if _SVC is None:
+            _SVC = AsyncService()
+    return _SVC.start()
+
+def submit(fn: Callable, *args, **kw) -> Task:
+    return get().submit(fn, *args, **kw)
+
+def shutdown(timeout: float = 2.0) -> None:
+    global _SVC
+    with _SVC_LOCK:
+        svc, _SVC = _SVC, None
+    if svc is not None:
+        svc.shutdown(timeout)
@@ -1,32 +1,165 @@
 # -*- coding: utf-8 -*-
 # Use urllib-based client to avoid httpx issues.
-from typing import Optional
-from .http_openai import transcribe_whisper
-from . import config
+import threading, time
+from typing import Optional, Dict, Union, Tuple
+from .http_openai import transcribe_whisper, transcribe_whisper_bytes
+from .audio_buffer import AudioClip
+from . import config, audio_codec
 
-def stt_openai_wav(path_wav: str) -> str:
-    return transcribe_whisper(path_wav, model=config.stt_model())
+# запись в памяти (audio.AudioClip) или путь к WAV-файлу
+Audio = Union[AudioClip, str]
 
-def stt_vosk_wav(path_wav: str) -> Optional[str]:
+def _load_prefs() -> dict:
+    try:
+        from ..ui import user_prefs
+        return user_prefs.load()
+    except Exception:
+        return {}
+
+def stt_openai_wav(audio: Audio, codec: Optional[str] = None, trim: Optional[bool] = None) -> str:
+    if not isinstance(audio, AudioClip):
+        return transcribe_whisper(audio, model=config.stt_model())
+    prefs = _load_prefs()
+    codec = codec or prefs.get("stt_upload_codec", "flac")
+    trim = prefs.get("stt_trim_silence", True) if trim is None else trim
+    if trim:
+        audio = audio_codec.trim_silence(audio)
+    data, filename, mime = audio_codec.encode(audio, codec)
+    return transcribe_whisper_bytes(data, model=config.stt_model(), filename=filename, content_type=mime)
+
+class _VoskRegistry:
+    """
+    Один Model на каталог на весь процесс: грузится один раз (под локом,
+    параллельные STT-потоки ждут ту же загрузку), выгружается после простоя.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dir_locks: Dict[str, threading.Lock] = {}
+        self._models: Dict[str, object] = {}
+        self._last_used: Dict[str, float] = {}
+        self._stats: Dict[str, dict] = {}
+        self._reaper = None
+
+    def _stat(self, model_dir: str) -> dict:
+        return self._stats.setdefault(model_dir, {"loads": 0, "hits": 0, "load_sec": 0.0, "unloads": 0})
+
+    def get(self, model_dir: str):
+        with self._lock:
+            m = self._models.get(model_dir)
+            if m is not None:
+                self._stat(model_dir)["hits"] += 1
+                self._last_used[model_dir] = time.monotonic()
+                return m
+            dl = self._dir_locks.setdefault(model_dir, threading.Lock())
+        with dl:
+            with self._lock:
+                m = self._models.get(model_dir)
+                if m is not None:
+                    self._stat(model_dir)["hits"] += 1
+                    self._last_used[model_dir] = time.monotonic()
+                    return m
+            from vosk import Model
+            t0 = time.perf_counter()
+            m = Model(model_dir)
+            dt = time.perf_counter() - t0
+            with self._lock:
+                self._models[model_dir] = m
+                self._last_used[model_dir] = time.monotonic()
+                st = self._stat(model_dir); st["loads"] += 1; st["load_sec"] = dt
+            self._ensure_reaper()
+            return m
+
+    def unload_idle(self, idle_sec: float) -> int:
+        now = time.monotonic(); n = 0
+        with self._lock:
+            for d in [d for d, t in self._last_used.items() if d in self._models and now - t >= idle_sec]:
+                del self._models[d]
+                self._stat(d)["unloads"] += 1; n += 1
+        return n
+
+    def unload_all(self) -> None:
+        self.unload_idle(0.0)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {d: {**st, "loaded": d in self._models} for d, st in self._stats.items()}
+
+    def _ensure_reaper(self) -> None:
+        idle = config.vosk_idle_unload_sec()
+        if idle <= 0 or (self._reaper and self._reaper.is_alive()):
+            return
+        def _loop():
+            while True:
+                time.sleep(max(5.0, idle / 4))
+                self.unload_idle(idle)
+        self._reaper = threading.Thread(target=_loop, daemon=True)
+        self._reaper.start()
+
+_VOSK = _VoskRegistry()
+
+def vosk_model(model_dir: str):
+    return _VOSK.get(model_dir)
+
+def vosk_stats() -> Dict[str, dict]:
+    return _VOSK.stats()
+
+def vosk_unload(idle_sec: float = 0.0) -> int:
+    return _VOSK.unload_idle(idle_sec)
+
+def preload_vosk_async(model_dir: Optional[str] = None) -> Optional[threading.Thread]:
+    """Фоновая загрузка модели (пока крутится сплэш). Ошибки молча глотаем."""
+    model_dir = model_dir or config.vosk_model_path()
+    if not model_dir:
+        return None
+    def _load():
+        try: _VOSK.get(model_dir)
+        except Exception: pass
+    th = threading.Thread(target=_load, daemon=True)
+    th.start()
+    return th
+
+def _wav_chunks(path_wav: str, frames: int = 4000):
+    import wave
+    with wave.open(path_wav, "rb") as wf:
+        yield wf.getframerate()
+        while True:
+            data = wf.readframes(frames)
+            if len(data) == 0:
+                return
+            yield data
+
+def _conf(res: dict, confs: list) -> str:
+    confs.extend(w.get("conf", 0.0) for w in res.get("result") or [])
+    return res.get("text", "")
+
+def stt_vosk_result(audio: Audio, cancel: Optional[threading.Event] = None) -> Optional[Tuple[str, float]]:
+    """
+    Распознать через Vosk: (текст, средняя уверенность по словам 0..1).
+    None — Vosk не настроен/упал или распознавание отменено через cancel.
+    """
     model_dir = config.vosk_model_path()
     if not model_dir:
         return None
     try:
-        from vosk import Model, KaldiRecognizer
-        import json, wave
-        wf = wave.open(path_wav, "rb")
-        rec = KaldiRecognizer(Model(model_dir), wf.getframerate())
+        from vosk import KaldiRecognizer
+        import json
+        if isinstance(audio, AudioClip):
+            rate, chunks = audio.samplerate, audio.iter_chunks(4000)
+        else:
+            chunks = _wav_chunks(audio); rate = next(chunks)
+        rec = KaldiRecognizer(vosk_model(model_dir), rate)
         rec.SetWords(True)
-        text = ""
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
+        text = ""; confs = []
+        for data in chunks:
+            if cancel is not None and cancel.is_set():
+                return None
             if rec.AcceptWaveform(data):
-                res = json.loads(rec.Result())
-                text += " " + res.get("text","")
-        final = json.loads(rec.FinalResult())
-        text += " " + final.get("text","")
-        return text.strip()
+                text += " " + _conf(json.loads(rec.Result()), confs)
+        text += " " + _conf(json.loads(rec.FinalResult()), confs)
+        return text.strip(), (sum(confs) / len(confs) if confs else 0.0)
     except Exception:
         return None
+
+def stt_vosk_wav(audio: Audio) -> Optional[str]:
+    res = stt_vosk_result(audio)
+    return res[0] if res else None
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Оркестратор STT: Vosk (офлайн) и Whisper (онлайн) запускаются параллельно,
+победитель выбирается по политике:
+  first_confident — первый уверенный ответ (Vosk: средняя уверенность слов >= min_conf);
+  prefer_online   — ждём Whisper до online_timeout, потом берём Vosk, если он что-то
+                    распознал; без офлайн-ответа ждём Whisper дальше (до его таймаута);
+  offline_only    — только Vosk.
+Проигравшие отменяются (Vosk — между чанками; ответ Whisper просто отбрасывается).
+"""
+import queue, threading, time
+from typing import Callable, Optional, Tuple, Dict
+from . import config, stt, service
+
+POLICIES = ("first_confident", "prefer_online", "offline_only")
+
+class STTStats:
+    """Латентность/качество по бэкендам, копится за весь процесс."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._d: Dict[str, dict] = {}
+
+    def _b(self, name: str) -> dict:
+        return self._d.setdefault(name, {"calls": 0, "ok": 0, "empty": 0, "errors": 0,
+                                         "cancelled": 0, "wins": 0, "lat_sum": 0.0, "conf_sum": 0.0})
+
+    def record(self, name: str, latency: float, text: Optional[str], conf: Optional[float] = None,
+               error: bool = False, cancelled: bool = False) -> None:
+        with self._lock:
+            b = self._b(name); b["calls"] += 1; b["lat_sum"] += latency
+            if cancelled: b["cancelled"] += 1
+            elif error: b["errors"] += 1
+            elif text: b["ok"] += 1; b["conf_sum"] += conf or 0.0
+            else: b["empty"] += 1
+
+    def win(self, name: str) -> None:
+        with self._lock:
+            self._b(name)["wins"] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            out = {}
+            for n, b in self._d.items():
+                out[n] = {k: b[k] for k in ("calls", "ok", "empty", "errors", "cancelled", "wins")}
+                out[n]["avg_ms"] = 1000.0 * b["lat_sum"] / b["calls"] if b["calls"] else 0.0
+                out[n]["avg_conf"] = b["conf_sum"] / b["ok"] if b["ok"] else 0.0
+            return out
+
+STATS = STTStats()
+
+class STTOrchestrator:
+    def __init__(self, policy: str = "first_confident", min_conf: float = 0.6, online_timeout: float = 6.0,
+                 vosk: Optional[Callable] = None, whisper: Optional[Callable] = None,
+                 stats: Optional[STTStats] = None):
+        self.policy = policy if policy in POLICIES else "first_confident"
+        self.min_conf = float(min_conf)
+        self.online_timeout = float(online_timeout)
+        self.offline_enabled = vosk is not None or bool(config.vosk_model_path())
+        self.vosk = vosk or stt.stt_vosk_result          # (audio, cancel) -> (text, conf) | None
+        self.whisper = whisper or stt.stt_openai_wav     # (audio) -> str
+        self.stats = stats or STATS
+
+    @classmethod
+    def from_prefs(cls, prefs: dict) -> "STTOrchestrator":
+        return cls(policy=prefs.get("stt_policy", "first_confident"),
+                   min_conf=float(prefs.get("stt_min_conf", 0.6)),
+                   online_timeout=float(prefs.get("stt_online_timeout", 6.0)))
+
+    def _confident(self, res: Optional[Tuple[str, float]]) -> bool:
+        return bool(res and res[0] and res[1] >= self.min_conf)
+
+    def transcribe(self, audio, live=None) -> str:
+        offline = None
+        if live is not None:
+            # живой Vosk уже отработал по ходу записи: дочитываем хвост без сети
+            t0 = time.perf_counter(); text = live.finish()
+            self.stats.record("vosk_live", time.perf_counter() - t0, text, live.confidence, error=not live.ok)
+            if live.ok:
+                offline = (text, live.confidence)   # при prefer_online — запасной ответ на время ожидания Whisper
+                if self.policy == "offline_only" or (self.policy != "prefer_online" and self._confident(offline)):
+                    self.stats.win("vosk_live")
+                    return text
+        results: "queue.Queue[tuple]" = queue.Queue()
+        cancel = threading.Event()
+        pending = set()
+        if offline is None and self.offline_enabled:
+            pending.add("vosk"); self._spawn("vosk", lambda: self.vosk(audio, cancel), results, cancel)
+        if self.policy != "offline_only":
+            pending.add("whisper"); self._spawn("whisper", lambda: self.whisper(audio), results, cancel)
+
+        online_err = None; late = False
+        deadline = time.monotonic() + self.online_timeout if self.policy == "prefer_online" else None
+        while pending:
+            timeout = None
+            if deadline is not None and "whisper" in pending:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                name, res, err = results.get(timeout=timeout)
+            except queue.Empty:
+                if offline and offline[0]:
+                    pending.discard("whisper")   # онлайн не успел — его ответ отбросим
+                # подменить нечем: речь не теряем — ждём Whisper дальше, Vosk берём, как только ответит
+                deadline = None; late = True
+                continue
+            pending.discard(name)
+            if name == "vosk":
+                if res is not None:
+                    offline = res
+                if self.policy != "prefer_online" and self._confident(offline):
+                    return self._finish("vosk", offline[0], cancel)
+                if late and offline and offline[0]:
+                    return self._finish("vosk", offline[0], cancel)   # Whisper уже просрочен
+            else:
+                if err is not None:
+                    online_err = err
+                elif res:
+                    return self._finish("whisper", res, cancel)
+        if offline and offline[0]:
+            return self._finish("vosk" if live is None or not live.ok else "vosk_live", offline[0], cancel)
+        cancel.set()
+        if online_err is not None:
+            raise online_err
+        return ""
+
+    def _finish(self, name: str, text: str, cancel: threading.Event) -> str:
+        cancel.set()
+        self.stats.win(name)
+        return text
+
+    def _spawn(self, name: str, fn: Callable, results: "queue.Queue[tuple]", cancel: threading.Event) -> None:
+        def _run():
+            t0 = time.perf_counter(); res = err = None
+            try:
+                res = fn()
+            except Exception as e:
+                err = e
+            dt = time.perf_counter() - t0
+            text, conf = (res if isinstance(res, tuple) else (res, None))
+            self.stats.record(name, dt, text, conf, error=err is not None,
+                              cancelled=cancel.is_set() and err is None)
+            results.put((name, res, err))
+        service.submit(_run, backend=name, cancel=cancel)
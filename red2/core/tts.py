@@ -1,19 +1,48 @@
-
 from __future__ import annotations
-import os, threading, tempfile, asyncio, ctypes
-from typing import Optional, Callable
+import os, time, threading, tempfile, asyncio, ctypes, queue
+from typing import Optional, Callable, Iterable, List
+from .sentences import split_sentences
+from . import tts_cache, service
 
-def _mci_play_mp3_blocking(path: str) -> None:
+def _mci_play_mp3(data: bytes, cancel: threading.Event) -> None:
+    # MCI умеет только файлы: пишем MP3 во временный файл, играем без 'wait'
+    # и опрашиваем статус, чтобы stop() срабатывал сразу
+    fd, path = tempfile.mkstemp(prefix="red_edge_tts_", suffix=".mp3")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
     mci = ctypes.windll.winmm.mciSendStringW
-    alias = "redtts"
+    alias = f"redtts{threading.get_ident()}"
+    buf = ctypes.create_unicode_buffer(32)
     try:
         mci(f'open "{path}" type mpegvideo alias {alias}', None, 0, 0)
-        mci(f'play {alias} wait', None, 0, 0)
+        mci(f'play {alias}', None, 0, 0)
+        while not cancel.wait(0.03):
+            mci(f'status {alias} mode', buf, 32, 0)
+            if buf.value != "playing":
+                break
     finally:
         try:
+            mci(f'stop {alias}', None, 0, 0)
             mci(f'close {alias}', None, 0, 0)
         except Exception:
             pass
+        try: os.remove(path)
+        except Exception: pass
+
+def _play_mp3(data: bytes, cancel: threading.Event) -> None:
+    if not data or cancel.is_set():
+        return
+    try:
+        from . import playback
+        pcm, sr = playback.decode(data)
+    except Exception as e:
+        if os.name != "nt":
+            raise
+        # старый libsndfile без MP3 — играем системным MCI
+        print("MP3 decode failed, fallback to MCI:", e)
+        _mci_play_mp3(data, cancel)
+        return
+    playback.engine().play(pcm, cancel, samplerate=sr)
 
 def _edge_rate(rate: int) -> str:
     pct = int(max(-25, min(25, (int(rate) - 175) * 0.5)))
@@ -23,58 +52,187 @@ def _edge_vol(vol: float) -> str:
     pct = int(max(-10, min(10, (float(vol) - 0.9) * 50)))
     return f"{'+' if pct >= 0 else ''}{pct}%"
 
+class PhraseSession:
+    """
+    Одна реплика в конвейере: фразы подаются через feed(), синтез идёт
+    на шаг впереди воспроизведения (очередь глубиной depth).
+    Сессия держит по слоту "tts" и "audio" до close(); если новых фраз нет
+    idle_sec секунд, а close() так и не пришёл, сессия отменяется сама.
+    """
+    idle_sec = 30.0
+    def __init__(self, pipeline: "PhrasePipeline"):
+        self._p = pipeline
+        self._in: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._out: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max(1, pipeline.depth))
+        self._on_done: Optional[Callable] = None
+        self.cancel_event = threading.Event()
+        # тайминги для замеров: начало, старт/конец каждой фразы
+        self.t_open = time.perf_counter()
+        self.play_starts: List[float] = []
+        self.play_ends: List[float] = []
+        # синтез и воспроизведение — задачи общего сервиса (потоки пула, без своих циклов)
+        svc = service.get()
+        self._jobs = [svc.submit(self._produce, backend="tts", cancel=self.cancel_event),
+                      svc.submit(self._consume, backend="audio")]   # без cancel: on_done должен прийти и после stop()
+
+    def feed(self, text: str) -> None:
+        if text and not self.cancel_event.is_set():
+            self._in.put(text)
+
+    def close(self, on_done: Optional[Callable] = None) -> None:
+        self._on_done = on_done
+        self._in.put(None)
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+        self._in.put(None)
+        try: self._out.put_nowait(None)
+        except queue.Full: pass
+
+    def _put(self, item) -> bool:
+        while not self.cancel_event.is_set():
+            try:
+                self._out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> None:
+        try:
+            while not self.cancel_event.is_set():
+                try:
+                    text = self._in.get(timeout=self.idle_sec)
+                except queue.Empty:
+                    print("TTS session idle, cancelled")   # не закрытая реплика не держит слоты вечно
+                    self.cancel()
+                    break
+                if text is None:
+                    break
+                try:
+                    data = self._p.synth(text, self.cancel_event)
+                    if asyncio.iscoroutine(data):
+                        data = service.get().run(data)
+                except Exception as e:
+                    print("TTS synth error:", e)
+                    continue
+                if not self._put(data):
+                    break
+        finally:
+            self._put(None)
+
+    def _consume(self) -> None:
+        try:
+            while not self.cancel_event.is_set():
+                data = self._out.get()
+                if data is None:
+                    break
+                self.play_starts.append(time.perf_counter())
+                try:
+                    self._p.play(data, self.cancel_event)
+                except Exception as e:
+                    print("TTS playback error:", e)
+                self.play_ends.append(time.perf_counter())
+        finally:
+            # как и раньше: on_done зовётся и после stop()
+            cb = self._on_done
+            if cb: cb()
+
+class PhrasePipeline:
+    """synth(text, cancel) -> bytes | coroutine; play(bytes, cancel) — блокирующее воспроизведение."""
+    def __init__(self, synth: Callable, play: Callable = _play_mp3, depth: int = 2):
+        self.synth = synth
+        self.play = play
+        self.depth = int(depth)
+
+    def open(self) -> PhraseSession:
+        return PhraseSession(self)
+
+    def run(self, phrases: Iterable[str], on_done: Optional[Callable] = None) -> PhraseSession:
+        s = self.open()
+        for ph in phrases:
+            s.feed(ph)
+        s.close(on_done)
+        return s
+
 class _EdgeTTS:
     def __init__(self, rate: int = 175, volume: float = 0.9, voice: Optional[str] = None):
         self.rate = int(rate)
         self.volume = float(volume)
         self.voice = voice or "ru-RU-SvetlanaNeural"
-        self._th = None
-        self._stop = False
+        self._pipe = PhrasePipeline(self._synth)
+        self._session: Optional[PhraseSession] = None
 
     def set_voice(self, voice_id: str) -> None:
         if voice_id:
             self.voice = voice_id
 
+    def open_session(self) -> PhraseSession:
+        self.stop()
+        self._session = self._pipe.open()
+        return self._session
+
     def speak(self, text: str, on_done: Optional[Callable] = None) -> None:
         self.stop()
-        self._stop = False
-        self._th = threading.Thread(target=self._run, args=(text, on_done), daemon=True)
-        self._th.start()
+        self._session = self._pipe.run(split_sentences(text), on_done)
 
     def stop(self) -> None:
-        self._stop = True
+        if self._session is not None:
+            self._session.cancel()
+            self._session = None
+
+    def _key(self, text: str) -> str:
+        return tts_cache.make_key(text, self.voice, self.rate, self.volume, "edge")
+
+    def _synth(self, text: str, cancel: threading.Event):
+        """Попадание в кэш — байты сразу, иначе корутина сетевого синтеза."""
+        c = tts_cache.cache()
+        if c is not None:
+            data = c.get(self._key(text))
+            if data:
+                return data
+        return self._synth_net(text, cancel, c)
 
-    def _run(self, text: str, on_done: Optional[Callable]) -> None:
+    async def _synth_net(self, text: str, cancel: threading.Event, c=None) -> bytes:
         try:
             import edge_tts
         except Exception as e:
             print("Edge TTS not available:", e)
-            if on_done: on_done()
-            return
-        fd, path = tempfile.mkstemp(prefix="red_edge_tts_", suffix=".mp3")
-        os.close(fd)
-
-        async def _synth():
-            communicate = edge_tts.Communicate(
-                text=text,
-                voice=self.voice,
-                rate=_edge_rate(self.rate),
-                volume=_edge_vol(self.volume),
-            )
-            await communicate.save(path)
+            return b""
+        t0 = time.perf_counter()
+        communicate = edge_tts.Communicate(
+            text=text,
+            voice=self.voice,
+            rate=_edge_rate(self.rate),
+            volume=_edge_vol(self.volume),
+        )
+        buf = bytearray()
+        async for chunk in communicate.stream():
+            if cancel.is_set():
+                return b""
+            if chunk.get("type") == "audio":
+                buf += chunk["data"]
+        data = bytes(buf)
+        if c is not None and data:
+            c.put(self._key(text), data, time.perf_counter() - t0)
+        return data
 
-        try:
-            asyncio.run(_synth())
-            if self._stop:
-                if on_done: on_done()
-                return
-            _mci_play_mp3_blocking(path)
-        except Exception as e:
-            print("Edge TTS error:", e)
-        finally:
-            try: os.remove(path)
-            except Exception: pass
-            if on_done: on_done()
+    def warm(self, phrases: Iterable[str]) -> int:
+        """Досинтезировать в кэш фразы, которых там ещё нет. Возвращает число новых."""
+        c = tts_cache.cache()
+        if c is None:
+            return 0
+        n = 0
+        for ph in phrases:
+            ph = (ph or "").strip()
+            if not ph or c.has(self._key(ph)):
+                continue
+            try:
+                if service.get().run(self._synth_net(ph, threading.Event(), c)):
+                    n += 1
+            except Exception as e:
+                print("TTS warm-up error:", e)
+        return n
 
 class _SysTTS:
     def __init__(self, rate: int = 175, volume: float = 0.9, voice: Optional[str] = None):
@@ -129,6 +287,11 @@ class TTS:
         self._cur = {
             "engine": None, "rate": None, "volume": None, "voice": None
         }
+        # очередь фраз для потоковой озвучки (enqueue)
+        self._q: "queue.Queue[tuple]" = queue.Queue()
+        self._gen = 0
+        self._q_th = None
+        self._session = None
         self._ensure_impl(force=True, defaults={"rate": rate, "volume": volume, "voice": voice})
 
     def _ensure_impl(self, force: bool = False, defaults: dict | None = None) -> None:
@@ -168,6 +331,60 @@ class TTS:
         self._ensure_impl()
         self._impl.speak(text, on_done=on_done)
 
+    def enqueue(self, text: str, on_done: Optional[Callable] = None) -> None:
+        """
+        Поставить фразу в очередь, не прерывая текущую (для потокового ответа LLM).
+        on_done закрывает реплику: вызовется после всех фраз (text может быть пустым).
+        Edge синтезирует следующую фразу, пока играет текущая.
+        """
+        if self._session is None and hasattr(self._impl, "open_session"):
+            self._ensure_impl()
+            if hasattr(self._impl, "open_session"):
+                self._session = self._impl.open_session()
+        if self._session is not None:
+            self._session.feed(text)
+            if on_done is not None:
+                self._session.close(on_done); self._session = None
+            return
+        if self._q_th is None or not self._q_th.is_alive():
+            self._q_th = threading.Thread(target=self._queue_loop, daemon=True)
+            self._q_th.start()
+        self._q.put((self._gen, text, on_done))
+
+    def _queue_loop(self) -> None:
+        while True:
+            gen, text, on_done = self._q.get()
+            if gen != self._gen:
+                continue
+            if text:
+                done = threading.Event()
+                try:
+                    self._ensure_impl()
+                    self._impl.speak(text, on_done=done.set)
+                    done.wait()
+                except Exception as e:
+                    print("TTS queue error:", e)
+            if on_done and gen == self._gen:
+                on_done()
+
     def stop(self) -> None:
+        self._gen += 1
+        self._session = None
+        try:
+            while True: self._q.get_nowait()
+        except queue.Empty:
+            pass
         try: self._impl.stop()
         except Exception: pass
+
+    def warm_async(self, phrases: Optional[Iterable[str]] = None) -> None:
+        """Фоново положить в кэш фразы из prefs (tts_warm_phrases) для текущего голоса."""
+        self._ensure_impl()
+        impl = self._impl
+        if not hasattr(impl, "warm"):
+            return
+        if phrases is None:
+            phrases = _load_prefs().get("tts_warm_phrases") or []
+        phrases = list(phrases)
+        if phrases:
+            service.submit(impl.warm, phrases, backend="tts_warm")   # свой слот: не отнимает "tts" у реплик
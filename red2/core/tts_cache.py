@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш синтезированной речи: ключ — sha256 от (текст, голос, скорость,
+громкость, движок). Два уровня: LRU в памяти и каталог на диске
+(content-addressed, вытеснение по времени последнего доступа).
+"""
+import hashlib, json, os, tempfile, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").split())
+
+def make_key(text: str, voice: str, rate, volume, engine: str = "edge") -> str:
+    raw = json.dumps([_norm(text), voice or "", int(rate), round(float(volume), 3), engine],
+                     ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class TTSCache:
+    def __init__(self, folder: Path, disk_max_bytes: int = 200 << 20, mem_max_bytes: int = 16 << 20,
+                 suffix: str = ".mp3"):
+        self.folder = Path(folder)
+        self.disk_max = int(disk_max_bytes)
+        self.mem_max = int(mem_max_bytes)
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        self._synth_sec: Dict[str, float] = {}
+        self._disk_bytes = None   # считается лениво при первой записи
+        self.hits_mem = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.saved_sec = 0.0
+        self._miss_sec_sum = 0.0
+        self._miss_n = 0
+
+    def _path(self, key: str) -> Path:
+        return self.folder / key[:2] / (key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits_mem += 1
+                self.saved_sec += self._saved(key)
+                return data
+        p = self._path(key)
+        try:
+            data = p.read_bytes()
+            os.utime(p)   # для LRU-вытеснения на диске
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits_disk += 1
+            self.saved_sec += self._saved(key)
+            self._mem_put(key, data)
+        return data
+
+    def has(self, key: str) -> bool:
+        """Есть ли запись (без учёта в статистике)."""
+        with self._lock:
+            if key in self._mem:
+                return True
+        return self._path(key).is_file()
+
+    def put(self, key: str, data: bytes, synth_sec: float = 0.0) -> None:
+        if not data:
+            return
+        with self._lock:
+            self._synth_sec[key] = synth_sec
+            self._miss_sec_sum += synth_sec; self._miss_n += 1
+            self._mem_put(key, data)
+        if self.disk_max <= 0:
+            return
+        p = self._path(key)
+        tmp = None
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            # своё имя у каждого писателя: два синтеза одной фразы не пишут в один файл
+            with tempfile.NamedTemporaryFile(dir=p.parent, prefix=p.stem + ".", suffix=".tmp", delete=False) as f:
+                tmp = f.name
+                f.write(data)
+            os.replace(tmp, p)
+        except OSError:
+            if tmp:
+                try: os.remove(tmp)
+                except OSError: pass
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_size()
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.disk_max
+        if over:
+            self._evict_disk()
+
+    def _saved(self, key: str) -> float:
+        # для записей с прошлых запусков время синтеза не знаем — берём среднее
+        sec = self._synth_sec.get(key)
+        if sec is None:
+            sec = self._miss_sec_sum / self._miss_n if self._miss_n else 0.0
+        return sec
+
+    def _mem_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.mem_max:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        while self._mem_bytes > self.mem_max:
+            _, d = self._mem.popitem(last=False)
+            self._mem_bytes -= len(d)
+
+    def _files(self):
+        return list(self.folder.glob("??/*" + self.suffix))
+
+    def _scan_size(self) -> int:
+        total = 0
+        for p in self._files():
+            try: total += p.stat().st_size
+            except OSError: pass
+        return total
+
+    def _evict_disk(self) -> None:
+        """Удалять самые давно использованные файлы, пока не влезем в 90% лимита."""
+        items = []
+        for p in self._files():
+            try:
+                st = p.stat(); items.append((st.st_mtime, st.st_size, p))
+            except OSError:
+                pass
+        items.sort()
+        total = sum(sz for _, sz, _ in items)
+        target = int(self.disk_max * 0.9)
+        for _, sz, p in items:
+            if total <= target:
+                break
+            try:
+                p.unlink(); total -= sz
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear(); self._mem_bytes = 0
+        for p in self._files():
+            try: p.unlink()
+            except OSError: pass
+        with self._lock:
+            self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.hits_mem + self.hits_disk
+            total = hits + self.misses
+            return {
+                "hits_mem": self.hits_mem, "hits_disk": self.hits_disk, "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "saved_sec": self.saved_sec,
+                "mem_entries": len(self._mem), "mem_bytes": self._mem_bytes,
+                "disk_bytes": self._disk_bytes if self._disk_bytes is not None else self._scan_size(),
+            }
+
+_CACHE: Optional[TTSCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def cache() -> Optional[TTSCache]:
+    """Общий кэш процесса по настройкам (None, если tts_cache_mb == 0)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                from ..ui import user_prefs
+                prefs = user_prefs.load()
+                mb = int(prefs.get("tts_cache_mb", 200))
+                if mb <= 0:
+                    return None
+                _CACHE = TTSCache(user_prefs.data_dir() / "tts_cache", disk_max_bytes=mb << 20)
+            except Exception as e:
+                print("TTS cache unavailable:", e)
+                return None
+        return _CACHE
+
+def stats() -> dict:
+    c = cache()
+    return c.stats() if c else {}
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Простой VAD по энергии и частоте переходов через ноль.
+Порог плавает вслед за уровнем шума; hangover держит «речь» ещё
+немного после последнего громкого блока, чтобы не рвать слова.
+"""
+import numpy as np
+
+class EnergyVAD:
+    def __init__(self, samplerate: int = 16000, threshold_db: float = 10.0, min_db: float = -48.0,
+                 zcr_max: float = 0.35, hangover_ms: int = 300):
+        self.samplerate = int(samplerate)
+        self.threshold_db = float(threshold_db)
+        self.min_db = float(min_db)
+        self.zcr_max = float(zcr_max)
+        self.hangover = int(self.samplerate * hangover_ms / 1000)
+        self.noise_db = -60.0
+        self.active = False
+        self._quiet = 0   # сэмплов тишины подряд
+
+    @staticmethod
+    def _mono(block: np.ndarray) -> np.ndarray:
+        x = np.asarray(block)
+        if x.ndim > 1:
+            x = x.mean(axis=1)
+        if x.dtype.kind in "iu":
+            return x.astype(np.float32) / 32768.0
+        return x.astype(np.float32, copy=False)
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        x = self._mono(block)
+        if x.size == 0:
+            return self.active
+        db = 20.0 * float(np.log10(float(np.sqrt(np.mean(x * x))) + 1e-9))
+        zcr = float(np.mean(np.signbit(x[1:]) != np.signbit(x[:-1]))) if x.size > 1 else 0.0
+        loud = db > max(self.min_db, self.noise_db + self.threshold_db) and zcr < self.zcr_max
+        if loud:
+            self.active = True
+            self._quiet = 0
+        else:
+            # шум: быстро вниз, медленно вверх
+            self.noise_db = db if db < self.noise_db else self.noise_db + 0.05 * (db - self.noise_db)
+            self._quiet += x.size
+            if self._quiet >= self.hangover:
+                self.active = False
+        return self.active
+
+    def reset(self) -> None:
+        self.active = False
+        self._quiet = 0
@@ -1,81 +1,269 @@
 # -*- coding: utf-8 -*-
-import base64, os, io, ctypes
+import base64, threading
 from pathlib import Path
-from PySide6.QtGui import QGuiApplication
-from PySide6.QtCore import QBuffer, QByteArray, QIODevice
-from . import llm
+import numpy as np
+from PySide6.QtGui import QGuiApplication, QImage, QImageWriter, QPainter
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, Qt, QRect
+from . import llm, ocr, window_geom
+from .window_geom import Rect, WindowInfo
+from .screen_diff import ScreenMemo
+
+CAPTURE_MODES = ("full", "window", "cursor", "rect")
+CURSOR_BOX = (1024, 640)   # область вокруг курсора, px
+MIN_SIDE = 64              # окно меньше — это не окно (панель, всплывашка): берём весь экран
 
 def _active_window_title() -> str:
+    w = window_geom.active_window()
+    return w.title if w else ""
+
+def _vision_pref(key: str, default):
     try:
-        user32 = ctypes.windll.user32
-        hwnd = user32.GetForegroundWindow()
-        if not hwnd:
-            return ""
-        length = user32.GetWindowTextLengthW(hwnd)
-        if length == 0:
-            return ""
-        buf = ctypes.create_unicode_buffer(length + 1)
-        user32.GetWindowTextW(hwnd, buf, length + 1)
-        return buf.value.strip()
+        from ..ui import user_prefs
+        return user_prefs.load().get(key, default)
     except Exception:
-        return ""
+        return default
 
-def grab_screen_png_bytes() -> bytes:
-    screen = QGuiApplication.primaryScreen()
-    if screen is None:
+def grab_screen_image(which=None) -> QImage:
+    """
+    which: "primary" | "all" (все мониторы на одном холсте, как виртуальный рабочий стол)
+    | номер экрана. None — из prefs["vision_screen"].
+    """
+    if which is None:
+        which = _vision_pref("vision_screen", "primary")
+    screens = QGuiApplication.screens()
+    if not screens:
         raise RuntimeError("No screen found")
-    pix = screen.grabWindow(0)
+    if which == "all" and len(screens) > 1:
+        return _grab_all(screens)
+    screen = QGuiApplication.primaryScreen()
+    if str(which).isdigit() and int(which) < len(screens):
+        screen = screens[int(which)]
+    return screen.grabWindow(0).toImage()
+
+def _grab_all(screens) -> QImage:
+    # холст в логических координатах виртуального стола, умноженных на наибольший DPR
+    virt = screens[0].virtualGeometry()
+    dpr = max(s.devicePixelRatio() for s in screens)
+    canvas = QImage(int(virt.width() * dpr), int(virt.height() * dpr), QImage.Format_RGB888)
+    canvas.fill(0)
+    p = QPainter(canvas)
+    try:
+        for s in screens:
+            g = s.geometry()
+            img = s.grabWindow(0).toImage()
+            if img.isNull():
+                continue
+            p.drawImage(QRect(int((g.x() - virt.x()) * dpr), int((g.y() - virt.y()) * dpr),
+                              int(g.width() * dpr), int(g.height() * dpr)), img)
+    finally:
+        p.end()
+    return canvas
+
+def _save(img: QImage, fmt: str = "PNG", quality: int = -1) -> bytes:
     ba = QByteArray()
     buf = QBuffer(ba)
     buf.open(QIODevice.WriteOnly)
-    ok = pix.save(buf, "PNG")
+    ok = img.save(buf, fmt, quality)
     buf.close()
     if not ok:
-        raise RuntimeError("Failed to save pixmap to PNG")
+        raise RuntimeError(f"Failed to save pixmap to {fmt}")
     return bytes(ba)
 
-def try_ocr_from_png(png_bytes: bytes) -> str:
+def capture_rect(mode: str, screen: Rect, window: WindowInfo | None = None,
+                 cursor: tuple | None = None, rect: Rect | None = None,
+                 box: tuple = CURSOR_BOX) -> Rect | None:
+    """Что снимать в режиме mode на экране screen (пиксели стола). None — экран целиком."""
+    r = None
+    if mode == "window" and window is not None and window.rect is not None:
+        r = window.rect
+    elif mode == "cursor" and cursor is not None:
+        bw, bh = min(box[0], screen.w), min(box[1], screen.h)
+        x = min(max(cursor[0] - bw // 2, screen.x), screen.x + screen.w - bw)
+        y = min(max(cursor[1] - bh // 2, screen.y), screen.y + screen.h - bh)
+        r = Rect(x, y, bw, bh)
+    elif mode == "rect" and rect is not None:
+        r = rect
+    r = r.clip(screen) if r is not None else None
+    if r is None or r.w < MIN_SIDE or r.h < MIN_SIDE or (r.w, r.h) == (screen.w, screen.h):
+        return None
+    return r
+
+def _screen_rects() -> list:
+    """[(QScreen, Rect в пикселях стола)] — геометрия Qt логическая, система отдаёт физическую."""
+    out = []
+    for s in QGuiApplication.screens():
+        g, d = s.geometry(), s.devicePixelRatio()
+        out.append((s, Rect(int(g.x() * d), int(g.y() * d), int(g.width() * d), int(g.height() * d))))
+    return out
+
+def capture(mode: str | None = None, rect: Rect | None = None) -> tuple[QImage, str]:
+    """
+    Снимок по режиму (None — prefs["vision_capture"]) и заголовок активного окна:
+    окно спрашивается у системы один раз — и для рамки, и для заголовка.
+    """
+    mode = mode or _vision_pref("vision_capture", "full")
+    win = window_geom.active_window()
+    title = win.title if win else ""
+    if mode not in CAPTURE_MODES or mode == "full":
+        return grab_screen_image(), title
+    cursor = window_geom.cursor_pos() if mode == "cursor" else None
+    if mode == "window" and win is not None and win.rect is not None:
+        px, py = win.rect.x + win.rect.w // 2, win.rect.y + win.rect.h // 2
+    elif mode == "rect" and rect is not None:
+        px, py = rect.x + rect.w // 2, rect.y + rect.h // 2
+    else:
+        px, py = cursor or (0, 0)
+    screens = _screen_rects()
+    if not screens:
+        raise RuntimeError("No screen found")
+    qs, sr = next(((q, r) for q, r in screens if r.contains(px, py)), screens[0])
+    box = tuple(_vision_pref("vision_cursor_box", CURSOR_BOX))
+    r = capture_rect(mode, sr, win, cursor, rect, box)
+    if r is None:
+        return qs.grabWindow(0).toImage(), title
+    d = qs.devicePixelRatio()
+    img = qs.grabWindow(0, int((r.x - sr.x) / d), int((r.y - sr.y) / d), int(r.w / d), int(r.h / d)).toImage()
+    return img, title
+
+def _png_bytes(img: QImage) -> bytes:
+    return _save(img, "PNG")
+
+# загрузка в vision-модель: описание в 10 слов не требует 4K PNG
+UPLOAD_DEFAULTS = {"max_dim": 1024, "format": "jpeg", "quality": 70, "gray": False, "detail": "low"}
+_MIME = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+def upload_options(prefs: dict | None = None) -> dict:
+    if prefs is None:
+        try:
+            from ..ui import user_prefs
+            prefs = user_prefs.load()
+        except Exception:
+            prefs = {}
+    return {
+        "max_dim": int(prefs.get("vision_max_dim", UPLOAD_DEFAULTS["max_dim"])),
+        "format": str(prefs.get("vision_format", UPLOAD_DEFAULTS["format"])).lower(),
+        "quality": int(prefs.get("vision_quality", UPLOAD_DEFAULTS["quality"])),
+        "gray": bool(prefs.get("vision_gray", UPLOAD_DEFAULTS["gray"])),
+        "detail": str(prefs.get("vision_detail", UPLOAD_DEFAULTS["detail"])),
+    }
+
+def encode_for_llm(img: QImage, max_dim: int = 1024, format: str = "jpeg", quality: int = 70,
+                   gray: bool = False, **_) -> tuple[bytes, str]:
+    """Уменьшить до max_dim по длинной стороне (0 — как есть) и сжать. -> (bytes, mime)."""
+    if max_dim and max(img.width(), img.height()) > max_dim:
+        img = img.scaled(max_dim, max_dim, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if gray:
+        img = img.convertToFormat(QImage.Format_Grayscale8)
+    fmt = format if format in _MIME else "jpeg"
+    if fmt == "webp" and b"webp" not in [bytes(f) for f in QImageWriter.supportedImageFormats()]:
+        fmt = "jpeg"   # нет плагина qwebp
+    if fmt == "png":
+        return _png_bytes(img), _MIME[fmt]
+    return _save(img, fmt.upper(), quality), _MIME[fmt]
+
+def grab_screen_png_bytes() -> bytes:
+    return _png_bytes(grab_screen_image())
+
+def image_to_rgb(img: QImage) -> np.ndarray:
+    """QImage -> массив (h, w, 3) uint8 (копия, без PIL)."""
+    img = img.convertToFormat(QImage.Format_RGB888)
+    h, w, bpl = img.height(), img.width(), img.bytesPerLine()
+    arr = np.frombuffer(img.constBits(), np.uint8, count=h * bpl).reshape(h, bpl)
+    return arr[:, :w * 3].reshape(h, w, 3).copy()
+
+def rgb_to_image(rgb: np.ndarray) -> QImage:
+    rgb = np.ascontiguousarray(rgb)
+    h, w = rgb.shape[:2]
+    return QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888).copy()
+
+def try_ocr_from_png(png_bytes: bytes, lang: str = "auto") -> str:
     try:
-        import pytesseract
-        from PIL import Image
-        tcmd = os.getenv("TESSERACT_PATH", "")
-        if tcmd:
-            pytesseract.pytesseract.tesseract_cmd = tcmd
-        img = Image.open(io.BytesIO(png_bytes))
-        txt = pytesseract.image_to_string(img, lang=os.getenv("TESSERACT_LANG","eng+rus"))
-        txt = (txt or "").strip()
-        txt = " ".join(txt.split())
-        return txt[:2000]
+        img = QImage.fromData(png_bytes, "PNG")
+        if img.isNull():
+            return ""
+        return ocr.recognize(image_to_rgb(img), lang)[:2000]
     except Exception:
         return ""
 
-def describe_screen_via_llm_ultra_brief(png_bytes: bytes, ocr_text: str) -> str:
+def try_ocr_from_rgb(rgb: np.ndarray, lang: str = "auto") -> str:
     try:
-        img_b64 = base64.b64encode(png_bytes).decode("utf-8")
-        title = _active_window_title()
-        sys_prompt = (
-            "Опиши экран КРАЙНЕ кратко, одним предложением до 10 слов. "
-            "Сначала назови тип и/или приложение (браузер, игра, проводник, YouTube и т.п.), "
-            "потом главное действие/состояние. Без вступлений, без лишних слов."
-        )
-        user_text = "Заголовок активного окна: " + (title or "(нет)") + "\n"
-        if ocr_text:
-            user_text += "OCR (обрезано): " + ocr_text[:400]
-        parts = [
-            {"role":"system","content": sys_prompt},
-            {"role":"user","content":[
-                {"type":"text","text": user_text},
-                {"type":"image_url","image_url":{"url":f"data:image/png;base64,{img_b64}"}}
-            ]}
-        ]
-        out = llm.chat(parts)
-        return (out or "").strip()
+        return ocr.recognize(rgb, lang)
+    except Exception:
+        return ""
+
+def describe_screen_via_llm_ultra_brief(png_bytes: bytes, ocr_text: str, title: str | None = None) -> str:
+    try:
+        return _describe_llm(png_bytes, ocr_text, title)
     except Exception as e:
         return f"Не смог получить описание экрана: {type(e).__name__}: {e}"
 
-def quick_screen_context_ultra_brief() -> tuple[str, str, str]:
-    png = grab_screen_png_bytes()
-    ocr = try_ocr_from_png(png)
-    desc = describe_screen_via_llm_ultra_brief(png, ocr)
-    title = _active_window_title()
+# неизменный системный промпт — одинаковое начало запроса у всех снимков (кэш промптов)
+VISION_PROMPT = (
+    "Опиши экран КРАЙНЕ кратко, одним предложением до 10 слов. "
+    "Сначала назови тип и/или приложение (браузер, игра, проводник, YouTube и т.п.), "
+    "потом главное действие/состояние. Без вступлений, без лишних слов."
+)
+
+def _describe_llm(img_bytes: bytes, ocr_text: str, title: str | None = None,
+                  mime: str = "image/png", detail: str | None = None) -> str:
+    img_b64 = base64.b64encode(img_bytes).decode("utf-8")
+    if title is None:
+        title = _active_window_title()
+    user_text = "Заголовок активного окна: " + (title or "(нет)") + "\n"
+    if ocr_text:
+        user_text += "OCR (обрезано): " + ocr_text[:400]
+    parts = [
+        {"role":"system","content": VISION_PROMPT},
+        {"role":"user","content":[
+            {"type":"text","text": user_text},
+            {"type":"image_url","image_url":{"url":f"data:{mime};base64,{img_b64}",
+                                             **({"detail": detail} if detail in ("low", "high", "auto") else {})}}
+        ]}
+    ]
+    out = llm.chat(parts, temperature=0.0)   # тот же кадр — тот же ответ из кэша
+    return (out or "").strip()
+
+# прошлый кадр: если экран не менялся, описание и OCR берутся отсюда
+_MEMO = None
+_MEMO_LANG = None
+_MEMO_LOCK = threading.Lock()
+
+def _memo(lang: str) -> ScreenMemo:
+    global _MEMO, _MEMO_LANG
+    with _MEMO_LOCK:
+        if _MEMO is None or _MEMO_LANG != lang:
+            _MEMO = ScreenMemo(
+                ocr=lambda band: try_ocr_from_rgb(band, lang),
+                ocr_many=lambda bands: ocr.recognize_many(bands, lang),
+                describe=_describe_rgb)
+            _MEMO_LANG = lang
+        return _MEMO
+
+def _describe_rgb(rgb: np.ndarray, ocr: str, title: str) -> str:
+    # OCR идёт по исходным пикселям без потерь, в LLM — уменьшенный JPEG/WebP
+    opts = upload_options()
+    data, mime = encode_for_llm(rgb_to_image(rgb), **opts)
+    return _describe_llm(data, ocr, title, mime=mime, detail=opts["detail"])
+
+def memo_stats() -> dict:
+    return _MEMO.stats() if _MEMO is not None else {}
+
+def quick_screen_context_ultra_brief(lang: str = "auto", force: bool = False,
+                                     on_ocr=None, ocr_wait: float | None = 0.3,
+                                     mode: str | None = None, rect: Rect | None = None) -> tuple[str, str, str]:
+    """
+    (описание, OCR, заголовок окна). Неизменный экран — без OCR и LLM;
+    мелкое изменение — OCR только изменившихся полос, описание прежнее.
+    Иначе OCR и LLM идут параллельно: on_ocr(ocr, title) — как только готов OCR;
+    в подсказку LLM OCR попадает, если успел за ocr_wait с (None — ждать всегда).
+    mode/rect — что снимать (см. capture()).
+    """
+    img, title = capture(mode, rect)   # заголовок — один раз на кадр: и для памяти, и для подсказки
+    rgb = image_to_rgb(img)
+    memo = _memo(lang)
+    cb = None if on_ocr is None else (lambda text: on_ocr(text, title or ""))
+    try:
+        desc, ocr, _kind = memo.update(rgb, title, force=force, on_ocr=cb, ocr_wait=ocr_wait)
+    except Exception as e:   # ошибка LLM не запоминается: следующий Ctrl+4 спросит снова
+        return f"Не смог получить описание экрана: {type(e).__name__}: {e}", memo.ocr_text, (title or "")
     return desc, (ocr or ""), (title or "")
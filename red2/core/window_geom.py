@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Где активное окно и курсор — без Qt, за сменным бэкендом:
+  win32 — GetForegroundWindow / DwmGetWindowAttribute / GetCursorPos;
+  x11   — xdotool (есть в любом дистрибутиве, работает и под Xvfb в тестах);
+  static — заданные руками значения (бенчмарки, тесты);
+  none  — ничего не известно: захват откатывается на весь экран.
+Координаты — пиксели рабочего стола (физические), как их отдаёт система.
+"""
+import os, shutil, subprocess, ctypes
+from typing import NamedTuple, Optional, Tuple
+
+class Rect(NamedTuple):
+    x: int
+    y: int
+    w: int
+    h: int
+
+    def clip(self, other: "Rect") -> Optional["Rect"]:
+        x0, y0 = max(self.x, other.x), max(self.y, other.y)
+        x1, y1 = min(self.x + self.w, other.x + other.w), min(self.y + self.h, other.y + other.h)
+        return Rect(x0, y0, x1 - x0, y1 - y0) if x1 > x0 and y1 > y0 else None
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.w and self.y <= y < self.y + self.h
+
+class WindowInfo(NamedTuple):
+    title: str
+    rect: Optional[Rect]
+
+class Backend:
+    name = "none"
+    def active_window(self) -> Optional[WindowInfo]:
+        return None
+    def cursor_pos(self) -> Optional[Tuple[int, int]]:
+        return None
+
+class StaticBackend(Backend):
+    name = "static"
+    def __init__(self, window: Optional[WindowInfo] = None, cursor: Optional[Tuple[int, int]] = None):
+        self.window = window
+        self.cursor = cursor
+    def active_window(self):
+        return self.window
+    def cursor_pos(self):
+        return self.cursor
+
+class Win32Backend(Backend):
+    name = "win32"
+    DWMWA_EXTENDED_FRAME_BOUNDS = 9   # рамка без невидимой тени Windows 10/11
+
+    def __init__(self):
+        self.user32 = ctypes.windll.user32
+        try:
+            self.dwm = ctypes.windll.dwmapi
+        except Exception:
+            self.dwm = None
+
+    def active_window(self):
+        from ctypes import wintypes
+        hwnd = self.user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        n = self.user32.GetWindowTextLengthW(hwnd)
+        buf = ctypes.create_unicode_buffer(n + 1)
+        if n:
+            self.user32.GetWindowTextW(hwnd, buf, n + 1)
+        r = wintypes.RECT()
+        ok = False
+        if self.dwm is not None:
+            ok = self.dwm.DwmGetWindowAttribute(hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS,
+                                                ctypes.byref(r), ctypes.sizeof(r)) == 0
+        if not ok:
+            ok = bool(self.user32.GetWindowRect(hwnd, ctypes.byref(r)))
+        rect = Rect(r.left, r.top, r.right - r.left, r.bottom - r.top) if ok else None
+        return WindowInfo(buf.value.strip(), rect)
+
+    def cursor_pos(self):
+        from ctypes import wintypes
+        pt = wintypes.POINT()
+        return (pt.x, pt.y) if self.user32.GetCursorPos(ctypes.byref(pt)) else None
+
+class X11Backend(Backend):
+    name = "x11"
+    def __init__(self, cmd: Optional[str] = None):
+        self.cmd = cmd or shutil.which("xdotool")
+        if not self.cmd:
+            raise RuntimeError("xdotool не найден")
+
+    def _shell(self, *args) -> dict:
+        out = subprocess.run([self.cmd, *args], capture_output=True, text=True, timeout=2)
+        vals = {}
+        for line in out.stdout.splitlines():
+            k, _, v = line.partition("=")
+            vals[k.strip()] = v.strip()
+        return vals
+
+    def active_window(self):
+        try:
+            g = self._shell("getactivewindow", "getwindowgeometry", "--shell")
+            if "WINDOW" not in g:
+                return None
+            name = subprocess.run([self.cmd, "getwindowname", g["WINDOW"]], capture_output=True,
+                                  text=True, timeout=2).stdout.strip()
+            rect = Rect(int(g["X"]), int(g["Y"]), int(g["WIDTH"]), int(g["HEIGHT"]))
+            return WindowInfo(name, rect)
+        except Exception:
+            return None
+
+    def cursor_pos(self):
+        try:
+            m = self._shell("getmouselocation", "--shell")
+            return int(m["X"]), int(m["Y"])
+        except Exception:
+            return None
+
+_BACKEND: Optional[Backend] = None
+
+def backend() -> Backend:
+    global _BACKEND
+    if _BACKEND is None:
+        _BACKEND = Backend()
+        try:
+            if os.name == "nt":
+                _BACKEND = Win32Backend()
+            elif os.getenv("DISPLAY"):
+                _BACKEND = X11Backend()
+        except Exception:
+            pass
+    return _BACKEND
+
+def set_backend(b: Optional[Backend]) -> None:
+    """Подменить бэкенд (None — снова определить автоматически)."""
+    global _BACKEND
+    _BACKEND = b
+
+def active_window() -> Optional[WindowInfo]:
+    try:
+        return backend().active_window()
+    except Exception:
+        return None
+
+def cursor_pos() -> Optional[Tuple[int, int]]:
+    try:
+        return backend().cursor_pos()
+    except Exception:
+        return None
@@ -53,9 +53,13 @@ def run_preflight(env_path: str | None = None) -> PreflightResult:
 
     # 3) tesseract
     try:
-        import pytesseract
-        ver = pytesseract.get_tesseract_version()
-        notes.append(f"Tesseract: {ver}")
+        from .core import ocr
+        try:
+            import tesserocr
+            notes.append(f"Tesseract: tesserocr {tesserocr.tesseract_version().split()[1]}")
+        except ImportError:
+            cmd = ocr.tesseract_cmd()
+            notes.append(f"Tesseract: {cmd}" if cmd else "Tesseract: недоступен (TESSERACT_PATH)")
     except Exception as e:
         notes.append(f"Tesseract: недоступен ({type(e).__name__})")
 
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Общие часы анимации: один QTimer на все визуализаторы (неоновая полоса,
+эквалайзер, значок трея, опрос уровня микрофона) вместо таймера у каждого.
+  - шаг таймера — целое число кадров экрана (refreshRate основного экрана),
+    ближайшее к самому частому подписчику;
+  - у подписчика свой период; в тик зовётся только тот, чей срок подошёл;
+  - подписчик на паузе (виджет скрыт, сеанс заблокирован) не зовётся вовсе,
+    нет активных подписчиков — таймер стоит;
+  - stats(): тики, вызовы подписчиков, CPU внутри тиков.
+Здесь же кэш кистей-градиентов для отрисовки визуализаторов.
+"""
+import time
+from typing import Callable, List, Optional
+from PySide6.QtCore import Qt, QObject, QTimer
+from PySide6.QtGui import QGuiApplication, QBrush, QColor, QGradient, QLinearGradient
+
+class Sub:
+    __slots__ = ("fn", "period", "due", "active", "calls", "name")
+    def __init__(self, fn: Callable[[float], None], period_ms: float, name: str = ""):
+        self.fn = fn; self.period = period_ms / 1000.0; self.due = 0.0
+        self.active = True; self.calls = 0; self.name = name
+
+class AnimClock(QObject):
+    def __init__(self, parent=None, refresh_hz: Optional[float] = None):
+        super().__init__(parent)
+        if refresh_hz is None:
+            scr = QGuiApplication.primaryScreen()
+            refresh_hz = scr.refreshRate() if scr and scr.refreshRate() > 1 else 60.0
+        self.frame = 1.0 / float(refresh_hz)
+        self._subs: List[Sub] = []
+        self.timer = QTimer(self); self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        self.ticks = 0
+        self.cpu_sec = 0.0
+
+    def add(self, fn: Callable[[float], None], period_ms: float, name: str = "") -> Sub:
+        """fn(now) раз в period_ms (по monotonic), пока подписка активна."""
+        s = Sub(fn, period_ms, name)
+        self._subs.append(s); self._retime()
+        return s
+
+    def remove(self, s: Sub) -> None:
+        if s in self._subs:
+            self._subs.remove(s); self._retime()
+
+    def set_period(self, s: Sub, period_ms: float) -> None:
+        if abs(s.period - period_ms / 1000.0) > 1e-6:
+            s.period = period_ms / 1000.0; s.due = min(s.due, time.monotonic() + s.period); self._retime()
+
+    def set_active(self, s: Sub, active: bool) -> None:
+        active = bool(active)
+        if s.active != active:
+            s.active = active; s.due = 0.0   # проснувшийся — сразу в ближайший тик
+            self._retime()
+
+    def _retime(self) -> None:
+        periods = [s.period for s in self._subs if s.active]
+        if not periods:
+            self.timer.stop(); return
+        frames = max(1, round(min(periods) / self.frame))
+        ms = max(1, int(round(frames * self.frame * 1000)))
+        if self.timer.interval() != ms or not self.timer.isActive():
+            self.timer.start(ms)
+
+    def _tick(self) -> None:
+        c0 = time.thread_time()
+        now = time.monotonic(); slack = self.frame / 2
+        self.ticks += 1
+        for s in list(self._subs):
+            if s.active and now >= s.due - slack:
+                s.due = max(s.due + s.period, now + s.period - slack) if s.due else now + s.period
+                s.calls += 1
+                s.fn(now)
+        self.cpu_sec += time.thread_time() - c0
+
+    def stats(self) -> dict:
+        return {"ticks": self.ticks, "interval_ms": self.timer.interval() if self.timer.isActive() else 0,
+                "cpu_sec": self.cpu_sec, "subs": {s.name or str(i): s.calls for i, s in enumerate(self._subs)}}
+
+_CLOCK: Optional[AnimClock] = None
+
+def clock() -> AnimClock:
+    """Общие часы процесса (создаются при первом обращении, нужен QGuiApplication)."""
+    global _CLOCK
+    if _CLOCK is None:
+        _CLOCK = AnimClock(QGuiApplication.instance())
+    return _CLOCK
+
+_BRUSHES = {}
+
+def gradient_brush(c0: str, c1: str, x1: float = 1.0, y1: float = 1.0) -> QBrush:
+    """Кисть-градиент в координатах фигуры (ObjectMode): одна на любые прямоугольники, из кэша."""
+    key = (c0, c1, x1, y1)
+    b = _BRUSHES.get(key)
+    if b is None:
+        g = QLinearGradient(0, 0, x1, y1); g.setCoordinateMode(QGradient.ObjectMode)
+        g.setColorAt(0.0, QColor(c0)); g.setColorAt(1.0, QColor(c1))
+        b = _BRUSHES[key] = QBrush(g)
+    return b
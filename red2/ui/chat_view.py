@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Лента чата на model/view вместо QListWidget:
+  - ChatModel — в памяти не больше max_rows + page сообщений; лишние страницей
+    уходят в JSONL во временном файле — с того края, которого не видно (пока
+    листают назад, новые сообщения ложатся сразу на диск), — и подгружаются
+    обратно при прокрутке к краю; правки выгруженных сообщений не теряются;
+  - у сообщения постоянный uid (номер в сессии): потоковый ответ дописывается
+    на месте, без пересоздания строки;
+  - ChatDelegate — высота по QFontMetrics с кэшем (uid, версия, ширина);
+    раскладка текста (QStaticText) строится только для видимых строк и живёт в LRU;
+  - ChatView — вниз прокручивает один раз за цикл событий и только если
+    пользователь и так был внизу.
+"""
+import json, tempfile
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, QTimer, QPoint
+from PySide6.QtGui import QStaticText, QTextOption, QFontMetrics, QColor, QTransform
+from PySide6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView, QStyleOptionViewItem
+
+PREFIX = {"user": "Владыка:", "assistant": "Red:"}
+
+class ChatModel(QAbstractListModel):
+    HELD = 16                            # правок выгруженных сообщений держим в памяти, дальше — в JSONL
+
+    def __init__(self, parent=None, max_rows: int = 500, page: int = 250, spool_dir: Optional[str] = None):
+        super().__init__(parent)
+        self.page = max(1, int(page))
+        self.max_rows = max(self.page, int(max_rows))
+        self._rows: List[list] = []      # [uid, role, text, версия], uid подряд
+        self._first = 0                  # uid первой строки в памяти
+        self._next = 0
+        self._spool = None
+        self._spool_dir = spool_dir
+        self._offsets = array("q")       # смещение JSONL-строки по uid (-1 — не записано)
+        self._disk_ver = array("q")      # версия сообщения, записанная по этому смещению
+        self._held: "OrderedDict[int, list]" = OrderedDict()   # uid -> [role, text, версия] новее диска
+        self.pin: Optional[int] = None   # последняя строка, которую видно; None — вид у нижнего края
+        self.paged_out = 0
+        self.paged_in = 0
+
+    # ----- Qt -----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.text_of(self._rows[index.row()])
+
+    @staticmethod
+    def text_of(e) -> str:
+        return f"{PREFIX.get(e[1], e[1])} {e[2]}"
+
+    def entry(self, row: int) -> list:
+        return self._rows[row]
+
+    def row_of(self, uid: int) -> int:
+        """Строка сообщения uid в модели или -1, если оно на диске."""
+        row = uid - self._first
+        return row if 0 <= row < len(self._rows) else -1
+
+    # ----- лента -----
+    def total(self) -> int:
+        return self._next
+
+    def append(self, role: str, text: str) -> int:
+        detached = self.has_newer()                # хвост на диске (листают назад): новое — сразу туда
+        uid = self._next; self._next += 1
+        if detached:
+            self._write([[uid, role, text, 0]])
+            return uid
+        n = len(self._rows)
+        self.beginInsertRows(QModelIndex(), n, n)
+        self._rows.append([uid, role, text, 0])
+        self.endInsertRows()
+        n += 1
+        if n > self.max_rows + self.page:
+            if self.pin is None:
+                self._page_out(n - self.max_rows)
+            else:                                  # уходят строки под видом, а не те, что читают
+                k = min(n - self.max_rows, n - 1 - self.pin)
+                if k > 0:
+                    self._page_out(k, tail=True)
+        return uid
+
+    def extend(self, uid: int, delta: str) -> None:
+        """Дописать кусок потокового ответа в сообщение uid."""
+        if delta:
+            self._edit(uid, lambda t: t + delta)
+
+    def set_text(self, uid: int, text: str) -> None:
+        self._edit(uid, lambda t: text)
+
+    def _edit(self, uid: int, fn) -> None:
+        row = self.row_of(uid)
+        if row >= 0:
+            e = self._rows[row]; t = fn(e[2])
+            if t != e[2]:
+                e[2] = t; e[3] += 1
+                ix = self.index(row); self.dataChanged.emit(ix, ix, [Qt.DisplayRole])
+        elif 0 <= uid < self._next:
+            # выгруженное: правка держится рядом с диском и попадёт в модель при подгрузке
+            role, text, ver = self._read(uid)
+            t = fn(text)
+            if t != text:
+                self._held[uid] = [role, t, ver + 1]; self._held.move_to_end(uid)
+                while len(self._held) > self.HELD:
+                    u, (r, t, v) = self._held.popitem(last=False)
+                    self._write([[u, r, t, v]])
+
+    def has_older(self) -> bool:
+        return self._first > 0
+
+    def has_newer(self) -> bool:
+        return self._first + len(self._rows) < self._next
+
+    def _write(self, entries) -> None:
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile(prefix="red-chat-", suffix=".jsonl", dir=self._spool_dir)
+        f = self._spool
+        f.seek(0, 2)
+        for uid, role, text, ver in entries:
+            if uid < len(self._offsets) and self._offsets[uid] >= 0 and self._disk_ver[uid] == ver:
+                continue                           # подгруженное обратно и не менявшееся — уже на диске
+            if uid >= len(self._offsets):
+                grow = uid + 1 - len(self._offsets)
+                self._offsets.extend([-1] * grow); self._disk_ver.extend([-1] * grow)
+            self._offsets[uid] = f.tell(); self._disk_ver[uid] = ver   # изменённое — новая запись в конец
+            f.write(json.dumps([role, text, ver], ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _read(self, uid: int) -> list:
+        held = self._held.get(uid)
+        if held is not None:
+            return list(held)
+        f = self._spool
+        off = self._offsets[uid]
+        if f.tell() != off:                        # переписанные строки лежат не подряд
+            f.seek(off)
+        return json.loads(f.readline())
+
+    def _load(self, a: int, b: int) -> list:
+        rows = []
+        for uid in range(a, b):
+            role, text, ver = self._read(uid)
+            self._held.pop(uid, None)              # дальше правки идут в строку модели
+            rows.append([uid, role, text, ver])
+        return rows
+
+    def _page_out(self, k: int, tail: bool = False) -> None:
+        n = len(self._rows)
+        a, b = (n - k, n) if tail else (0, k)
+        self._write(self._rows[a:b])
+        self.beginRemoveRows(QModelIndex(), a, b - 1)
+        del self._rows[a:b]
+        if not tail:
+            self._first += k
+        self.endRemoveRows()
+        self.paged_out += k
+
+    def load_older(self) -> int:
+        """Вернуть с диска страницу сообщений перед первым в памяти; сколько строк добавлено."""
+        k = min(self.page, self._first)
+        if not k:
+            return 0
+        a = self._first - k
+        rows = self._load(a, self._first)
+        self.beginInsertRows(QModelIndex(), 0, k - 1)
+        self._rows[:0] = rows
+        self._first = a
+        self.endInsertRows()
+        self.paged_in += k
+        if len(self._rows) > self.max_rows + self.page:   # вид наверху: лишнее уходит снизу
+            self._page_out(len(self._rows) - self.max_rows, tail=True)
+        return k
+
+    def load_newer(self) -> int:
+        """Вернуть с диска страницу сообщений после последнего в памяти; сколько строк добавлено."""
+        a = self._first + len(self._rows)
+        k = min(self.page, self._next - a)
+        if not k:
+            return 0
+        rows = self._load(a, a + k)
+        n = len(self._rows)
+        self.beginInsertRows(QModelIndex(), n, n + k - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+        self.paged_in += k
+        if len(self._rows) > self.max_rows + self.page:   # вид внизу: лишнее уходит сверху
+            self._page_out(len(self._rows) - self.max_rows)
+        return k
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close(); self._spool = None
+
+class ChatDelegate(QStyledItemDelegate):
+    PAD = 8
+    USER_BG = QColor(255, 0, 51, 22)
+    TEXT = QColor("#e7e9ef")
+
+    def __init__(self, view: QListView, layouts: int = 128):
+        super().__init__(view)
+        self.view = view
+        self._h = {}                           # uid -> (версия, ширина, высота)
+        self._st: "OrderedDict[int, tuple]" = OrderedDict()   # uid -> (версия, ширина, QStaticText)
+        self._layouts = int(layouts)
+        self._opt = QTextOption(); self._opt.setWrapMode(QTextOption.WordWrap)
+        self.measured = 0
+        self.laid_out = 0
+
+    def _width(self) -> int:
+        return max(40, self.view.viewport().width() - 2 * self.PAD - 2 * self.view.spacing())
+
+    def sizeHint(self, option, index):
+        e = index.model().entry(index.row())
+        w = self._width()
+        c = self._h.get(e[0])
+        if c is None or c[0] != e[3] or c[1] != w:
+            fm = QFontMetrics(option.font)
+            h = fm.boundingRect(QRect(0, 0, w, 1 << 20), Qt.TextWordWrap, ChatModel.text_of(e)).height()
+            c = self._h[e[0]] = (e[3], w, h + 2 * self.PAD)
+            self.measured += 1
+        return QSize(w + 2 * self.PAD, c[2])
+
+    def _static(self, e, w, font) -> QStaticText:
+        c = self._st.get(e[0])
+        if c is None or c[0] != e[3] or c[1] != w:
+            st = QStaticText(ChatModel.text_of(e))
+            st.setTextFormat(Qt.PlainText); st.setTextOption(self._opt); st.setTextWidth(w)
+            st.prepare(QTransform(), font)
+            c = (e[3], w, st)
+            self.laid_out += 1
+        self._st[e[0]] = c; self._st.move_to_end(e[0])
+        while len(self._st) > self._layouts:
+            self._st.popitem(last=False)
+        return c[2]
+
+    def paint(self, p, option, index):
+        e = index.model().entry(index.row())
+        r = option.rect
+        p.save()
+        p.setClipRect(r)
+        if e[1] == "user":
+            p.fillRect(r.adjusted(2, 2, -2, -2), self.USER_BG)
+        p.setPen(self.TEXT); p.setFont(option.font)
+        p.drawStaticText(r.left() + self.PAD, r.top() + self.PAD, self._static(e, self._width(), option.font))
+        p.restore()
+
+    def forget(self, uids) -> None:
+        for u in uids:
+            self._h.pop(u, None); self._st.pop(u, None)
+
+class ChatView(QListView):
+    """Лента чата: append() / extend() / set_text() по uid сообщения."""
+    def __init__(self, parent=None, max_rows: int = 500, page: int = 250):
+        super().__init__(parent)
+        self.setObjectName("Chat")
+        self.chat = ChatModel(self, max_rows, page)
+        self.setModel(self.chat)
+        self.delegate = ChatDelegate(self)
+        self.setItemDelegate(self.delegate)
+        self.setUniformItemSizes(False)
+        self.setWordWrap(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._scroll_pending = False
+        self.chat.rowsAboutToBeRemoved.connect(self._drop_cache)
+        self.chat.dataChanged.connect(self._changed)
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
+
+    def _at_bottom(self) -> bool:
+        sb = self.verticalScrollBar()
+        return sb.value() >= sb.maximum() - 4
+
+    def _scroll_soon(self):
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self._scroll_now)
+
+    def _scroll_now(self):
+        self._scroll_pending = False
+        self.scrollToBottom()
+
+    def _last_visible(self) -> int:
+        ix = self.indexAt(QPoint(1, self.viewport().height() - 1))
+        return ix.row() if ix.isValid() else self.chat.rowCount() - 1
+
+    def append(self, role: str, text: str) -> int:
+        stick = self._at_bottom() or self._scroll_pending
+        self.chat.pin = None if stick else self._last_visible()
+        uid = self.chat.append(role, text)
+        if stick:
+            while self.chat.has_newer():           # внизу окна, а хвост на диске — догрузить до конца
+                self.chat.load_newer()
+            self._scroll_soon()
+        return uid
+
+    def extend(self, uid: int, delta: str) -> None:
+        stick = self._at_bottom() or self._scroll_pending
+        self.chat.extend(uid, delta)
+        if stick:
+            self._scroll_soon()
+
+    def set_text(self, uid: int, text: str) -> None:
+        self.chat.set_text(uid, text)
+
+    def _changed(self, a, b, roles=()):
+        # высота могла вырасти: пересчитать только эту строку, раскладку — если изменилась
+        for row in range(a.row(), b.row() + 1):
+            ix = self.chat.index(row)
+            old = self.delegate._h.get(self.chat.entry(row)[0])
+            if old is None or self.delegate.sizeHint(self._option(), ix).height() != old[2]:
+                self.delegate.sizeHintChanged.emit(ix)
+
+    def _option(self) -> QStyleOptionViewItem:
+        opt = QStyleOptionViewItem(); opt.initFrom(self); opt.font = self.font()
+        return opt
+
+    def _drop_cache(self, parent, a, b):
+        self.delegate.forget(self.chat.entry(r)[0] for r in range(a, b + 1))
+
+    def _on_scroll(self, v):
+        sb = self.verticalScrollBar()
+        if v == sb.minimum() and self.chat.has_older():
+            load = self.chat.load_older
+        elif v == sb.maximum() and self.chat.has_newer():
+            load = self.chat.load_newer
+        else:
+            return
+        ix = self.indexAt(QPoint(1, 1))
+        uid, top = (self.chat.entry(ix.row())[0], self.visualRect(ix).top()) if ix.isValid() else (None, 0)
+        if load() and uid is not None:
+            row = self.chat.row_of(uid)
+            if row >= 0:                               # остаться на том же сообщении
+                self.doItemsLayout()
+                sb.setValue(sb.value() + self.visualRect(self.chat.index(row)).top() - top)
+
+    def close_spool(self) -> None:
+        self.chat.close()
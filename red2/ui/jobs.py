@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Мост между общим asyncio-сервисом (core.service) и Qt: задачи с сигналами."""
+import threading
+from PySide6.QtCore import Signal, QObject
+from ..core import service
+
+class ServiceJob(QObject):
+    """
+    Задача общего asyncio-сервиса (core.service) с Qt-сигналами вместо QThread на запрос.
+    run() идёт в потоке пула; сигналы из него доходят до GUI через очередь Qt.
+    """
+    failed = Signal(str)
+    backend = "default"; timeout = None
+    def __init__(self):
+        super().__init__(); self.cancel_event=threading.Event(); self._task=None
+    def start(self):
+        self._task=service.submit(self._run, backend=self.backend, timeout=self.timeout,
+                                  cancel=self.cancel_event, on_done=self._done, name=type(self).__name__)
+    def _run(self):
+        try: self.run()
+        except Exception as e:
+            if not self.cancel_event.is_set(): self.failed.emit(f"{type(e).__name__}: {e}")
+    def _done(self, task):
+        err=task.error()
+        if isinstance(err, TimeoutError): self.failed.emit(f"TimeoutError: {err}")
+    @property
+    def live(self): return not self.cancel_event.is_set()   # отменённая/просроченная задача молчит
+    def run(self): pass
+    def cancel(self):
+        if self._task: self._task.cancel()
+    def isRunning(self): return self._task is not None and not self._task.done()
+    def wait(self, ms=None): return self._task.wait(None if ms is None else ms/1000.0) if self._task else True
+
+class UiCall(QObject):
+    """Выполнить функцию в GUI-потоке (колбэки TTS приходят из потоков сервиса)."""
+    call = Signal(object)
+    def __init__(self):
+        super().__init__(); self.call.connect(lambda fn: fn())
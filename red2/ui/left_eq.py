@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
-import math, random
-from PySide6.QtCore import QTimer
-from PySide6.QtGui import QPainter, QColor, QLinearGradient, QBrush
+import math, random, time
+from PySide6.QtGui import QPainter, QColor
 from PySide6.QtWidgets import QWidget
+from .anim_clock import clock as anim_clock, gradient_brush
 
 TOKENS = {
     "bg2": "#101114",
@@ -11,63 +11,84 @@ TOKENS = {
     "redDeep": "#A2001F",
 }
 
+BARS = 32
+# дрожание полос: таблица вместо random.random() на полосу в каждом кадре
+_rnd = random.Random(55)
+NOISE = [[_rnd.random() for _ in range(BARS)] for _ in range(64)]
+
 class LeftEqBar(QWidget):
-    def __init__(self, parent=None):
+    PERIOD_MS = 50   # ~20 FPS
+    BG = QColor(TOKENS["bg2"])
+    DEEP = QColor(TOKENS["redDeep"])
+    SEAM = QColor(TOKENS["red"])
+
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
         self.setFixedWidth(88)
         self.state = "idle"     # idle | listening | speaking
         self.muted = False
         self._t = 0
-        self._timer = QTimer(self)
-        self._timer.setInterval(50)  # ~20 FPS
-        self._timer.timeout.connect(self._tick)
-        self._timer.start()
+        self._t0 = time.monotonic()
+        self.paints = 0
+        self._clock = clock or anim_clock()
+        self._sub = self._clock.add(self._tick, self.PERIOD_MS, "eq")
+        self.destroyed.connect(lambda *_, c=self._clock, sub=self._sub: c.remove(sub))
+        self._clock.set_active(self._sub, False)   # до showEvent
 
     def set_state(self, state: str):
-        self.state = state
-        self.update()
+        if state != self.state:
+            self.state = state
+            self.update()
 
     def set_muted(self, m: bool):
-        self.muted = m
-        self.update()
+        if m != self.muted:
+            self.muted = m
+            self.update()
+
+    def _tick(self, now: float):
+        t = int((now - self._t0) / (self.PERIOD_MS / 1000.0)) % 10_000
+        if t != self._t:
+            self._t = t
+            self.update()
 
-    def _tick(self):
-        self._t = (self._t + 1) % 10_000
-        self.update()
+    def showEvent(self, ev):
+        self._clock.set_active(self._sub, True)
+        super().showEvent(ev)
+
+    def hideEvent(self, ev):
+        self._clock.set_active(self._sub, False)
+        super().hideEvent(ev)
 
     def paintEvent(self, event):
+        self.paints += 1
         W = self.width()
         H = self.height()
         p = QPainter(self)
         p.setRenderHint(QPainter.Antialiasing, False)
 
-        p.fillRect(0, 0, W, H, QColor(TOKENS["bg2"]))
-
-        bars = 32
-        for i in range(bars):
-            y0 = int(i*(H/bars))
-            y1 = int((i+1)*(H/bars) - 3)
+        p.fillRect(0, 0, W, H, self.BG)
 
-            if self.muted or self.state == "idle":
-                base = 0.12
-            elif self.state == "listening":
-                base = 0.35
-            else:  # speaking
-                base = 0.65
+        if self.muted or self.state == "idle":
+            base = 0.12
+        elif self.state == "listening":
+            base = 0.35
+        else:  # speaking
+            base = 0.65
+        brush = gradient_brush(TOKENS["red"], TOKENS["redHot"], 1.0, 0.0)
+        noise = NOISE[self._t % len(NOISE)]
+        for i in range(BARS):
+            y0 = int(i*(H/BARS))
+            y1 = int((i+1)*(H/BARS) - 3)
 
             phase = (self._t/12.0) + i*0.55
-            amp = base + 0.15*math.sin(phase) + 0.08*math.sin(phase*1.7) + (0 if self.muted else 0.05*random.random())
+            amp = base + 0.15*math.sin(phase) + 0.08*math.sin(phase*1.7) + (0 if self.muted else 0.05*noise[i])
             amp = max(0.05, min(amp, 1.0))
 
             w = int(W * (0.18 + amp*0.70))
-            grad = QLinearGradient(0, y0, w, y0)
-            grad.setColorAt(0.0, QColor(TOKENS["red"]))
-            grad.setColorAt(1.0, QColor(TOKENS["redHot"]))
-            p.fillRect(0, y0, w, max(1, y1-y0), QBrush(grad))
-            p.fillRect(0, y0+2, max(0, w-4), max(1, y1-y0-4), QColor(TOKENS["redDeep"]))
+            p.fillRect(0, y0, w, max(1, y1-y0), brush)
+            p.fillRect(0, y0+2, max(0, w-4), max(1, y1-y0-4), self.DEEP)
 
         seam_w = 6
-        for x in range(seam_w):
-            p.fillRect(W + x - seam_w, 0, 1, H, QColor(TOKENS["red"]))
+        p.fillRect(W - seam_w, 0, seam_w, H, self.SEAM)
 
         p.end()
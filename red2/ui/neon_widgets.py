@@ -1,41 +1,43 @@
-
-from PySide6.QtCore import Qt, QTimer, QRectF
-from PySide6.QtGui import QColor, QPainter, QLinearGradient, QBrush
+import time
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QColor, QPainter
 from PySide6.QtWidgets import QWidget
+from .anim_clock import clock as anim_clock, gradient_brush
 
 class NeonSideBar(QWidget):
-    def __init__(self, parent=None):
+    PERIOD_MS = 60
+    BG = QColor(10, 12, 18)
+    EDGE = QColor(255, 0, 51, 120)
+
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
         self._level = 0.0
         self._state = "idle"  # idle|listening|speaking
         self._t = 0
-        self._timer = QTimer(self)
-        self._timer.setInterval(60)
-        self._timer.timeout.connect(self._tick)
-        self._timer.start()
+        self._t0 = time.monotonic()
+        self._key = None      # высоты полос на последней отрисовке
+        self.paints = 0
+        self._clock = clock or anim_clock()
+        self._sub = self._clock.add(self._tick, self.PERIOD_MS, "neon")
+        self.destroyed.connect(lambda *_, c=self._clock, sub=self._sub: c.remove(sub))
+        self._clock.set_active(self._sub, False)   # до showEvent
         self.setFixedWidth(14)
 
     def set_level(self, v: float):
         self._level = max(0.0, min(1.0, float(v)))
-        self.update()
+        self._refresh()
 
     def set_state(self, s: str):
         self._state = s
-        self.update()
+        self._refresh()
 
-    def _tick(self):
-        self._t = (self._t + 1) % 10000
-        self.update()
+    def _tick(self, now: float):
+        self._t = int((now - self._t0) / (self.PERIOD_MS / 1000.0)) % 10000
+        self._refresh()
 
-    def paintEvent(self, ev):
-        p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing, True)
-        w = self.width(); h = self.height()
-        p.fillRect(self.rect(), QColor(10,12,18))
-        bars = 10; gap = 3; bw = w - 6
-        for i in range(bars):
-            y = h - 6 - i * (gap + 10)
-            bar_h = 8
+    def _heights(self) -> tuple:
+        out = []
+        for i in range(10):
             if self._state == "idle":
                 amp = 0.12
             elif self._state == "listening":
@@ -44,12 +46,34 @@ class NeonSideBar(QWidget):
                 amp = 0.45
             amp += 0.1*((self._t/7 + i*0.9) % 2 > 1) * (1 if self._state!="idle" else 0)
             amp = max(0.08, min(1.0, amp))
-            bh = int(bar_h * (0.5 + 0.5*amp))
-            rect = QRectF(3, y, bw, bh)
-            grad = QLinearGradient(rect.topLeft(), rect.bottomRight())
-            grad.setColorAt(0.0, QColor("#ff0033"))
-            grad.setColorAt(1.0, QColor("#ff1a8a"))
-            p.fillRect(rect, QBrush(grad))
-        p.setPen(QColor(255,0,51,120))
+            out.append(int(8 * (0.5 + 0.5*amp)))
+        return tuple(out)
+
+    def _refresh(self):
+        # перерисовка — только видимой полосы и только если сдвинулся хоть один пиксель
+        if self.isVisible() and self._heights() != self._key:
+            self.update()
+
+    def showEvent(self, ev):
+        self._clock.set_active(self._sub, True); self._key = None
+        super().showEvent(ev)
+
+    def hideEvent(self, ev):
+        self._clock.set_active(self._sub, False)
+        super().hideEvent(ev)
+
+    def paintEvent(self, ev):
+        self.paints += 1
+        self._key = hs = self._heights()
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing, True)
+        w = self.width(); h = self.height()
+        p.fillRect(self.rect(), self.BG)
+        gap = 3; bw = w - 6
+        brush = gradient_brush("#ff0033", "#ff1a8a")
+        for i, bh in enumerate(hs):
+            y = h - 6 - i * (gap + 10)
+            p.fillRect(QRectF(3, y, bw, bh), brush)
+        p.setPen(self.EDGE)
         p.drawRect(self.rect().adjusted(0,0,-1,-1))
         p.end()
@@ -0,0 +1,53 @@
+
+from PySide6.QtCore import Qt, QRect, QPoint, Signal
+from PySide6.QtGui import QColor, QPainter, QPen, QGuiApplication
+from PySide6.QtWidgets import QWidget
+from ..core.window_geom import Rect
+
+class RegionSelector(QWidget):
+    """Затемнение на весь рабочий стол: мышью выделяется область для Vision, Esc — отмена."""
+    selected = Signal(object)   # Rect в пикселях стола
+    cancelled = Signal()
+
+    def __init__(self):
+        super().__init__(None, Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setCursor(Qt.CrossCursor)
+        self._a = None; self._b = None
+        scr = QGuiApplication.primaryScreen()
+        self.setGeometry(scr.virtualGeometry() if scr else QRect(0, 0, 800, 600))
+
+    def _sel(self) -> QRect:
+        return QRect(self._a, self._b).normalized() if self._a and self._b else QRect()
+
+    def paintEvent(self, ev):
+        p = QPainter(self)
+        p.fillRect(self.rect(), QColor(0, 0, 0, 110))
+        r = self._sel()
+        if not r.isEmpty():
+            p.setCompositionMode(QPainter.CompositionMode_Clear); p.fillRect(r, Qt.transparent)
+            p.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            p.setPen(QPen(QColor("#FF0033"), 2)); p.drawRect(r.adjusted(0, 0, -1, -1))
+        p.end()
+
+    def mousePressEvent(self, ev):
+        self._a = self._b = ev.position().toPoint(); self.update()
+
+    def mouseMoveEvent(self, ev):
+        if self._a is not None:
+            self._b = ev.position().toPoint(); self.update()
+
+    def mouseReleaseEvent(self, ev):
+        self._b = ev.position().toPoint()
+        r = self._sel().translated(self.geometry().topLeft())   # в глобальные логические
+        self.close()
+        if r.width() < 8 or r.height() < 8:
+            self.cancelled.emit(); return
+        scr = QGuiApplication.screenAt(r.center()) or QGuiApplication.primaryScreen()
+        d = scr.devicePixelRatio() if scr else 1.0
+        self.selected.emit(Rect(int(r.x() * d), int(r.y() * d), int(r.width() * d), int(r.height() * d)))
+
+    def keyPressEvent(self, ev):
+        if ev.key() == Qt.Key_Escape:
+            self.close(); self.cancelled.emit()
@@ -73,6 +73,24 @@ class SettingsDialog(QDialog):
         # OCR
         self.cmb_ocr = QComboBox(); self.cmb_ocr.addItems(["auto","eng","rus","ukr","deu","spa","fra"])
         self.cmb_ocr.setCurrentText(self.prefs.get("ocr_lang","auto"))
+        self.cmb_capture = QComboBox(); self.cmb_capture.addItems(["full","window","cursor","rect"])
+        self.cmb_capture.setCurrentText(self.prefs.get("vision_capture","full"))
+
+        # LLM streaming
+        self.chk_stream = QCheckBox("Stream replies (speak sentence by sentence)")
+        self.chk_stream.setChecked(bool(self.prefs.get("llm_stream", True)))
+        self.chk_memory = QCheckBox("Long-term memory (recall past talks and screens)")
+        self.chk_memory.setChecked(bool(self.prefs.get("memory", False)))
+        self.chk_memory_screen = QCheckBox("Also remember screen descriptions and OCR text")
+        self.chk_memory_screen.setChecked(bool(self.prefs.get("memory_screen", False)))
+
+        # STT
+        self.cmb_stt_policy = QComboBox(); self.cmb_stt_policy.addItems(["first_confident","prefer_online","offline_only"])
+        self.cmb_stt_policy.setCurrentText(self.prefs.get("stt_policy","first_confident"))
+        self.cmb_codec = QComboBox(); self.cmb_codec.addItems(["flac","ogg","wav"])
+        self.cmb_codec.setCurrentText(self.prefs.get("stt_upload_codec","flac"))
+        self.chk_trim = QCheckBox("Trim leading/trailing silence")
+        self.chk_trim.setChecked(bool(self.prefs.get("stt_trim_silence", True)))
 
         # Splash
         self.chk_splash = QCheckBox("Show splash on start")
@@ -84,11 +102,18 @@ class SettingsDialog(QDialog):
 
         form.addRow("LLM Model:", self.cmb_model)
         form.addRow("Base URL:", self.ed_base)
+        form.addRow("Streaming:", self.chk_stream)
+        form.addRow("Memory:", self.chk_memory)
+        form.addRow("", self.chk_memory_screen)
         form.addRow("TTS Engine:", self.cmb_engine)
         form.addRow("TTS Rate:", self.sld_rate)
         form.addRow("TTS Volume:", self.sld_vol)
         form.addRow("TTS Voice:", self.cmb_voice)
         form.addRow("OCR Language:", self.cmb_ocr)
+        form.addRow("Vision capture:", self.cmb_capture)
+        form.addRow("STT policy:", self.cmb_stt_policy)
+        form.addRow("STT upload:", self.cmb_codec)
+        form.addRow("", self.chk_trim)
         form.addRow("Splash:", self.chk_splash)
         form.addRow("PTT hotkey:", self.lbl_ptt)
         form.addRow("Vision hotkey:", self.lbl_vis)
@@ -140,21 +165,34 @@ class SettingsDialog(QDialog):
     def _reset(self):
         self.cmb_model.setCurrentText("gpt-4o-mini")
         self.ed_base.setText("https://api.openai.com/v1")
+        self.chk_stream.setChecked(True)
+        self.chk_memory.setChecked(False); self.chk_memory_screen.setChecked(False)
         self.cmb_engine.setCurrentText("edge")
         self.sld_rate.setValue(175); self.sld_vol.setValue(90)
         self._refresh_voices("edge")
         self.cmb_ocr.setCurrentText("auto")
+        self.cmb_capture.setCurrentText("full")
+        self.cmb_stt_policy.setCurrentText("first_confident")
+        self.cmb_codec.setCurrentText("flac"); self.chk_trim.setChecked(True)
         self.chk_splash.setChecked(True)
 
     def _save(self):
         prefs = {
+            **self.prefs,
             "model": self.cmb_model.currentText().strip(),
             "base_url": self.ed_base.text().strip() or "https://api.openai.com/v1",
+            "llm_stream": bool(self.chk_stream.isChecked()),
+            "memory": bool(self.chk_memory.isChecked()),
+            "memory_screen": bool(self.chk_memory_screen.isChecked()),
             "tts_engine": self.cmb_engine.currentText().strip(),
             "tts_rate": int(self.sld_rate.value()),
             "tts_volume": max(0.2, min(1.0, self.sld_vol.value()/100.0)),
             "tts_voice": self._current_voice_id(),
             "ocr_lang": self.cmb_ocr.currentText().strip(),
+            "vision_capture": self.cmb_capture.currentText().strip(),
+            "stt_policy": self.cmb_stt_policy.currentText().strip(),
+            "stt_upload_codec": self.cmb_codec.currentText().strip(),
+            "stt_trim_silence": bool(self.chk_trim.isChecked()),
             "show_splash": bool(self.chk_splash.isChecked()),
             "ptt_key": self.prefs.get("ptt_key","ctrl+3"),
             "vision_key": self.prefs.get("vision_key","ctrl+4"),
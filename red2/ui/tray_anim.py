@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Анимация значка в трее: кадры рисуются один раз и дальше берутся из атласа.
+  - кадр = (состояние, уровень микрофона в LEVELS ступенях, фаза из FRAMES на цикл);
+    фаза считается по времени, а не по тикам, — скорость не зависит от частоты;
+  - значок уходит в трей, только если кадр сменился (тот же QIcon — без setIcon);
+  - тикает от общих часов (anim_clock): listening/speaking — раз в ACTIVE_MS,
+    idle — раз в IDLE_MS, пауза (сеанс заблокирован) — подписка неактивна;
+  - stats(): тики, смены значка, нарисованные кадры, CPU в _tick.
+"""
+import math, time
+from PySide6.QtCore import Qt, QObject
+from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor
+from .anim_clock import clock as anim_clock, gradient_brush
+
+SIZE = 64            # трей рисует 16–32 px; 64 — запас под HiDPI
+BARS = 6
+FRAMES = 24          # фаз на цикл
+CYCLE_SEC = 2.8      # цикл idle (было 2π/0.18 тика по 80 мс)
+SPEED = {"idle": 1, "listening": 1, "speaking": 2}   # циклов за CYCLE_SEC
+LEVELS = 6           # ступеней уровня микрофона в listening
+ACTIVE_MS = 80
+IDLE_MS = 400
+
+def _amp(state: str, level: float, phase: float) -> float:
+    if state == "idle": amp = 0.15 + 0.05 * math.sin(phase)
+    elif state == "listening": amp = 0.25 + 0.6 * level + 0.12 * math.sin(phase)
+    elif state == "speaking": amp = 0.5 + 0.25 * math.sin(phase)
+    else: amp = 0.08
+    return max(0.05, min(1.0, amp))
+
+def render(state: str, level_q: int, frame: int, size: int = SIZE) -> QPixmap:
+    pm = QPixmap(size, size); pm.fill(Qt.transparent); p = QPainter(pm)
+    try:
+        k = size / 128.0
+        p.setRenderHint(QPainter.Antialiasing, True)
+        p.setBrush(QColor(16, 18, 22)); p.setPen(Qt.NoPen); p.drawEllipse(2, 2, size - 4, size - 4)
+        level = level_q / (LEVELS - 1)
+        m = int(14 * k); w = (size - 2 * m) // BARS
+        for i in range(BARS):
+            amp = _amp(state, level, 2 * math.pi * frame / FRAMES + i * 0.9)
+            x = m + i * w; h = int((size - 2 * m) * amp); y = size - m - h
+            p.fillRect(x + max(1, int(2 * k)), y, w - max(2, int(4 * k)), h, gradient_brush("#FF0033", "#FF1A8A", 1.0, 0.0))
+        p.setPen(QColor(255, 0, 51, 180)); p.setBrush(Qt.NoBrush); p.drawEllipse(2, 2, size - 4, size - 4)
+    finally:
+        p.end()
+    return pm
+
+class TrayAnimator(QObject):
+    def __init__(self, tray, size: int = SIZE, clock=None):
+        super().__init__()
+        self.tray = tray; self.size = size
+        self.state = "idle"; self.level = 0.0; self.paused = False
+        self._atlas = {}           # (состояние, уровень, фаза) -> QIcon
+        self._key = None
+        self._t0 = time.monotonic()
+        self.ticks = 0; self.icon_sets = 0; self.frames_built = 0; self.cpu_sec = 0.0
+        self._clock = clock or anim_clock()
+        self._sub = self._clock.add(self._tick, IDLE_MS, "tray")
+        self._retime()
+
+    def initial_icon(self) -> QIcon:
+        self._key = self._frame_key()
+        return self._icon(self._key)
+
+    def set_state(self, s):
+        if s != self.state:
+            self.state = s; self._retime(); self._tick()
+
+    def set_level(self, v):
+        self.level = max(0.0, min(1.0, float(v)))
+
+    def set_paused(self, paused: bool):
+        """Сеанс заблокирован — значок никто не видит, подписка на часы стоит."""
+        self.paused = bool(paused); self._retime()
+
+    def _retime(self):
+        self._clock.set_period(self._sub, IDLE_MS if self.state == "idle" else ACTIVE_MS)
+        self._clock.set_active(self._sub, not self.paused)
+
+    def _frame_key(self):
+        sp = SPEED.get(self.state, 0)
+        frame = int((time.monotonic() - self._t0) * sp * FRAMES / CYCLE_SEC) % FRAMES if sp else 0
+        lq = round(self.level * (LEVELS - 1)) if self.state == "listening" else 0
+        return (self.state, lq, frame)
+
+    def _icon(self, key) -> QIcon:
+        ic = self._atlas.get(key)
+        if ic is None:
+            ic = self._atlas[key] = QIcon(render(*key, size=self.size))
+            self.frames_built += 1
+        return ic
+
+    def _tick(self, now: float = 0.0):
+        c0 = time.thread_time()
+        self.ticks += 1
+        key = self._frame_key()
+        if key != self._key:
+            self._key = key; self.tray.setIcon(self._icon(key)); self.icon_sets += 1
+        self.cpu_sec += time.thread_time() - c0
+
+    def stats(self) -> dict:
+        return {"ticks": self.ticks, "icon_sets": self.icon_sets, "frames_built": self.frames_built,
+                "atlas": len(self._atlas), "cpu_sec": self.cpu_sec, "paused": self.paused}
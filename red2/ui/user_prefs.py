@@ -8,25 +8,67 @@ APP_NAME = "RedAssistant"
 
 DEFAULTS: Dict[str, Any] = {
     "model": "gpt-4o-mini",
+    "llm_stream": True,            # SSE-стриминг ответа + озвучка по предложениям
+    "llm_request_policy": "queue",  # queue — ответить по очереди; supersede — новый запрос отменяет текущий
+    "summary_model": "gpt-4o-mini",  # модель для свёртки старой истории
+    "context_budget": {},          # {модель: токенов на запрос}; пусто — по умолчанию для модели
+    "llm_cache": True,             # кэш одинаковых детерминированных (temperature=0) запросов к LLM (SQLite)
+    "llm_cache_ttl_h": 24,
+    "llm_cache_mb": 20,
+    "memory": False,               # долгая память: прошлые разговоры (SQLite + векторы), только по согласию
+    "memory_screen": False,        # помнить и экран (описания, OCR) — там бывают пароли и личные документы
+    "memory_k": 3,                 # сколько воспоминаний подкладывать в запрос
+    "memory_budget_ms": 20,        # бюджет поиска по памяти на запрос, мс
+    "memory_min_score": 0.3,       # косинус, ниже которого воспоминание не подходит
+    "memory_max_items": 200000,    # старше — удаляются при старте
     "base_url": "https://api.openai.com/v1",
     "tts_engine": "edge",          # 'edge' | 'system'
     "tts_rate": 175,
     "tts_volume": 0.9,
     "tts_voice": "ru-RU-SvetlanaNeural",  # online голос по умолчанию
+    "tts_cache_mb": 200,           # дисковый кэш синтезированных фраз (0 — выключить)
+    "tts_warm_phrases": [],        # фразы, которые досинтезировать в кэш при старте
     "show_splash": True,
+    "chat_max_rows": 500,          # сообщений ленты в памяти; старые уходят на диск и подгружаются прокруткой
+    "chat_page": 250,
     "ocr_lang": "auto",
+    "ocr_engine": "auto",          # auto | tesserocr (тёплый API в процессе) | cli (tesseract.exe на вызов)
+    "ocr_scale": 1,                # увеличение кадра перед OCR (2 — для очень мелкого шрифта)
+    "ocr_binarize": False,         # порог Оцу в NumPy перед Tesseract
+    "ocr_workers": 0,              # процессов для OCR плитками (0 — ядра минус одно, до 4)
+    "vision_capture": "full",      # full | window (активное окно) | cursor (область у курсора) | rect (выделить)
+    "vision_cursor_box": [1024, 640],
+    "vision_screen": "primary",    # primary | all (все мониторы) | номер экрана
+    "vision_max_dim": 1024,        # скриншот для vision-модели: длинная сторона, px (0 — как есть)
+    "vision_format": "jpeg",       # jpeg | webp | png
+    "vision_quality": 70,
+    "vision_gray": False,
+    "vision_detail": "low",        # low | high | auto
+    "vision_ocr_wait": 0.3,        # с: сколько LLM ждёт OCR для подсказки (<0 — ждать OCR до конца)
+    "keep_recordings": False,      # сохранять записи в tmp_audio (иначе только в памяти)
+    "keep_recordings_max": 20,
+    "stt_upload_codec": "flac",    # 'flac' | 'ogg' | 'wav' — формат отправки в Whisper
+    "stt_trim_silence": True,      # срезать тишину по краям перед отправкой
+    "stt_policy": "first_confident",  # 'first_confident' | 'prefer_online' | 'offline_only'
+    "stt_min_conf": 0.6,           # мин. средняя уверенность слов Vosk, чтобы не ждать Whisper
+    "stt_online_timeout": 6.0,     # prefer_online: сколько ждать Whisper, сек
+    "stt_streaming": True,         # живое распознавание Vosk во время записи (если задан VOSK_MODEL_PATH)
     "ptt_key": "ctrl+3",
     "vision_key": "ctrl+4",
 }
 
-def _pref_path() -> Path:
+def data_dir() -> Path:
+    """Каталог данных приложения (%APPDATA%/RedAssistant или ~/.config/RedAssistant)."""
     appdata = os.getenv("APPDATA")
     if appdata:
         base = Path(appdata) / APP_NAME
     else:
         base = Path.home() / ".config" / APP_NAME
     base.mkdir(parents=True, exist_ok=True)
-    return base / "user_prefs.json"
+    return base
+
+def _pref_path() -> Path:
+    return data_dir() / "user_prefs.json"
 
 def load() -> Dict[str, Any]:
     p = _pref_path()